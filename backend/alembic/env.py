@@ -8,6 +8,10 @@ from app.db.database_connection import Base
 from app.models.user import User
 from app.models.product import ProductModel
 from app.models.purchase import PurchaseModel
+from app.models.pipeline_job import PipelineJobModel
+from app.models.sales_rollup import SalesRollupModel
+from app.models.counter import CounterModel
+from app.models.stripe_event import StripeEventModel
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
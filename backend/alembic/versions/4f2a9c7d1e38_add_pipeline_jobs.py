@@ -0,0 +1,53 @@
+"""add pipeline jobs
+
+Revision ID: 4f2a9c7d1e38
+Revises: 1b882c490106
+Create Date: 2026-10-19 09:12:27.418305
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4f2a9c7d1e38'
+down_revision: Union[str, Sequence[str], None] = '1b882c490106'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('pipeline_jobs',
+    sa.Column('id', sa.String(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=True),
+    sa.Column('node_url', sa.String(), nullable=False),
+    sa.Column('status', sa.Enum('QUEUED', 'RUNNING', 'COMPLETED', 'FAILED', name='pipeline_job_status_enum'), nullable=False),
+    sa.Column('filename', sa.String(), nullable=True),
+    sa.Column('upload_size', sa.BigInteger(), nullable=True),
+    sa.Column('image_count', sa.Integer(), nullable=True),
+    sa.Column('current_stage', sa.String(), nullable=True),
+    sa.Column('stage_timings', sa.JSON(), nullable=True),
+    sa.Column('artifact_count', sa.Integer(), nullable=True),
+    sa.Column('artifact_size', sa.BigInteger(), nullable=True),
+    sa.Column('error', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('started_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='SET NULL'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_pipeline_jobs_created_at', 'pipeline_jobs', ['created_at'], unique=False)
+    op.create_index('ix_pipeline_jobs_status_created_at', 'pipeline_jobs', ['status', 'created_at'], unique=False)
+    op.create_index('ix_pipeline_jobs_user_id_created_at', 'pipeline_jobs', ['user_id', 'created_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_pipeline_jobs_user_id_created_at', table_name='pipeline_jobs')
+    op.drop_index('ix_pipeline_jobs_status_created_at', table_name='pipeline_jobs')
+    op.drop_index('ix_pipeline_jobs_created_at', table_name='pipeline_jobs')
+    op.drop_table('pipeline_jobs')
+    sa.Enum(name='pipeline_job_status_enum').drop(op.get_bind(), checkfirst=True)
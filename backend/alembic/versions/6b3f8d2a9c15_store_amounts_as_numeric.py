@@ -0,0 +1,40 @@
+"""store amounts as numeric
+
+Revision ID: 6b3f8d2a9c15
+Revises: a7c4e2f9d031
+Create Date: 2026-10-19 21:04:37.518204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6b3f8d2a9c15'
+down_revision: Union[str, Sequence[str], None] = 'a7c4e2f9d031'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Money columns, in cents precision; archived partitions (detached from
+# purchases) keep their floating point amounts
+COLUMNS = (
+    ('purchases', 'amount', True),
+    ('sales_rollups', 'revenue', False),
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Rewrites both tables (every partition of purchases) under an exclusive lock
+    for table, column, nullable in COLUMNS:
+        op.alter_column(table, column, type_=sa.Numeric(12, 2), existing_type=sa.Float(),
+                        existing_nullable=nullable, postgresql_using=f'round({column}::numeric, 2)')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table, column, nullable in COLUMNS:
+        op.alter_column(table, column, type_=sa.Float(), existing_type=sa.Numeric(12, 2),
+                        existing_nullable=nullable, postgresql_using=f'{column}::double precision')
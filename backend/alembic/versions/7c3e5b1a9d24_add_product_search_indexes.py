@@ -0,0 +1,45 @@
+"""add product search indexes
+
+Revision ID: 7c3e5b1a9d24
+Revises: 4f2a9c7d1e38
+Create Date: 2026-10-19 11:02:45.193847
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c3e5b1a9d24'
+down_revision: Union[str, Sequence[str], None] = '4f2a9c7d1e38'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.add_column('products', sa.Column(
+        'search_vector',
+        postgresql.TSVECTOR(),
+        sa.Computed(
+            "setweight(to_tsvector('simple', name), 'A') || "
+            "setweight(to_tsvector('simple', description), 'B')",
+            persisted=True,
+        ),
+        nullable=True,
+    ))
+    op.create_index('ix_products_name_trgm', 'products', ['name'], unique=False,
+                    postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'})
+    op.create_index('ix_products_search_vector', 'products', ['search_vector'], unique=False,
+                    postgresql_using='gin')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_products_search_vector', table_name='products', postgresql_using='gin')
+    op.drop_index('ix_products_name_trgm', table_name='products', postgresql_using='gin')
+    op.drop_column('products', 'search_vector')
@@ -0,0 +1,30 @@
+"""add product sort indexes
+
+Revision ID: 9a1d4e6f2b57
+Revises: 7c3e5b1a9d24
+Create Date: 2026-10-19 12:31:08.562019
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9a1d4e6f2b57'
+down_revision: Union[str, Sequence[str], None] = '7c3e5b1a9d24'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_products_price_id', 'products', ['price', 'id'], unique=False)
+    op.create_index('ix_products_name_id', 'products', ['name', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_products_name_id', table_name='products')
+    op.drop_index('ix_products_price_id', table_name='products')
@@ -0,0 +1,124 @@
+"""partition purchases by month
+
+Revision ID: a7c4e2f9d031
+Revises: f3b9d2e7a514
+Create Date: 2026-10-19 19:37:52.108342
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a7c4e2f9d031'
+down_revision: Union[str, Sequence[str], None] = 'f3b9d2e7a514'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COLUMNS = ("id, product_id, email, name, address, complement, city, state, cep, "
+           "status, amount, stripe_session_id, date")
+
+INDEXES = (
+    ('ix_purchases_id', ['id']),
+    ('ix_purchases_status_date_id', ['status', 'date', 'id']),
+    ('ix_purchases_date_id', ['date', 'id']),
+    ('ix_purchases_product_id_date', ['product_id', 'date']),
+    ('ix_purchases_email_date', ['email', 'date']),
+    ('ix_purchases_stripe_session_id', ['stripe_session_id']),
+)
+
+# Monthly partitions from the oldest purchase to three months ahead, named
+# purchases_yYYYYmMM, with UTC month bounds
+CREATE_MONTHLY_PARTITIONS = """
+DO $$
+DECLARE
+    month timestamp;
+BEGIN
+    FOR month IN
+        SELECT generate_series(
+            date_trunc('month', coalesce(min(date), now()) AT TIME ZONE 'UTC'),
+            date_trunc('month', now() AT TIME ZONE 'UTC') + interval '3 months',
+            interval '1 month'
+        ) FROM purchases_unpartitioned
+    LOOP
+        EXECUTE format(
+            'CREATE TABLE %I PARTITION OF purchases FOR VALUES FROM (%L) TO (%L)',
+            to_char(month, '"purchases_y"YYYY"m"MM'),
+            month AT TIME ZONE 'UTC', (month + interval '1 month') AT TIME ZONE 'UTC'
+        );
+    END LOOP;
+END
+$$"""
+
+COUNT_TRIGGERS = (
+    "CREATE TRIGGER purchases_count_insert AFTER INSERT ON purchases "
+    "REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION count_purchases()",
+    "CREATE TRIGGER purchases_count_delete AFTER DELETE ON purchases "
+    "REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT EXECUTE FUNCTION count_purchases()",
+    "CREATE TRIGGER purchases_count_update AFTER UPDATE ON purchases "
+    "REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION count_purchases()",
+)
+
+
+def _create_purchases(*constraints, **kwargs) -> None:
+    status = postgresql.ENUM('PENDING', 'PAID', 'PROCESSING', 'SHIPPED', 'DELIVERED', 'CANCELED', 'REFUNDED', 'FAILED',
+                             name='status_enum', create_type=False)
+    op.create_table('purchases',
+    sa.Column('id', sa.Integer(), server_default=sa.text("nextval('purchases_id_seq'::regclass)"), nullable=False),
+    sa.Column('product_id', sa.Integer(), nullable=False),
+    sa.Column('email', sa.String(), nullable=False),
+    sa.Column('name', sa.String(), nullable=False),
+    sa.Column('address', sa.Text(), nullable=False),
+    sa.Column('complement', sa.String(), nullable=True),
+    sa.Column('city', sa.String(), nullable=False),
+    sa.Column('state', sa.String(), nullable=False),
+    sa.Column('cep', sa.Integer(), nullable=False),
+    sa.Column('status', status, nullable=False),
+    sa.Column('amount', sa.Float(), nullable=True),
+    sa.Column('stripe_session_id', sa.String(), nullable=True),
+    sa.Column('date', sa.DateTime(timezone=True), nullable=False),
+    *constraints,
+    **kwargs
+    )
+
+
+def _swap_in_new_purchases() -> None:
+    """Copies the renamed old table into the new purchases, then drops it."""
+    op.execute(f"INSERT INTO purchases ({COLUMNS}) SELECT {COLUMNS} FROM purchases_unpartitioned")
+    # Indexes after the copy, which is faster than maintaining them row by row
+    for name, columns in INDEXES:
+        op.create_index(name, 'purchases', columns, unique=False)
+    op.execute("ALTER SEQUENCE purchases_id_seq OWNED BY purchases.id")
+    # Counter triggers last: the copied rows are already counted
+    for statement in COUNT_TRIGGERS:
+        op.execute(statement)
+    op.drop_table('purchases_unpartitioned')
+    op.execute("ANALYZE purchases")
+
+
+def _rename_old_purchases() -> None:
+    op.rename_table('purchases', 'purchases_unpartitioned')
+    op.execute("ALTER TABLE purchases_unpartitioned RENAME CONSTRAINT purchases_pkey TO purchases_unpartitioned_pkey")
+    for name, _ in INDEXES:
+        op.execute(f"DROP INDEX IF EXISTS {name}")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Rewrites the table under an exclusive lock; run it in a maintenance window
+    _rename_old_purchases()
+    _create_purchases(sa.PrimaryKeyConstraint('id', 'date'), postgresql_partition_by='RANGE (date)')
+    op.execute(CREATE_MONTHLY_PARTITIONS)
+    op.execute("CREATE TABLE purchases_default PARTITION OF purchases DEFAULT")
+    _swap_in_new_purchases()
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Archived partitions (outside the purchases table) are not brought back
+    _rename_old_purchases()
+    _create_purchases(sa.PrimaryKeyConstraint('id'))
+    _swap_in_new_purchases()
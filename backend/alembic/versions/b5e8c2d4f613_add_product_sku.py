@@ -0,0 +1,30 @@
+"""add product sku
+
+Revision ID: b5e8c2d4f613
+Revises: 9a1d4e6f2b57
+Create Date: 2026-10-19 13:47:52.804116
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b5e8c2d4f613'
+down_revision: Union[str, Sequence[str], None] = '9a1d4e6f2b57'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('products', sa.Column('sku', sa.String(), nullable=True))
+    op.create_index(op.f('ix_products_sku'), 'products', ['sku'], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_products_sku'), table_name='products')
+    op.drop_column('products', 'sku')
@@ -0,0 +1,34 @@
+"""add purchase indexes
+
+Revision ID: c4d7a1e9b352
+Revises: b5e8c2d4f613
+Create Date: 2026-10-19 16:02:44.118305
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4d7a1e9b352'
+down_revision: Union[str, Sequence[str], None] = 'b5e8c2d4f613'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_purchases_status_date_id', 'purchases', ['status', 'date', 'id'], unique=False)
+    op.create_index('ix_purchases_date_id', 'purchases', ['date', 'id'], unique=False)
+    op.create_index('ix_purchases_product_id_date', 'purchases', ['product_id', 'date'], unique=False)
+    op.create_index('ix_purchases_email_date', 'purchases', ['email', 'date'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_purchases_email_date', table_name='purchases')
+    op.drop_index('ix_purchases_product_id_date', table_name='purchases')
+    op.drop_index('ix_purchases_date_id', table_name='purchases')
+    op.drop_index('ix_purchases_status_date_id', table_name='purchases')
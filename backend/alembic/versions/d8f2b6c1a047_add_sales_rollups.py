@@ -0,0 +1,57 @@
+"""add sales rollups
+
+Revision ID: d8f2b6c1a047
+Revises: c4d7a1e9b352
+Create Date: 2026-10-19 17:26:13.402981
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd8f2b6c1a047'
+down_revision: Union[str, Sequence[str], None] = 'c4d7a1e9b352'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('purchases', sa.Column('amount', sa.Float(), nullable=True))
+    # Existing purchases are valued at their product's current price
+    op.execute(
+        "UPDATE purchases SET amount = products.price FROM products WHERE products.id = purchases.product_id"
+    )
+
+    op.create_table('sales_rollups',
+    sa.Column('grain', sa.String(), nullable=False),
+    sa.Column('dimension', sa.String(), nullable=False),
+    sa.Column('bucket', sa.Date(), nullable=False),
+    sa.Column('key', sa.String(), nullable=False),
+    sa.Column('status', postgresql.ENUM(name='status_enum', create_type=False), nullable=False),
+    sa.Column('orders', sa.Integer(), nullable=False),
+    sa.Column('revenue', sa.Float(), nullable=False),
+    sa.PrimaryKeyConstraint('grain', 'dimension', 'bucket', 'key', 'status')
+    )
+    for grain, bucket in (
+        ("day", "(date AT TIME ZONE 'UTC')::date"),
+        ("week", "date_trunc('week', date AT TIME ZONE 'UTC')::date"),
+        ("month", "date_trunc('month', date AT TIME ZONE 'UTC')::date"),
+    ):
+        for dimension, key in (("all", "''"), ("product", "product_id::varchar"), ("state", "state")):
+            op.execute(
+                "INSERT INTO sales_rollups (grain, dimension, bucket, key, status, orders, revenue) "
+                f"SELECT '{grain}', '{dimension}', {bucket}, {key}, status, count(*), coalesce(sum(amount), 0) "
+                # Grouped by position: Postgres rejects the constant key of "all" in GROUP BY
+                "FROM purchases GROUP BY 3, 4, 5"
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('sales_rollups')
+    op.drop_column('purchases', 'amount')
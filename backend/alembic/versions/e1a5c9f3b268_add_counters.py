@@ -0,0 +1,90 @@
+"""add counters
+
+Revision ID: e1a5c9f3b268
+Revises: d8f2b6c1a047
+Create Date: 2026-10-19 18:02:47.615930
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e1a5c9f3b268'
+down_revision: Union[str, Sequence[str], None] = 'd8f2b6c1a047'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Counter names each row contributes to, and whether updates can change them
+COUNTED_TABLES = {
+    "users": ("ARRAY['users']", False),
+    "products": ("ARRAY['products', 'products.type.' || lower(type::text)]", True),
+    "purchases": ("ARRAY['purchases', 'purchases.status.' || lower(status::text)]", True),
+}
+
+UPSERT = "ON CONFLICT (name) DO UPDATE SET value = counters.value + excluded.value"
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('counters',
+    sa.Column('name', sa.String(), nullable=False),
+    sa.Column('value', sa.BigInteger(), nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+    for table, (keys, on_update) in COUNTED_TABLES.items():
+        op.execute(f"""
+CREATE OR REPLACE FUNCTION count_{table}() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO counters (name, value)
+        SELECT counted.counter, count(*) FROM new_rows, unnest({keys}) AS counted(counter)
+        GROUP BY counted.counter ORDER BY counted.counter
+        {UPSERT};
+    ELSIF TG_OP = 'DELETE' THEN
+        INSERT INTO counters (name, value)
+        SELECT counted.counter, -count(*) FROM old_rows, unnest({keys}) AS counted(counter)
+        GROUP BY counted.counter ORDER BY counted.counter
+        {UPSERT};
+    ELSE
+        INSERT INTO counters (name, value)
+        SELECT changes.counter, sum(changes.delta) FROM (
+            SELECT counted.counter, 1 AS delta FROM new_rows, unnest({keys}) AS counted(counter)
+            UNION ALL
+            SELECT counted.counter, -1 AS delta FROM old_rows, unnest({keys}) AS counted(counter)
+        ) AS changes
+        GROUP BY changes.counter HAVING sum(changes.delta) <> 0 ORDER BY changes.counter
+        {UPSERT};
+    END IF;
+    RETURN NULL;
+END
+$$""")
+        op.execute(
+            f"CREATE TRIGGER {table}_count_insert AFTER INSERT ON {table} "
+            f"REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION count_{table}()"
+        )
+        op.execute(
+            f"CREATE TRIGGER {table}_count_delete AFTER DELETE ON {table} "
+            f"REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT EXECUTE FUNCTION count_{table}()"
+        )
+        if on_update:
+            op.execute(
+                f"CREATE TRIGGER {table}_count_update AFTER UPDATE ON {table} "
+                f"REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION count_{table}()"
+            )
+        # Existing rows; the triggers count everything written from here on
+        op.execute(
+            f"INSERT INTO counters (name, value) SELECT counted.counter, count(*) "
+            f"FROM {table}, unnest({keys}) AS counted(counter) GROUP BY counted.counter {UPSERT}"
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in COUNTED_TABLES:
+        for event in ("insert", "update", "delete"):
+            op.execute(f"DROP TRIGGER IF EXISTS {table}_count_{event} ON {table}")
+        op.execute(f"DROP FUNCTION IF EXISTS count_{table}()")
+    op.drop_table('counters')
@@ -0,0 +1,46 @@
+"""add stripe event inbox
+
+Revision ID: f3b9d2e7a514
+Revises: e1a5c9f3b268
+Create Date: 2026-10-19 18:41:09.273614
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3b9d2e7a514'
+down_revision: Union[str, Sequence[str], None] = 'e1a5c9f3b268'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('purchases', sa.Column('stripe_session_id', sa.String(), nullable=True))
+    op.create_index('ix_purchases_stripe_session_id', 'purchases', ['stripe_session_id'], unique=False)
+
+    op.create_table('stripe_events',
+    sa.Column('id', sa.String(), nullable=False),
+    sa.Column('type', sa.String(), nullable=False),
+    sa.Column('payload', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+    sa.Column('received_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('processed_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('error', sa.Text(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_stripe_events_pending', 'stripe_events', ['received_at'], unique=False,
+                    postgresql_where=sa.text('processed_at IS NULL'))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_stripe_events_pending', table_name='stripe_events', postgresql_where=sa.text('processed_at IS NULL'))
+    op.drop_table('stripe_events')
+    op.drop_index('ix_purchases_stripe_session_id', table_name='purchases')
+    op.drop_column('purchases', 'stripe_session_id')
@@ -1,19 +1,22 @@
 import os
+import tempfile
+from typing import Optional
 from dotenv import load_dotenv
 
 # Load environment variables from a .env file
 # This must be called before accessing any environment variables that are defined in .env
 load_dotenv()
 
-def get_env_variable(name: str) -> str:
+def get_env_variable(name: str, default: Optional[str] = None) -> str:
     """
     Retrieves the value of an environment variable.
 
-    Raises an EnvironmentError if the variable is not set, ensuring that
-    critical configuration is always present at runtime.
+    Raises an EnvironmentError if the variable is not set and no default is
+    given, ensuring that critical configuration is always present at runtime.
 
     Args:
         name (str): The name of the environment variable to retrieve.
+        default (Optional[str]): Value used when the variable is not set.
 
     Returns:
         str: The value of the environment variable.
@@ -21,7 +24,7 @@ def get_env_variable(name: str) -> str:
     Raises:
         EnvironmentError: If the specified environment variable is not found.
     """
-    value = os.environ.get(name)
+    value = os.environ.get(name, default)
     if value is None:
         raise EnvironmentError(f"Missing required environment variable: {name}")
     return value
@@ -42,10 +45,86 @@ class Settings:
     long_refresh_token_lifetime: int = int(get_env_variable("LONG_REFRESH_TOKEN_LIFETIME"))
     short_refresh_token_lifetime: int = int(get_env_variable("SHORT_REFRESH_TOKEN_LIFETIME"))
     stripe_key: str = get_env_variable("STRIPE_KEY")
+
+    # Stripe API client: base URL (point it at scripts/stripe_stub.py to test
+    # locally), seconds a request may take and retries of transient failures.
+    stripe_api_base: str = get_env_variable("STRIPE_API_BASE", "https://api.stripe.com")
+    stripe_timeout: float = float(get_env_variable("STRIPE_TIMEOUT", "10"))
+    stripe_max_retries: int = int(get_env_variable("STRIPE_MAX_RETRIES", "2"))
+
+    # Stripe webhooks: signing secret of the endpoint ("whsec_..."; the webhook
+    # answers 503 while it is unset), largest accepted age of a signature in
+    # seconds, events applied per worker transaction and seconds between polls
+    # of the inbox when no webhook wakes the worker.
+    stripe_webhook_secret: str = get_env_variable("STRIPE_WEBHOOK_SECRET", "")
+    stripe_webhook_tolerance: int = int(get_env_variable("STRIPE_WEBHOOK_TOLERANCE", "300"))
+    stripe_webhook_batch_size: int = int(get_env_variable("STRIPE_WEBHOOK_BATCH_SIZE", "200"))
+    stripe_webhook_poll_interval: float = float(get_env_variable("STRIPE_WEBHOOK_POLL_INTERVAL", "5"))
     smtp_username: str = get_env_variable("SMTP_USERNAME")
     smtp_password: str = get_env_variable("SMTP_PASSWORD") # Typo corrected: paswword -> password
     smtp_server: str = get_env_variable("SMTP_SERVER")
     smtp_port: int = int(get_env_variable("SMTP_PORT"))
 
+    # Photogrammetry pipeline nodes. Comma separated base URLs; nodes listed in
+    # GPU_MAINTENANCE_URLS receive no new jobs but keep serving existing ones.
+    gpu_server_urls: list[str] = get_env_variable("GPU_SERVER_URLS", "http://localhost:8090").split(",")
+    gpu_maintenance_urls: list[str] = [
+        url for url in get_env_variable("GPU_MAINTENANCE_URLS", "").split(",") if url
+    ]
+    gpu_health_interval: float = float(get_env_variable("GPU_HEALTH_INTERVAL", "5"))
+
+    # Pipeline progress relay: seconds of silence before a ":keepalive" comment is
+    # sent, and how many events may wait for a slow client before log lines are dropped.
+    sse_keepalive_interval: float = float(get_env_variable("SSE_KEEPALIVE_INTERVAL", "15"))
+    sse_relay_buffer: int = int(get_env_variable("SSE_RELAY_BUFFER", "256"))
+
+    # Resumable photo set uploads: where chunks are stored, the largest chunk
+    # accepted, the largest assembled upload, the most chunks per upload and
+    # how long unfinished uploads are kept.
+    upload_dir: str = get_env_variable("UPLOAD_DIR", os.path.join(tempfile.gettempdir(), "mozukai_uploads"))
+    upload_max_chunk_size: int = int(get_env_variable("UPLOAD_MAX_CHUNK_SIZE", str(64 * 1024 * 1024)))
+    upload_max_size: int = int(get_env_variable("UPLOAD_MAX_SIZE", str(50 * 1024 * 1024 * 1024)))
+    upload_max_chunks: int = int(get_env_variable("UPLOAD_MAX_CHUNKS", "10000"))
+    upload_ttl_hours: float = float(get_env_variable("UPLOAD_TTL_HOURS", "24"))
+
+    # Product catalog cache: seconds an entry stays valid and how many distinct
+    # lookups (filter combinations and product IDs) are kept. A TTL of 0 disables it.
+    catalog_cache_ttl: float = float(get_env_variable("CATALOG_CACHE_TTL", "60"))
+    catalog_cache_max_entries: int = int(get_env_variable("CATALOG_CACHE_MAX_ENTRIES", "1024"))
+
+    # HTTP caching of catalog responses: seconds clients and CDNs may reuse a
+    # response, and how long a stale one may be served while it is revalidated.
+    catalog_max_age: int = int(get_env_variable("CATALOG_MAX_AGE", "60"))
+    catalog_stale_while_revalidate: int = int(get_env_variable("CATALOG_STALE_WHILE_REVALIDATE", "300"))
+
+    # Product image derivatives: where relative `sourceImage` paths live, where
+    # rendered derivatives are cached and how large that cache may grow, the
+    # number of encoding processes and the largest source image accepted.
+    image_source_dir: str = get_env_variable("IMAGE_SOURCE_DIR", "media")
+    image_cache_dir: str = get_env_variable("IMAGE_CACHE_DIR", os.path.join(tempfile.gettempdir(), "mozukai_images"))
+    image_cache_max_bytes: int = int(get_env_variable("IMAGE_CACHE_MAX_BYTES", str(2 * 1024 * 1024 * 1024)))
+    image_workers: int = int(get_env_variable("IMAGE_WORKERS", "2"))
+    image_max_source_bytes: int = int(get_env_variable("IMAGE_MAX_SOURCE_BYTES", str(32 * 1024 * 1024)))
+
+    # Seconds between recounts of the tables behind the admin counters,
+    # which correct any drift of the trigger-maintained counts. 0 disables it.
+    counter_reconcile_interval: float = float(get_env_variable("COUNTER_RECONCILE_INTERVAL", "3600"))
+
+    # Seconds between rebuilds of the sales rollups from purchases, which
+    # correct any drift of the incremental rollups. 0 disables it.
+    sales_rollup_rebuild_interval: float = float(get_env_variable("SALES_ROLLUP_REBUILD_INTERVAL", "86400"))
+
+    # Monthly partitions of purchases: months created ahead of the current
+    # one, whole months kept before it (0 keeps everything), where expired
+    # partitions are archived (schema, and optional tablespace on cheaper
+    # storage), seconds between maintenance runs (0 disables the job) and how
+    # long a run waits for a table lock before giving up until the next one.
+    purchase_partition_months_ahead: int = int(get_env_variable("PURCHASE_PARTITION_MONTHS_AHEAD", "3"))
+    purchase_retention_months: int = int(get_env_variable("PURCHASE_RETENTION_MONTHS", "0"))
+    purchase_archive_schema: str = get_env_variable("PURCHASE_ARCHIVE_SCHEMA", "archive")
+    purchase_archive_tablespace: str = get_env_variable("PURCHASE_ARCHIVE_TABLESPACE", "")
+    purchase_partition_interval: float = float(get_env_variable("PURCHASE_PARTITION_INTERVAL", "86400"))
+    purchase_partition_lock_timeout: str = get_env_variable("PURCHASE_PARTITION_LOCK_TIMEOUT", "5s")
+
 # Create a single instance of the Settings class to be imported throughout the application.
 settings = Settings()
\ No newline at end of file
@@ -0,0 +1,36 @@
+from typing import Any, List, Mapping, Optional
+
+from fastapi import Response
+from pydantic import TypeAdapter
+
+from app.schemas.product import ProductRow
+from app.schemas.purchase import PurchaseRow
+
+# Serializers compiled once at import. They dump plain dict rows straight to
+# JSON bytes, without building or validating model instances per row.
+product_rows = TypeAdapter(List[ProductRow])
+purchase_rows = TypeAdapter(List[PurchaseRow])
+purchase_row = TypeAdapter(PurchaseRow)
+
+
+def json_response(
+    adapter: TypeAdapter,
+    rows: Any,
+    headers: Optional[Mapping[str, str]] = None,
+) -> Response:
+    """
+    Serializes trusted rows with a precompiled adapter.
+
+    Returning a Response from an endpoint bypasses FastAPI's response_model
+    validation, which would otherwise validate every row a second time. Use
+    only for data read from the database, never for unchecked input.
+
+    Args:
+        adapter (TypeAdapter): One of the adapters defined in this module.
+        rows (Any): Rows to serialize, e.g. a list of dicts.
+        headers (Optional[Mapping[str, str]]): Extra response headers.
+
+    Returns:
+        Response: application/json response with the serialized rows.
+    """
+    return Response(content=adapter.dump_json(rows), media_type="application/json", headers=headers)
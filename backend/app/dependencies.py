@@ -1,6 +1,8 @@
 from collections.abc import AsyncGenerator
+from fastapi import Depends
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.db.database_connection import AsyncSessionLocal
+from app.services.product_loader import ProductLoader
 
 async def get_db() -> AsyncGenerator[AsyncSession, None]:
     """
@@ -16,3 +18,13 @@ async def get_db() -> AsyncGenerator[AsyncSession, None]:
     """
     async with AsyncSessionLocal() as session:
         yield session
+
+async def get_product_loader(db: AsyncSession = Depends(get_db)) -> ProductLoader:
+    """
+    Provides the request's ProductLoader.
+
+    FastAPI resolves a dependency once per request, so every product-by-ID
+    load made while handling the request is batched by the same loader,
+    which shares the request's database session.
+    """
+    return ProductLoader(db)
@@ -1,8 +1,15 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.routers import product, user, payments, pipeline, purchase
+from app.routers import admin, analytics, product, user, payments, pipeline, purchase
 from app.db.database_connection import engine, Base
 from app.core.config import settings
+from app.services.analytics_service import run_sales_rollup_rebuild
+from app.services.counter_service import run_counter_reconciliation
+from app.services.image_service import shutdown_image_workers
+from app.services.purchase_partition_service import run_partition_maintenance
+from app.services.stripe_service import stripe_client
+from app.services.stripe_webhook_service import run_webhook_worker
+import asyncio
 import logging
 
 # Initialize FastAPI application instance
@@ -19,6 +26,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],  # Allow all HTTP methods
     allow_headers=["*"],  # Allow all headers
+    expose_headers=["X-Next-Cursor"],  # Pagination cursor of list endpoints
 )
 
 @app.on_event("startup")
@@ -26,12 +34,43 @@ async def startup_event():
     """
     Event handler that runs on application startup.
 
-    Creates all database tables defined in the metadata if they do not exist.
+    Creates all database tables defined in the metadata if they do not exist
+    and starts the periodic counter reconciliation, the sales rollup
+    rebuild, the purchase partition maintenance and the Stripe webhook worker.
     """
     logger.info("Starting up application - creating database tables if not exist")
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
     logger.info("Database tables creation completed")
+    if settings.counter_reconcile_interval > 0:
+        app.state.counter_reconciliation = asyncio.create_task(
+            run_counter_reconciliation(settings.counter_reconcile_interval)
+        )
+    if settings.sales_rollup_rebuild_interval > 0:
+        app.state.sales_rollup_rebuild = asyncio.create_task(
+            run_sales_rollup_rebuild(settings.sales_rollup_rebuild_interval)
+        )
+    if settings.purchase_partition_interval > 0:
+        app.state.partition_maintenance = asyncio.create_task(
+            run_partition_maintenance(settings.purchase_partition_interval)
+        )
+    if settings.stripe_webhook_secret:
+        app.state.stripe_webhook_worker = asyncio.create_task(run_webhook_worker())
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """
+    Event handler that runs on application shutdown.
+
+    Stops the background tasks and the image encoding worker processes, and
+    closes the Stripe client's connections.
+    """
+    for name in ("counter_reconciliation", "sales_rollup_rebuild", "partition_maintenance", "stripe_webhook_worker"):
+        task = getattr(app.state, name, None)
+        if task is not None:
+            task.cancel()
+    shutdown_image_workers()
+    await stripe_client.close()
 
 # Include product router endpoints under default prefix
 app.include_router(product.router)
@@ -51,3 +90,9 @@ logger.info("Pipeline router included")
 
 app.include_router(purchase.router)
 logger.info("Purchase router included")
+
+app.include_router(analytics.router)
+logger.info("Analytics router included")
+
+app.include_router(admin.router)
+logger.info("Admin router included")
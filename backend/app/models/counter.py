@@ -0,0 +1,83 @@
+from typing import List
+from sqlalchemy import BigInteger, Column, DDL, String, event
+from app.db.database_connection import Base
+
+# SQLAlchemy model representing the 'counters' table: running row counts
+# behind the admin count endpoints, so they never run count(*) over a table.
+class CounterModel(Base):
+    __tablename__ = "counters"
+
+    name = Column(String, primary_key=True)
+    # Counter name: a table ("purchases") or a table slice ("purchases.status.paid").
+
+    value = Column(BigInteger, nullable=False, default=0)
+    # Current number of rows, kept by the triggers below and repaired by
+    # counter_service.reconcile_counters.
+
+
+# Counter names each row of a counted table contributes to, as a SQL array.
+# Tables whose names depend on a column also get an UPDATE trigger.
+COUNTED_TABLES = {
+    "users": ("ARRAY['users']", False),
+    "products": ("ARRAY['products', 'products.type.' || lower(type::text)]", True),
+    "purchases": ("ARRAY['purchases', 'purchases.status.' || lower(status::text)]", True),
+}
+
+
+def counter_trigger_ddl(table: str) -> List[str]:
+    """
+    Statements that install the counting triggers of `table`.
+
+    The triggers run once per statement, in the writing transaction, and
+    read the statement's rows from transition tables: a bulk insert of
+    thousands of rows is one grouped upsert into counters, and upserts
+    that change a product's type are counted too. Counter rows are
+    written in name order, so concurrent writers lock them in the same order.
+    """
+    keys, on_update = COUNTED_TABLES[table]
+    upsert = "ON CONFLICT (name) DO UPDATE SET value = counters.value + excluded.value"
+    statements = [
+        f"""
+CREATE OR REPLACE FUNCTION count_{table}() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO counters (name, value)
+        SELECT counted.counter, count(*) FROM new_rows, unnest({keys}) AS counted(counter)
+        GROUP BY counted.counter ORDER BY counted.counter
+        {upsert};
+    ELSIF TG_OP = 'DELETE' THEN
+        INSERT INTO counters (name, value)
+        SELECT counted.counter, -count(*) FROM old_rows, unnest({keys}) AS counted(counter)
+        GROUP BY counted.counter ORDER BY counted.counter
+        {upsert};
+    ELSE
+        INSERT INTO counters (name, value)
+        SELECT changes.counter, sum(changes.delta) FROM (
+            SELECT counted.counter, 1 AS delta FROM new_rows, unnest({keys}) AS counted(counter)
+            UNION ALL
+            SELECT counted.counter, -1 AS delta FROM old_rows, unnest({keys}) AS counted(counter)
+        ) AS changes
+        GROUP BY changes.counter HAVING sum(changes.delta) <> 0 ORDER BY changes.counter
+        {upsert};
+    END IF;
+    RETURN NULL;
+END
+$$""",
+        f"CREATE OR REPLACE TRIGGER {table}_count_insert AFTER INSERT ON {table} "
+        f"REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION count_{table}()",
+        f"CREATE OR REPLACE TRIGGER {table}_count_delete AFTER DELETE ON {table} "
+        f"REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT EXECUTE FUNCTION count_{table}()",
+    ]
+    if on_update:
+        statements.append(
+            f"CREATE OR REPLACE TRIGGER {table}_count_update AFTER UPDATE ON {table} "
+            f"REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION count_{table}()"
+        )
+    return statements
+
+
+# Tables created with Base.metadata.create_all (application startup) get
+# their triggers once every table exists; migrations install them explicitly.
+for _table in COUNTED_TABLES:
+    for _statement in counter_trigger_ddl(_table):
+        event.listen(Base.metadata, "after_create", DDL(_statement).execute_if(dialect="postgresql"))
@@ -0,0 +1,64 @@
+from sqlalchemy import (
+    Column, DateTime, ForeignKey, Index, Integer, BigInteger, JSON, String, Text,
+    Enum as SQLAlchemyEnum,
+)
+from app.db.database_connection import Base
+from app.schemas.pipeline import PipelineJobStatusEnum
+
+# SQLAlchemy model representing the 'pipeline_jobs' table.
+# One row per photogrammetry job, kept up to date by the backend while it relays
+# the job's progress events, so job history never has to be fetched from GPU nodes.
+class PipelineJobModel(Base):
+    __tablename__ = "pipeline_jobs"  # Defines the name of the database table.
+
+    id = Column(String, primary_key=True)
+    # Job ID assigned by the GPU node (sent in the X-Job-ID header).
+
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
+    # Admin user who submitted the job.
+
+    node_url = Column(String, nullable=False)
+    # Base URL of the GPU node that owns the job and its results.
+
+    status = Column(SQLAlchemyEnum(PipelineJobStatusEnum, name="pipeline_job_status_enum"), nullable=False)
+    # Current lifecycle state of the job.
+
+    filename = Column(String, nullable=True)
+    # Name of the uploaded ZIP file.
+
+    upload_size = Column(BigInteger, nullable=True)
+    # Size of the uploaded ZIP file in bytes.
+
+    image_count = Column(Integer, nullable=True)
+    # Number of images found in the upload, as reported by the GPU node.
+
+    current_stage = Column(String, nullable=True)
+    # Name of the pipeline stage currently running (or last run).
+
+    stage_timings = Column(JSON, nullable=True)
+    # Per-stage timestamps: {"<step>": {"name": ..., "started_at": ..., "completed_at": ...}}.
+
+    artifact_count = Column(Integer, nullable=True)
+    # Number of files produced by the job.
+
+    artifact_size = Column(BigInteger, nullable=True)
+    # Total size in bytes of the files produced by the job.
+
+    error = Column(Text, nullable=True)
+    # Last error message reported for a failed job.
+
+    created_at = Column(DateTime(timezone=True), nullable=False)
+    # When the backend handed the job to the GPU node.
+
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    # When the GPU node started processing (after any queueing).
+
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+    # When the job completed or failed.
+
+    __table_args__ = (
+        # Listing endpoints filter by status or user and order by creation time.
+        Index("ix_pipeline_jobs_created_at", "created_at"),
+        Index("ix_pipeline_jobs_status_created_at", "status", "created_at"),
+        Index("ix_pipeline_jobs_user_id_created_at", "user_id", "created_at"),
+    )
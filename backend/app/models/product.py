@@ -1,4 +1,6 @@
-from sqlalchemy import Column, Integer, String, Text, Float, Enum as SQLAlchemyEnum
+from sqlalchemy import Column, Computed, DDL, Index, Integer, String, Text, Float, Enum as SQLAlchemyEnum, event
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import deferred
 from enum import Enum
 from app.db.database_connection import Base
 from app.schemas.product import ProductTypeEnum
@@ -9,6 +11,15 @@ from app.schemas.product import ProductTypeEnum
 # Each instance corresponds to a row in the 'products' table.
 class ProductModel(Base):
     __tablename__ = "products"  # Defines the name of the table in the database.
+    __table_args__ = (
+        # Trigram index on name: typo-tolerant search and indexed ILIKE '%...%' filters.
+        Index("ix_products_name_trgm", "name", postgresql_using="gin", postgresql_ops={"name": "gin_trgm_ops"}),
+        # Full-text index over name and description for /products/search.
+        Index("ix_products_search_vector", "search_vector", postgresql_using="gin"),
+        # Keyset pagination of /products/ by price or name, ties broken by id.
+        Index("ix_products_price_id", "price", "id"),
+        Index("ix_products_name_id", "name", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     # Unique identifier for the product (auto-incremented primary key).
@@ -30,3 +41,26 @@ class ProductModel(Base):
 
     type = Column(SQLAlchemyEnum(ProductTypeEnum, name="types_enum"), nullable=False)
     # Product category, restricted to the defined ProductTypeEnum values. Cannot be null.
+
+    sku = Column(String, unique=True, index=True, nullable=True)
+    # Stock keeping unit; natural key used to upsert products in bulk imports. Optional.
+
+    search_vector = deferred(Column(
+        TSVECTOR,
+        Computed(
+            "setweight(to_tsvector('simple', name), 'A') || "
+            "setweight(to_tsvector('simple', description), 'B')",
+            persisted=True,
+        ),
+    ))
+    # Full-text document (name weighted above description), maintained by the database.
+    # Deferred so regular product queries never load it.
+
+
+# Tables created with Base.metadata.create_all (application startup) need
+# pg_trgm for the trigram index; migrations create the extension themselves.
+event.listen(
+    Base.metadata,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql"),
+)
@@ -1,17 +1,38 @@
 from datetime import datetime, timezone
-from sqlalchemy import Column, DateTime, Integer, String, Text, Enum as SQLAlchemyEnum
+from sqlalchemy import Column, DDL, DateTime, Index, Integer, Numeric, String, Text, Enum as SQLAlchemyEnum, event
 from enum import Enum
 from app.db.database_connection import Base
 from app.schemas.purchase import StatusTypeEnum
 
+# Partition receiving purchases outside every monthly partition; the partition
+# maintenance job moves its rows into monthly partitions.
+DEFAULT_PARTITION = "purchases_default"
+
 # SQLAlchemy model representing the 'purchases' table in the database.
 # This class defines the structure and data types for each column in the table.
+# The table is range partitioned by month on 'date' (purchases_yYYYYmMM
+# partitions, see purchase_partition_service), so queries bounded by date only
+# read the months they cover and every index is split per month.
 class PurchaseModel(Base):
     __tablename__ = "purchases"  # Defines the name of the database table.
+    __table_args__ = (
+        # Purchases by status, newest first (get_filtered_purchases with a status).
+        Index("ix_purchases_status_date_id", "status", "date", "id"),
+        # All purchases by date (get_filtered_purchases without a status).
+        Index("ix_purchases_date_id", "date", "id"),
+        # Purchases of a product (get_purchase_by_product_id).
+        Index("ix_purchases_product_id_date", "product_id", "date"),
+        # A customer's purchases, newest first.
+        Index("ix_purchases_email_date", "email", "date"),
+        # Purchases of a Stripe Checkout Session (webhook processing).
+        Index("ix_purchases_stripe_session_id", "stripe_session_id"),
+        {"postgresql_partition_by": "RANGE (date)"},
+    )
 
-    id = Column(Integer, primary_key=True, index=True)
-    # Unique identifier for each purchase, serving as the primary key.
-    # 'index=True' creates a database index for faster lookups.
+    id = Column(Integer, primary_key=True, autoincrement=True, index=True)
+    # Unique identifier for each purchase, drawn from one sequence for all partitions.
+    # The primary key is (id, date), as a partitioned table's key must include
+    # the partition column; 'index=True' keeps lookups by id alone indexed.
 
     product_id = Column(Integer, nullable=False)
     # Foreign key referencing the product that was purchased. Cannot be null.
@@ -43,5 +64,21 @@ class PurchaseModel(Base):
     # 'nullable=False' means a status must always be present.
     # 'default="Paid"' sets a default value for new purchases if not specified.
 
-    date = Column(DateTime(timezone=True), nullable=False, default=datetime.now(timezone.utc))
-    # Date when purchase was created
\ No newline at end of file
+    amount = Column(Numeric(12, 2), nullable=True)
+    # Price paid, copied from the product when the purchase is created, exact to the cent.
+    # Null for purchases made before it was recorded and for unknown products.
+
+    stripe_session_id = Column(String, nullable=True)
+    # Stripe Checkout Session the purchase was paid with, set when the purchase
+    # comes from the payment webhook. Not unique: a session may buy several products.
+
+    date = Column(DateTime(timezone=True), primary_key=True, nullable=False, default=lambda: datetime.now(timezone.utc))
+    # Date when purchase was created; the partition key.
+
+
+# A partitioned table stores nothing itself: give a newly created one its default partition
+event.listen(
+    PurchaseModel.__table__,
+    "after_create",
+    DDL(f"CREATE TABLE {DEFAULT_PARTITION} PARTITION OF purchases DEFAULT").execute_if(dialect="postgresql"),
+)
\ No newline at end of file
@@ -0,0 +1,31 @@
+from sqlalchemy import Column, Date, Integer, Numeric, String, Enum as SQLAlchemyEnum
+from app.db.database_connection import Base
+from app.schemas.purchase import StatusTypeEnum
+
+# SQLAlchemy model representing the 'sales_rollups' table.
+# Pre-aggregated order counts and revenue per period, kept up to date in the
+# same transaction as every purchase insert and status change, so sales
+# analytics never scan the purchases table.
+class SalesRollupModel(Base):
+    __tablename__ = "sales_rollups"  # Defines the name of the database table.
+
+    grain = Column(String, primary_key=True)
+    # Period length: "day", "week" (starting Monday) or "month", in UTC.
+
+    dimension = Column(String, primary_key=True)
+    # Breakdown of the row: "all", "product" or "state".
+
+    bucket = Column(Date, primary_key=True)
+    # First day of the period.
+
+    key = Column(String, primary_key=True)
+    # Product ID or state for the "product" and "state" dimensions, "" for "all".
+
+    status = Column(SQLAlchemyEnum(StatusTypeEnum, name="status_enum"), primary_key=True)
+    # Current status of the purchases counted in this row.
+
+    orders = Column(Integer, nullable=False, default=0)
+    # Number of purchases.
+
+    revenue = Column(Numeric(12, 2), nullable=False, default=0)
+    # Sum of the purchases' amounts; exact, so increments never drift from a rebuild.
@@ -0,0 +1,37 @@
+from sqlalchemy import Column, DateTime, Index, Integer, String, Text, func, text
+from sqlalchemy.dialects.postgresql import JSONB
+from app.db.database_connection import Base
+
+# SQLAlchemy model representing the 'stripe_events' table.
+# Durable inbox of verified Stripe webhook events: the webhook endpoint only
+# stores the event and acknowledges it, and a background worker turns stored
+# events into purchases in batches. The event ID as primary key makes
+# Stripe's redeliveries no-ops.
+class StripeEventModel(Base):
+    __tablename__ = "stripe_events"  # Defines the name of the database table.
+
+    id = Column(String, primary_key=True)
+    # Stripe event ID ("evt_..."), unique per event across redeliveries.
+
+    type = Column(String, nullable=False)
+    # Event type, e.g. "checkout.session.completed".
+
+    payload = Column(JSONB, nullable=False)
+    # The verified event body as sent by Stripe.
+
+    received_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    # When the webhook stored the event.
+
+    processed_at = Column(DateTime(timezone=True), nullable=True)
+    # When the worker applied the event; null while it is pending.
+
+    attempts = Column(Integer, nullable=False, default=0)
+    # Failed processing attempts; events are retried until MAX_ATTEMPTS.
+
+    error = Column(Text, nullable=True)
+    # Last processing error, or why the event was skipped.
+
+    __table_args__ = (
+        # The worker claims pending events oldest first.
+        Index("ix_stripe_events_pending", "received_at", postgresql_where=text("processed_at IS NULL")),
+    )
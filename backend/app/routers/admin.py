@@ -0,0 +1,77 @@
+import logging
+from typing import Dict
+from fastapi import APIRouter, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.security import require_admin
+from app.dependencies import get_db
+from app.models.user import User
+from app.schemas.admin import AdminSummary, PartitionMaintenanceResult
+from app.services.analytics_service import rebuild_sales_rollups
+from app.services.counter_service import get_admin_summary, reconcile_counters
+from app.services.purchase_partition_service import maintain_purchase_partitions
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/admin", tags=["Admin"])
+
+@router.get("/summary", response_model=AdminSummary)
+async def get_summary(
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(require_admin)
+):
+    """
+    Users, products (per type) and purchases (per status) in one request.
+
+    Served from counters kept by the database on every insert, update and
+    delete, so the cost does not grow with the tables.
+
+    Returns:
+        AdminSummary: Every dashboard total.
+    """
+    return await get_admin_summary(db)
+
+@router.post("/counters/reconcile")
+async def reconcile(current_user: User = Depends(require_admin)) -> Dict[str, int]:
+    """
+    Recounts the counted tables now instead of waiting for the periodic job.
+
+    Scans every counted table; meant for repairs, e.g. after a bulk load
+    with triggers disabled.
+
+    Returns:
+        Dict[str, int]: The corrections applied, by counter name.
+    """
+    logger.info("User %s reconciling counters", current_user.email)
+    return await reconcile_counters()
+
+@router.post("/sales-rollups/rebuild")
+async def rebuild_rollups(
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(require_admin)
+) -> Dict[str, int]:
+    """
+    Rebuilds the sales rollups now instead of waiting for the periodic job.
+
+    Scans every purchase and holds back purchase writes until done; meant
+    for repairs, e.g. after purchases were edited outside the application.
+
+    Returns:
+        Dict[str, int]: The number of rollup rows written.
+    """
+    logger.info("User %s rebuilding sales rollups", current_user.email)
+    rows = await rebuild_sales_rollups(db)
+    await db.commit()
+    return {"rows": rows}
+
+@router.post("/purchases/partitions", response_model=PartitionMaintenanceResult)
+async def maintain_partitions(current_user: User = Depends(require_admin)):
+    """
+    Runs the purchase partition maintenance now instead of waiting for the
+    periodic job: creates upcoming monthly partitions, moves rows out of the
+    default partition and archives partitions past the retention period.
+
+    Returns:
+        PartitionMaintenanceResult: Partitions created and archived.
+    """
+    logger.info("User %s maintaining purchase partitions", current_user.email)
+    return await maintain_purchase_partitions(move_stray_rows=True)
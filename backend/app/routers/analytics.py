@@ -0,0 +1,43 @@
+import logging
+from datetime import date, datetime, timedelta, timezone
+from typing import List, Optional
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.security import require_admin
+from app.dependencies import get_db
+from app.models.user import User
+from app.schemas.analytics import SalesBreakdownEnum, SalesGrainEnum, SalesReport
+from app.schemas.purchase import StatusTypeEnum
+from app.services.analytics_service import get_sales_report
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/analytics", tags=["Analytics"])
+
+@router.get("/sales", response_model=SalesReport)
+async def get_sales(
+    grain: SalesGrainEnum = Query(SalesGrainEnum.day),
+    start: Optional[date] = Query(None),
+    end: Optional[date] = Query(None),
+    by: SalesBreakdownEnum = Query(SalesBreakdownEnum.none),
+    status: Optional[List[StatusTypeEnum]] = Query(None),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(require_admin)
+):
+    """
+    Revenue and order counts per day, week or month, from the sales rollups.
+
+    Query Parameters:
+        grain (SalesGrainEnum): day, week or month (weeks start on Monday, UTC).
+        start (Optional[date]): First day; defaults to 30 days before `end`.
+        end (Optional[date]): Last day; defaults to today.
+        by (SalesBreakdownEnum): none, status, product, type or state.
+        status (Optional[List[StatusTypeEnum]]): Statuses to count, repeatable;
+            defaults to paid, processing, shipped and delivered (all when by=status).
+
+    Returns:
+        SalesReport: Totals and one point per period and breakdown key.
+    """
+    end = end or datetime.now(timezone.utc).date()
+    start = start or end - timedelta(days=30)
+    return await get_sales_report(db, grain=grain, start=start, end=end, by=by, statuses=status)
@@ -1,8 +1,15 @@
 import logging
-import stripe
-from fastapi import APIRouter, Request
+from typing import Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, status
 from fastapi.responses import JSONResponse
+from fastapi.security import OAuth2PasswordBearer
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.config import settings
+from app.dependencies import get_db
+from app.schemas.payment import CheckoutRequest
+from app.services.checkout_service import create_cart_checkout
+from app.services.stripe_service import StripeAPIError
+from app.services.stripe_webhook_service import store_event, verify_event
 
 # Configure module-level logger
 logger = logging.getLogger(__name__)
@@ -10,47 +17,66 @@ logging.basicConfig(level=logging.INFO)
 
 # Initialize FastAPI router for payment-related endpoints
 router = APIRouter()
-
-# Set Stripe API key from application configuration
-stripe.api_key = settings.stripe_key
+oauth2_scheme = OAuth2PasswordBearer(tokenUrl="login")
 
 
 @router.post("/create-checkout-session")
-async def create_checkout_session(request: Request):
+async def create_checkout_session(
+    checkout: Optional[CheckoutRequest] = None,
+    db: AsyncSession = Depends(get_db),
+    token: str = Depends(oauth2_scheme),
+):
     """
-    Endpoint to create a Stripe Checkout Session for payment processing.
+    Endpoint to create a Stripe Checkout Session for the user's whole cart.
+
+    Accepts an optional JSON payload:
+    - payment_method (str, optional): "card" or "boleto"; both are offered if omitted.
+      Other fields, such as amounts, are ignored.
 
-    Expects a JSON payload with the following fields:
-    - product_name (str): Name of the product being purchased.
-    - amount (str or float): Product price in BRL (Brazilian Real).
+    Line items and prices come from the cart and the products table, not
+    from the client. The session is created through the async Stripe
+    client, so the request waits on Stripe without blocking other requests.
 
     Returns:
         JSONResponse: Contains the Stripe session ID and checkout URL if successful,
                       or an error message if the session creation fails.
+
+    Raises:
+        HTTPException: For invalid tokens, a missing user or an empty cart.
     """
+    payment_method = checkout.payment_method.value if checkout and checkout.payment_method else None
+    logger.info("Received cart checkout request (payment method: %s)", payment_method)
+
     try:
-        data = await request.json()
-        logger.info("Received checkout request for product: %s", data.get("product_name"))
-
-        session = stripe.checkout.Session.create(
-            payment_method_types=["card", "boleto"],
-            line_items=[{
-                "price_data": {
-                    "currency": "brl",
-                    "product_data": {"name": data["product_name"]},
-                    "unit_amount": int(float(data["amount"]) * 100),  # Stripe expects amount in cents
-                },
-                "quantity": 1,
-            }],
-            mode="payment",
-            success_url="http://localhost:5173/sucess",
-            cancel_url="http://localhost:5173/",
-            locale="pt-BR"
-        )
-
-        logger.info("Stripe session created successfully: %s", session.id)
-        return JSONResponse({"id": session.id, "url": session.url})
-
-    except Exception as e:
-        logger.error("Failed to create Stripe session: %s", str(e))
+        session = await create_cart_checkout(db, token, payment_method)
+    except StripeAPIError as e:
+        logger.error("Stripe rejected the checkout session (%s): %s", e.status_code, str(e))
         return JSONResponse({"error": "Failed to create checkout session."}, status_code=400)
+
+    logger.info("Stripe session created successfully: %s", session["id"])
+    return JSONResponse(session)
+
+
+@router.post("/stripe/webhook")
+async def stripe_webhook(
+    request: Request,
+    stripe_signature: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Receives Stripe webhook events.
+
+    The signature is verified against STRIPE_WEBHOOK_SECRET and the event is
+    stored in the inbox (once per event ID, so redeliveries are no-ops)
+    before Stripe is acknowledged; purchases are created from the inbox by
+    the background worker, not in this request.
+
+    Returns:
+        dict: {"received": True} once the event is durably stored.
+    """
+    if not settings.stripe_webhook_secret:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Webhook not configured")
+    payload = await request.body()
+    event = verify_event(payload, stripe_signature, settings.stripe_webhook_secret, settings.stripe_webhook_tolerance)
+    await store_event(db, event)
+    return {"received": True}
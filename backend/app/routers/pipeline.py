@@ -1,11 +1,37 @@
-from fastapi import APIRouter, Depends, UploadFile, File, HTTPException, Header
+from fastapi import APIRouter, Depends, UploadFile, File, HTTPException, Header, Query, Request
 from fastapi.responses import StreamingResponse, Response
-from typing import Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import BinaryIO, Callable, List, Optional
 import httpx
+import io
+from app.core.config import settings
 from app.core.security import get_subject_from_token, require_admin
+from app.db.database_connection import AsyncSessionLocal
+from app.dependencies import get_db
+from app.schemas.pipeline import (
+    NodeMaintenanceUpdate,
+    PipelineJob,
+    PipelineJobStatusEnum,
+    UploadCreate,
+    UploadStatus)
+from app.services.gpu_pool_service import GPUNode, NodeStreamingResponse, gpu_pool
+from app.services.pipeline_job_service import (
+    PipelineJobTracker,
+    create_pipeline_job,
+    find_pipeline_job,
+    follow_pipeline_job,
+    get_pipeline_job,
+    get_pipeline_jobs)
+from app.services.sse_relay import SSEEvent, relay_sse
+from app.services.upload_service import (
+    assemble_upload,
+    create_upload,
+    delete_upload,
+    get_upload_status,
+    write_chunk)
 import logging
 
-from backend.app.models.user import User
+from app.models.user import User
 
 # Configure logger for this module
 logger = logging.getLogger(__name__)
@@ -13,9 +39,6 @@ logger = logging.getLogger(__name__)
 # Create FastAPI router instance
 router = APIRouter()
 
-# URL of the GPU server to which requests will be proxied
-GPU_SERVER_URL = "http://localhost:8090"
-
 async def get_current_user_from_token(authorization: Optional[str] = Header(None)):
     """
     Extract and validate user ID from the Authorization header.
@@ -46,43 +69,44 @@ async def get_current_user_from_token(authorization: Optional[str] = Header(None
         logger.error(f"Authentication error: {str(e)}")
         raise HTTPException(status_code=401, detail="Authentication failed")
 
-async def test_gpu_connection():
-    """
-    Check if the GPU server is reachable by calling its /health endpoint.
-    Returns True if reachable (HTTP 200), False otherwise.
+async def stream_from_gpu_server(
+    node: GPUNode,
+    open_upload: Callable[[], BinaryIO],
+    upload_size: int,
+    filename: str,
+    user_id: str,
+    owner_id: Optional[int] = None,
+    on_accepted: Optional[Callable[[], None]] = None
+):
     """
-    try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            response = await client.get(f"{GPU_SERVER_URL}/health")
-            logger.info(f"GPU server health check: {response.status_code}")
-            return response.status_code == 200
-    except Exception as e:
-        logger.error(f"GPU server connection test failed: {str(e)}")
-        return False
+    Send the uploaded ZIP file to the selected GPU node's pipeline endpoint,
+    then relay the server-sent events (SSE) back event by event, with
+    keep-alive comments and bounded buffering for slow clients.
 
-async def stream_from_gpu_server(file_content: bytes, filename: str, user_id: str):
+    The upload is read from the file object `open_upload` returns, so large
+    files are streamed to the node instead of being held in memory. It is
+    opened once the stream starts and closed when the stream ends.
+    The job is recorded in the pipeline_jobs table once the node accepts it
+    (after which `on_accepted` is called) and its row is updated from the
+    relayed events. The node slot reserved by the pool is released by the
+    NodeStreamingResponse carrying the stream.
     """
-    Send the uploaded ZIP file to the GPU server's pipeline endpoint,
-    then stream back the server-sent events (SSE) response asynchronously.
-    """
-    logger.info(f"Starting stream_from_gpu_server for user {user_id}, file {filename}")
-    
-    # Check GPU server availability before forwarding
-    if not await test_gpu_connection():
-        yield b"data: ERROR: GPU server is not reachable\n\n"
-        return
-    
-    # Prepare multipart/form-data payload with file
-    files = {"file": (filename, file_content, "application/zip")}
+    tracker: Optional[PipelineJobTracker] = None
+    upload: Optional[BinaryIO] = None
+    logger.info(f"Starting stream_from_gpu_server for user {user_id}, file {filename} on {node.url}")
     
     # Optionally send user ID in headers for tracking
     headers = {"X-User-ID": user_id}
     
     try:
+        # Prepare multipart/form-data payload with file
+        upload = open_upload()
+        files = {"file": (filename, upload, "application/zip")}
+        
         # Set generous timeouts: connect/read/write/pool
         timeout = httpx.Timeout(connect=30.0, read=3600.0, write=30.0, pool=30.0)
         
-        logger.info(f"Making request to {GPU_SERVER_URL}/run-pipeline/")
+        logger.info(f"Making request to {node.url}/run-pipeline/")
         
         async with httpx.AsyncClient(timeout=timeout) as client:
             logger.info(f"Forwarding pipeline request to GPU server for user {user_id}")
@@ -91,13 +115,30 @@ async def stream_from_gpu_server(file_content: bytes, filename: str, user_id: st
                 # Stream response from GPU server (SSE)
                 async with client.stream(
                     "POST",
-                    f"{GPU_SERVER_URL}/run-pipeline/",
+                    f"{node.url}/run-pipeline/",
                     files=files,
                     headers=headers
                 ) as response:
                     
                     logger.info(f"GPU server response status: {response.status_code}")
                     
+                    # Remember which node owns the job so later requests reach it
+                    job_id = response.headers.get("X-Job-ID")
+                    if job_id:
+                        gpu_pool.remember_job(job_id, node)
+                        async with AsyncSessionLocal() as session:
+                            await create_pipeline_job(
+                                session,
+                                job_id=job_id,
+                                node_url=node.url,
+                                user_id=owner_id,
+                                filename=filename,
+                                upload_size=upload_size,
+                            )
+                        tracker = PipelineJobTracker(job_id)
+                        if on_accepted:
+                            on_accepted()
+                    
                     # If GPU server returns error status, read error message and yield it
                     if response.status_code != 200:
                         error_text = await response.aread()
@@ -106,17 +147,26 @@ async def stream_from_gpu_server(file_content: bytes, filename: str, user_id: st
                         yield f"data: GPU server error ({response.status_code}): {error_msg}\n\n".encode()
                         return
                     
-                    # Stream chunks of data to client
+                    # Relay parsed events to client, feeding the job tracker as they arrive
                     logger.info("Starting to stream response from GPU server")
+                    
+                    async def track(event: SSEEvent) -> None:
+                        if tracker:
+                            await tracker.handle_message(event.data.strip())
+                    
                     try:
-                        chunk_count = 0
-                        async for chunk in response.aiter_bytes():
-                            if chunk:  # only send non-empty chunks
-                                chunk_count += 1
-                                if chunk_count % 10 == 0:
-                                    logger.info(f"Streamed {chunk_count} chunks")
-                                yield chunk
-                        logger.info(f"Streaming completed. Total chunks: {chunk_count}")
+                        frame_count = 0
+                        async for frame in relay_sse(
+                            response.aiter_bytes(),
+                            keepalive_interval=settings.sse_keepalive_interval,
+                            max_buffered=settings.sse_relay_buffer,
+                            on_event=track,
+                        ):
+                            frame_count += 1
+                            if frame_count % 10 == 0:
+                                logger.info(f"Streamed {frame_count} frames")
+                            yield frame
+                        logger.info(f"Streaming completed. Total frames: {frame_count}")
                     except Exception as stream_error:
                         logger.error(f"Streaming error: {str(stream_error)}")
                         yield f"data: STREAMING ERROR: {str(stream_error)}\n\n".encode()
@@ -134,6 +184,12 @@ async def stream_from_gpu_server(file_content: bytes, filename: str, user_id: st
     except Exception as e:
         logger.error(f"Pipeline forwarding error: {str(e)}")
         yield f"data: ERROR: {str(e)}\n\n".encode()
+    finally:
+        if upload:
+            upload.close()
+        if tracker and not tracker.finished:
+            # The job keeps running on the node after the client disconnected
+            follow_pipeline_job(node.url, tracker)
 
 @router.post("/run-pipeline/")
 async def run_pipeline(
@@ -167,10 +223,95 @@ async def run_pipeline(
         logger.error(f"Error reading file: {str(e)}")
         raise HTTPException(status_code=400, detail=f"Error reading file: {str(e)}")
     
+    # Pick the least-loaded GPU node (503 if none is available)
+    node = await gpu_pool.acquire_node()
+    
     # Return StreamingResponse with the SSE stream from GPU server
     logger.info("Starting StreamingResponse")
-    return StreamingResponse(
-        stream_from_gpu_server(file_content, file.filename, user_id),
+    return NodeStreamingResponse(
+        stream_from_gpu_server(
+            node,
+            lambda: io.BytesIO(file_content),
+            len(file_content),
+            file.filename,
+            user_id,
+            owner_id=current_user.id
+        ),
+        gpu_pool,
+        node,
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "Connection": "keep-alive",
+            "Access-Control-Allow-Origin": "*",
+        }
+    )
+
+@router.post("/pipeline/uploads", response_model=UploadStatus, status_code=201)
+async def start_upload(
+    upload: UploadCreate,
+    current_user: User = Depends(require_admin)
+):
+    """
+    Start a resumable, chunked upload of a photo set ZIP.
+
+    The client then PUTs chunks 0..total_chunks-1 (in any order, in parallel
+    if it likes) and calls finalize once every chunk is stored.
+    """
+    logger.info(f"User {current_user.email} starting upload of {upload.filename} ({upload.total_size} bytes)")
+    return await create_upload(upload, owner=current_user.email)
+
+@router.get("/pipeline/uploads/{upload_id}", response_model=UploadStatus)
+async def upload_status(upload_id: str, current_user: User = Depends(require_admin)):
+    """
+    Report which chunks of an upload are stored, so an interrupted client can resume.
+    """
+    return await get_upload_status(upload_id, owner=current_user.email)
+
+@router.put("/pipeline/uploads/{upload_id}/chunks/{index}", response_model=UploadStatus)
+async def upload_chunk(
+    upload_id: str,
+    index: int,
+    request: Request,
+    x_chunk_sha256: str = Header(..., alias="X-Chunk-SHA256"),
+    current_user: User = Depends(require_admin)
+):
+    """
+    Store one chunk. The raw request body is the chunk's bytes and the
+    X-Chunk-SHA256 header its hex SHA-256 digest; mismatches are rejected with 422.
+    """
+    return await write_chunk(upload_id, index, request.stream(), x_chunk_sha256, owner=current_user.email)
+
+@router.post("/pipeline/uploads/{upload_id}/finalize")
+async def finalize_upload(
+    upload_id: str,
+    authorization: Optional[str] = Header(None),
+    current_user: User = Depends(require_admin)
+):
+    """
+    Assemble a complete upload and run the pipeline on it.
+
+    The assembled file is streamed to the least-loaded GPU node and the job's
+    progress is returned as SSE, exactly like /run-pipeline/. The upload is
+    deleted once the node has accepted it; until then finalize can be retried.
+    """
+    user_id = await get_current_user_from_token(authorization)
+    path, filename, size = await assemble_upload(upload_id, owner=current_user.email)
+    
+    node = await gpu_pool.acquire_node()
+    logger.info(f"Finalized upload {upload_id} ({size} bytes), forwarding to {node.url}")
+    return NodeStreamingResponse(
+        stream_from_gpu_server(
+            node,
+            lambda: open(path, "rb"),
+            size,
+            filename,
+            user_id,
+            owner_id=current_user.id,
+            on_accepted=lambda: delete_upload(upload_id)
+        ),
+        gpu_pool,
+        node,
         media_type="text/event-stream",
         headers={
             "Cache-Control": "no-cache",
@@ -179,10 +320,19 @@ async def run_pipeline(
         }
     )
 
+@router.delete("/pipeline/uploads/{upload_id}", status_code=204)
+async def cancel_upload(upload_id: str, current_user: User = Depends(require_admin)):
+    """
+    Abandon an upload and delete its chunks.
+    """
+    delete_upload(upload_id, owner=current_user.email)
+    return Response(status_code=204)
+
 @router.get("/download/{job_id}")
 async def download_results(
     job_id: str,
     authorization: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(require_admin)
 ):
     """
@@ -191,10 +341,12 @@ async def download_results(
     """
     user_id = await get_current_user_from_token(authorization)
     logger.info(f"Download request for job {job_id} by user {user_id}")
+    job = await find_pipeline_job(db, job_id)
+    node = await gpu_pool.node_for_job(job_id, job.node_url if job else None)
     
     try:
         async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.get(f"{GPU_SERVER_URL}/download/{job_id}")
+            response = await client.get(f"{node.url}/download/{job_id}")
             
             if response.status_code != 200:
                 raise HTTPException(status_code=response.status_code, detail="Download failed")
@@ -217,6 +369,7 @@ async def download_results(
 async def get_job_files(
     job_id: str,
     authorization: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(require_admin)
 ):
     """
@@ -225,10 +378,12 @@ async def get_job_files(
     """
     user_id = await get_current_user_from_token(authorization)
     logger.info(f"File tree request for job {job_id} by user {user_id}")
+    job = await find_pipeline_job(db, job_id)
+    node = await gpu_pool.node_for_job(job_id, job.node_url if job else None)
     
     try:
         async with httpx.AsyncClient(timeout=10.0) as client:
-            response = await client.get(f"{GPU_SERVER_URL}/jobs/{job_id}/files")
+            response = await client.get(f"{node.url}/jobs/{job_id}/files")
             
             if response.status_code != 200:
                 raise HTTPException(status_code=response.status_code, detail="Failed to get files")
@@ -243,29 +398,118 @@ async def get_job_files(
 @router.get("/pipeline/health")
 async def pipeline_health(current_user: User = Depends(require_admin)):
     """
-    Health check endpoint to verify if the GPU server is available.
-    Returns combined status of main backend and GPU server.
+    Health check endpoint to verify if the GPU nodes are available.
+    Returns combined status of main backend and every GPU node.
+    """
+    await gpu_pool.refresh(force=True)
+    nodes = gpu_pool.snapshot()
+    available = any(node["healthy"] and not node["maintenance"] for node in nodes)
+    return {
+        "status": "healthy" if available else "unhealthy",
+        "main_backend": "running",
+        "gpu_nodes": nodes
+    }
+
+@router.get("/pipeline/nodes")
+async def list_pipeline_nodes(current_user: User = Depends(require_admin)):
+    """
+    List the configured GPU nodes with their health, queue and maintenance state.
+    """
+    await gpu_pool.refresh()
+    return {"nodes": gpu_pool.snapshot()}
+
+@router.put("/pipeline/nodes/maintenance")
+async def set_pipeline_node_maintenance(
+    update: NodeMaintenanceUpdate,
+    current_user: User = Depends(require_admin)
+):
+    """
+    Put a GPU node into maintenance (drain it) or return it to rotation.
+    Draining nodes receive no new jobs but still serve downloads for their jobs.
+    """
+    node = gpu_pool.set_maintenance(update.url, update.maintenance)
+    logger.info(f"User {current_user.email} set maintenance={update.maintenance} on {node.url}")
+    return node.to_dict()
+
+@router.get("/pipeline/jobs", response_model=List[PipelineJob])
+async def list_pipeline_jobs(
+    status: Optional[PipelineJobStatusEnum] = Query(None),
+    user_id: Optional[int] = Query(None),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=500),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(require_admin)
+):
+    """
+    List pipeline jobs from the database, newest first.
+    Optionally filtered by status or submitting user; never contacts the GPU nodes.
+    """
+    logger.info(f"Listing pipeline jobs (status={status}, user_id={user_id}, skip={skip}, limit={limit})")
+    return await get_pipeline_jobs(db, status=status, user_id=user_id, skip=skip, limit=limit)
+
+@router.get("/pipeline/jobs/{job_id}/events")
+async def watch_pipeline_job(
+    job_id: str,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(require_admin)
+):
+    """
+    Subscribe to the live progress stream of a running (or just finished) job.
+
+    Any number of admins can watch the same job; each viewer is served from
+    the owning GPU node's broadcast hub, which replays the job's stage events
+    before switching to live updates.
     """
+    job = await find_pipeline_job(db, job_id)
+    node = await gpu_pool.node_for_job(job_id, job.node_url if job else None)
+    
+    timeout = httpx.Timeout(connect=10.0, read=3600.0, write=10.0, pool=10.0)
+    client = httpx.AsyncClient(timeout=timeout)
     try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            response = await client.get(f"{GPU_SERVER_URL}/health")
-            if response.status_code == 200:
-                gpu_status = response.json()
-                return {
-                    "status": "healthy",
-                    "main_backend": "running",
-                    "gpu_server": gpu_status
-                }
-            else:
-                return {
-                    "status": "unhealthy",
-                    "main_backend": "running",
-                    "gpu_server": "unreachable"
-                }
-    except Exception as e:
-        logger.error(f"Health check failed: {str(e)}")
-        return {
-            "status": "unhealthy",
-            "main_backend": "running", 
-            "gpu_server": f"error: {str(e)}"
+        response = await client.send(client.build_request("GET", f"{node.url}/jobs/{job_id}/events"), stream=True)
+    except httpx.HTTPError as e:
+        await client.aclose()
+        logger.error(f"Cannot subscribe to job {job_id} on {node.url}: {str(e)}")
+        raise HTTPException(status_code=503, detail="GPU server unavailable")
+    
+    if response.status_code != 200:
+        await response.aclose()
+        await client.aclose()
+        raise HTTPException(status_code=404, detail="No live events for this job")
+    
+    async def relay():
+        try:
+            async for frame in relay_sse(
+                response.aiter_bytes(),
+                keepalive_interval=settings.sse_keepalive_interval,
+                max_buffered=settings.sse_relay_buffer,
+            ):
+                yield frame
+        except httpx.HTTPError as e:
+            logger.error(f"Event stream of job {job_id} interrupted: {str(e)}")
+            yield f"data: STREAMING ERROR: {str(e)}\n\n".encode()
+        finally:
+            await response.aclose()
+            await client.aclose()
+    
+    logger.info(f"User {current_user.email} watching job {job_id} on {node.url}")
+    return StreamingResponse(
+        relay(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "Connection": "keep-alive",
+            "Access-Control-Allow-Origin": "*",
         }
+    )
+
+@router.get("/pipeline/jobs/{job_id}", response_model=PipelineJob)
+async def get_pipeline_job_by_id(
+    job_id: str,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(require_admin)
+):
+    """
+    Retrieve a single pipeline job with its status, timings and artifact sizes.
+    """
+    return await get_pipeline_job(db, job_id)
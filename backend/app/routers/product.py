@@ -1,14 +1,40 @@
 import logging
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from pydantic import TypeAdapter
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
-from app.schemas.product import Product, ProductTypeEnum,ProductCreate
+from fastapi.responses import RedirectResponse
+from app.schemas.product import (
+    ImageFormatEnum,
+    Product,
+    ProductTypeEnum,
+    ProductCreate,
+    ProductImportResult,
+    ProductPartial,
+    ProductSearchResponse,
+    ProductSortEnum,
+    SortOrderEnum)
 from app.db.database_connection import AsyncSessionLocal
 from app.services.product_service import (
     get_all_products_service,
     get_product_by_id_service,
     get_product_count,
+    parse_product_fields,
+    search_products_service,
     create_product_service)
+from app.services.catalog_cache import catalog_cache
+from app.services.single_flight import single_flight
+from app.services.image_service import (
+    MEDIA_TYPES,
+    check_width,
+    derivative_cache,
+    get_image_derivative,
+    image_version)
+from app.services.product_loader import ProductLoader
+from app.dependencies import get_product_loader
+from app.services.product_import_service import MAX_BATCH_SIZE, import_products_service
+from app.core.config import settings
+from app.core.serialization import json_response, product_rows
 from app.core.security import require_admin
 from app.models.user import User
 
@@ -19,6 +45,9 @@ logging.basicConfig(level=logging.INFO)
 # Define router with a prefix and tag for organizational clarity
 router = APIRouter(prefix="/products", tags=["Products"])
 
+# Largest number of IDs accepted by /products/batch
+MAX_BATCH_IDS = 200
+
 
 
 async def get_db():
@@ -29,6 +58,38 @@ async def get_db():
     async with AsyncSessionLocal() as session:
         yield session
 
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    # Weak comparison (RFC 9110): W/ prefixes are ignored
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or etag.removeprefix("W/") in (tag.removeprefix("W/") for tag in candidates)
+
+def conditional(request: Request, response: Response, content, adapter: Optional[TypeAdapter] = None):
+    """
+    Adds the catalog ETag and Cache-Control headers to a catalog read.
+
+    If the client already holds the current representation (If-None-Match),
+    an empty 304 response is returned instead of `content`. With an
+    `adapter`, `content` is serialized on the fast JSON path.
+    """
+    etag = catalog_cache.current_etag()
+    headers = {k: v for k, v in response.headers.items() if k.lower().startswith("x-")}
+    if etag is not None:
+        headers.update({
+            "ETag": etag,
+            "Cache-Control": (
+                f"public, max-age={settings.catalog_max_age}, "
+                f"stale-while-revalidate={settings.catalog_stale_while_revalidate}"
+            ),
+        })
+        if _etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    if adapter is not None:
+        return json_response(adapter, content, headers)
+    response.headers.update(headers)
+    return content
+
 @router.post("", response_model=Product, status_code=201)
 async def create_product(
     product: ProductCreate,
@@ -36,26 +97,142 @@ async def create_product(
 ):
     return await create_product_service(db=db, product=product)
 
-@router.get("/", response_model=List[Product])
+@router.post("/import", response_model=ProductImportResult)
+async def import_products(
+    request: Request,
+    format: Optional[str] = Query(None, pattern="^(ndjson|csv)$"),
+    upsert: bool = Query(False),
+    batch_size: int = Query(1000, ge=1, le=MAX_BATCH_SIZE),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(require_admin)
+):
+    """
+    Bulk import products from an NDJSON or CSV request body.
+
+    The body is read as a stream, so files of any size can be sent. Use
+    `Content-Type: application/x-ndjson` or `text/csv` (or `format=`); CSV
+    files need a header row with the ProductCreate field names.
+
+    Query Parameters:
+        format (Optional[str]): "ndjson" or "csv"; defaults from the Content-Type.
+        upsert (bool): Update existing products matched by `sku`.
+        batch_size (int): Rows written per INSERT statement.
+
+    Returns:
+        ProductImportResult: Counts, rejected rows and throughput.
+    """
+    if format is None:
+        format = "csv" if "csv" in request.headers.get("content-type", "") else "ndjson"
+    logger.info("User %s importing products (%s, upsert=%s)", current_user.email, format, upsert)
+    return await import_products_service(
+        db=db,
+        body=request.stream(),
+        format=format,
+        upsert=upsert,
+        batch_size=batch_size,
+    )
+
+@router.get("/", response_model=List[ProductPartial], response_model_exclude_unset=True)
 async def get_all_products(
+    request: Request,
+    response: Response,
     db: AsyncSession = Depends(get_db),
     type: Optional[ProductTypeEnum] = Query(None),
-    name: Optional[str] = Query(None)
+    name: Optional[str] = Query(None),
+    sort: ProductSortEnum = Query(ProductSortEnum.id),
+    order: SortOrderEnum = Query(SortOrderEnum.asc),
+    limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = Query(None),
+    fields: Optional[str] = Query(None, description="Comma separated columns to return, e.g. id,name,price")
 ):
     """
-    Retrieve a list of products, optionally filtered by type or name.
+    Retrieve a page of products, optionally filtered by type or name.
+
+    When more products follow, the cursor of the next page is returned in
+    the `X-Next-Cursor` header; pass it back as `cursor` with the same
+    filters and sort to continue.
 
     Query Parameters:
         type (Optional[ProductTypeEnum]): Filter by product category.
         name (Optional[str]): Filter by product name (partial match).
+        sort (ProductSortEnum): Order by id, price or name.
+        order (SortOrderEnum): asc or desc.
+        limit (int): Page size (1-500).
+        cursor (Optional[str]): Cursor of the page to fetch.
+        fields (Optional[str]): Projection; id is always included.
 
     Returns:
-        List[Product]: A list of matching products.
+        List[ProductPartial]: A page of matching products.
     """
     logger.info("Fetching products with filters - type: %s, name: %s", type, name)
-    products = await get_all_products_service(db=db, type=type, name=name)
+    products, next_cursor = await get_all_products_service(
+        db=db,
+        type=type,
+        name=name,
+        sort=sort,
+        order=order,
+        limit=limit,
+        cursor=cursor,
+        fields=parse_product_fields(fields),
+    )
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
     logger.info("Returned %d products", len(products))
-    return products
+    return conditional(request, response, products, product_rows)
+
+@router.get("/search", response_model=ProductSearchResponse)
+async def search_products(
+    request: Request,
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=200),
+    type: Optional[ProductTypeEnum] = Query(None),
+    limit: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Search products by name and description.
+
+    Words match as prefixes and small typos in product names are tolerated;
+    hits are ordered by relevance.
+
+    Query Parameters:
+        q (str): Search text.
+        type (Optional[ProductTypeEnum]): Only return products of this type.
+        limit (int): Maximum number of hits (1-100).
+
+    Returns:
+        ProductSearchResponse: Ranked hits with per-type facet counts.
+    """
+    results = await search_products_service(db=db, q=q, type=type, limit=limit)
+    return conditional(request, response, results)
+
+@router.get("/batch", response_model=List[Product])
+async def get_products_batch(
+    ids: str = Query(..., description="Comma separated product IDs, e.g. 3,7,12"),
+    loader: ProductLoader = Depends(get_product_loader)
+):
+    """
+    Retrieve several products by ID in one request and one query.
+
+    Query Parameters:
+        ids (str): Up to 200 comma separated product IDs.
+
+    Returns:
+        List[Product]: Found products, in the order requested; unknown IDs are skipped.
+    """
+    try:
+        product_ids = list(dict.fromkeys(int(value) for value in ids.split(",") if value.strip()))
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="ids must be comma separated integers")
+    if not product_ids or len(product_ids) > MAX_BATCH_IDS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Between 1 and {MAX_BATCH_IDS} ids are required",
+        )
+    rows = await loader.load_many(product_ids)
+    products = [row for row in rows if row is not None]
+    logger.info("Returned %d of %d requested products", len(products), len(product_ids))
+    return json_response(product_rows, products)
 
 @router.get("/count")
 async def count_users(db: AsyncSession = Depends(get_db),current_user: User = Depends(require_admin)):
@@ -75,8 +252,31 @@ async def count_users(db: AsyncSession = Depends(get_db),current_user: User = De
             detail="Could not retrieve product count"
         )
 
+@router.get("/cache-stats")
+async def get_catalog_cache_stats(current_user: User = Depends(require_admin)):
+    """
+    Returns hit/miss metrics of the in-process product catalog cache, the
+    coalescing metrics of concurrent identical reads and the image
+    derivative cache metrics.
+
+    Returns:
+        dict: Hits, misses, hit ratio, evictions, size and catalog version,
+            plus per-service single-flight counters under "single_flight"
+            and the derivative disk cache under "images".
+    """
+    return {
+        **catalog_cache.stats(),
+        "single_flight": single_flight.stats(),
+        "images": derivative_cache.stats(),
+    }
+
 @router.get("/{product_id}", response_model=Product)
-async def get_product_by_id(product_id: int, db: AsyncSession = Depends(get_db)):
+async def get_product_by_id(
+    product_id: int,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_db)
+):
     """
     Retrieve a single product by its unique identifier.
 
@@ -92,6 +292,48 @@ async def get_product_by_id(product_id: int, db: AsyncSession = Depends(get_db))
         logger.info("Product found: %s", product.name)
     else:
         logger.warning("Product with ID %d not found", product_id)
-    return product
+    return conditional(request, response, product)
+
+@router.get("/{product_id}/image")
+async def get_product_image(
+    product_id: int,
+    request: Request,
+    width: int = Query(640),
+    format: ImageFormatEnum = Query(ImageFormatEnum.webp),
+    v: Optional[str] = Query(None, description="Image version; set by the redirect"),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Serve the product image resized to a width preset and re-encoded.
+
+    Requests without the current image version `v` are redirected to the
+    versioned URL (cacheable for CATALOG_MAX_AGE); versioned responses are
+    cached by clients and CDNs as immutable, since a new or overwritten
+    product image changes the version.
+
+    Path Parameters:
+        product_id (int): ID of the product.
+
+    Query Parameters:
+        width (int): One of 160, 320, 640, 960, 1280 or 1920 pixels.
+        format (ImageFormatEnum): webp (default), jpeg or png.
 
+    Returns:
+        Response: The encoded image, or a 307 redirect to the versioned URL.
+    """
+    check_width(width)
+    product = await get_product_by_id_service(product_id=product_id, db=db)
+    version = await image_version(product.sourceImage)
+    if v != version:
+        query = request.url.include_query_params(v=version).query
+        return RedirectResponse(
+            f"{request.url.path}?{query}",
+            status_code=status.HTTP_307_TEMPORARY_REDIRECT,
+            headers={"Cache-Control": f"public, max-age={settings.catalog_max_age}"},
+        )
 
+    key, content = await get_image_derivative(product.sourceImage, width, format)
+    headers = {"ETag": f'"{key}"', "Cache-Control": "public, max-age=31536000, immutable"}
+    if _etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content, media_type=MEDIA_TYPES[format], headers=headers)
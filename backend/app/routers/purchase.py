@@ -1,14 +1,27 @@
+from datetime import datetime, timezone
 from typing import List, Literal, Optional
 from fastapi import APIRouter, Depends, HTTPException, Query, status, Request, Response, Cookie
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.dependencies import get_db
-from app.schemas.purchase import PurchaseCreate, Purchase, StatusTypeEnum  
+from app.dependencies import get_db, get_product_loader
+from app.core.serialization import json_response, purchase_row, purchase_rows
+from app.services.product_loader import ProductLoader
+from app.schemas.purchase import (
+    BulkStatusUpdate,
+    BulkStatusUpdateResult,
+    PurchaseCreate,
+    Purchase,
+    PurchaseStatusUpdate,
+    StatusTypeEnum)
 from app.services.purchase_service import (
+    bulk_update_purchase_status,
     create_purchase,
     get_purchase_by_id,
     get_purchase_by_product_id,
     get_filtered_purchases,
-    get_purchase_count)
+    get_purchase_count,
+    update_purchase_status)
+from app.services.purchase_export_service import MEDIA_TYPES, stream_purchases_export
 from app.models.purchase import PurchaseModel
 import logging
 
@@ -37,37 +50,140 @@ async def create(purchase: PurchaseCreate, db: AsyncSession = Depends(get_db)):
 async def get(
     status: Optional[StatusTypeEnum] = Query(None),
     sort_date: Optional[Literal["asc", "desc"]] = Query("desc"),
-    skip: int = Query(0, ge=0),
+    skip: int = Query(0, ge=0, deprecated=True),
     limit: int = Query(100, ge=1),
+    cursor: Optional[str] = Query(None),
+    include_product: bool = Query(False),
     db: AsyncSession = Depends(get_db),
+    loader: ProductLoader = Depends(get_product_loader),
     current_user: User = Depends(require_admin)
-) -> List[Purchase]:
+):
     """
+    Args:
+        cursor: Cursor of the page to fetch. When more purchases follow, the
+            next page's cursor is returned in the `X-Next-Cursor` header; pass
+            it back with the same status and sort_date to continue
+        include_product: Embed each purchase's product as `product`, loaded
+            for the whole page with a single query
     Returns:
-        A filtered list of purchases, or all if no filters are applied
+        A page of the filtered purchases, or of all if no filters are applied
     """
     logger.info("Fetching a list of purchases")
-    purchases = await get_filtered_purchases(
+    purchases, next_cursor = await get_filtered_purchases(
         db=db,
         status=status,
         sort_date=sort_date,
         skip=skip,
-        limit=limit
+        limit=limit,
+        cursor=cursor
+    )
+    if include_product:
+        products = await loader.load_many(purchase["product_id"] for purchase in purchases)
+        for purchase, product in zip(purchases, products):
+            purchase["product"] = product
+    headers = {"X-Next-Cursor": next_cursor} if next_cursor else None
+    return json_response(purchase_rows, purchases, headers)
+
+@router.get("/purchase/export")
+async def export(
+    format: Literal["csv", "ndjson"] = Query("csv"),
+    gzip: bool = Query(False),
+    status: Optional[StatusTypeEnum] = Query(None),
+    sort_date: Literal["asc", "desc"] = Query("desc"),
+    since: Optional[datetime] = Query(None),
+    until: Optional[datetime] = Query(None),
+    current_user: User = Depends(require_admin)
+):
+    """
+    Downloads every matching purchase in one response, for fulfillment and
+    accounting, instead of paging through /get-purchases.
+
+    Args:
+        format: "csv" (with a header row) or "ndjson" (one purchase per line)
+        gzip: Compress the file on the fly; it is then served as a .gz download
+        status: Only purchases with this status
+        sort_date: Date order
+        since / until: Only purchases made in [since, until)
+    Returns:
+        The file, streamed as rows are read, so memory use does not depend
+        on the number of purchases
+    """
+    logger.info(f"User {current_user.email} exporting purchases as {format}")
+    filename = f"purchases-{datetime.now(timezone.utc):%Y%m%dT%H%M%SZ}.{format}"
+    media_type = MEDIA_TYPES[format]
+    if gzip:
+        filename, media_type = filename + ".gz", "application/gzip"
+    return StreamingResponse(
+        stream_purchases_export(
+            format=format, gzip=gzip, status=status, sort_date=sort_date, since=since, until=until
+        ),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"', "Cache-Control": "no-store"},
     )
-    return [Purchase.model_validate(purchase) for purchase in purchases]
 
 @router.get("/get-purchase/{purchase_id}", response_model=Purchase)
-async def get_by_id(purchase_id: int, db: AsyncSession = Depends(get_db),current_user: User = Depends(require_admin)) -> Purchase:
+async def get_by_id(
+    purchase_id: int,
+    include_product: bool = Query(False),
+    db: AsyncSession = Depends(get_db),
+    loader: ProductLoader = Depends(get_product_loader),
+    current_user: User = Depends(require_admin)
+):
     """
     Args:
         purchase_id: Id from the purchase the user wants to retrieve
+        include_product: Embed the purchased product as `product`
     Returns:
         The purchase with the id the user entered
     """
     logger.info(f"Trying to fetch a purchase by the id: {purchase_id}")
-    purchase = await get_purchase_by_id(db=db, purchase_id=purchase_id)
+    purchase = Purchase.model_validate(await get_purchase_by_id(db=db, purchase_id=purchase_id))
+    if include_product:
+        row = purchase.model_dump()
+        row["product"] = await loader.load(purchase.product_id)
+        return json_response(purchase_row, row)
+    return purchase
+
+@router.put("/purchase/{purchase_id}/status", response_model=Purchase)
+async def update_status(
+    purchase_id: int,
+    update: PurchaseStatusUpdate,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(require_admin)
+):
+    """
+    Args:
+        purchase_id: Id of the purchase to update
+        update: The new status
+    Returns:
+        The updated purchase; sales analytics reflect the change immediately
+    Raises:
+        HTTPException: 409 if the purchase cannot move to that status (see
+            ALLOWED_STATUS_TRANSITIONS)
+    """
+    logger.info(f"Changing status of purchase {purchase_id} to {update.status.value}")
+    purchase = await update_purchase_status(db=db, purchase_id=purchase_id, status=update.status)
     return Purchase.model_validate(purchase)
 
+@router.post("/purchase/status/bulk", response_model=BulkStatusUpdateResult)
+async def bulk_update_status(
+    update: BulkStatusUpdate,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(require_admin)
+):
+    """
+    Args:
+        update: The new status and the purchases to move, by `ids` or by `filter`
+    Returns:
+        One outcome per purchase (updated, unchanged, not_found or
+        invalid_transition); all changes are applied in one transaction
+        and sales analytics reflect them immediately
+    """
+    logger.info(f"Moving purchases to status {update.status.value}")
+    return await bulk_update_purchase_status(
+        db=db, status=update.status, ids=update.ids, filters=update.filter, limit=update.limit
+    )
+
 @router.get("/get-purchase-by-product/{product_id}", response_model=Purchase)
 async def get_by_product_id(product_id: int, db: AsyncSession = Depends(get_db),current_user: User = Depends(require_admin)) -> Purchase:
     """
@@ -12,9 +12,11 @@ from app.services.user_service import (
     get_products_cart,
     get_user_count
 )
-from app.dependencies import get_db
+from app.dependencies import get_db, get_product_loader
+from app.services.product_loader import ProductLoader
 from app.core.security import create_access_token, create_refresh_token, require_admin
 from app.core.config import settings
+from app.core.serialization import json_response, product_rows
 from jwt import PyJWTError
 
 from app.models.user import User
@@ -180,6 +182,7 @@ async def options_logout():
 @router.get("/cart/products")
 async def get_cart_products(
     db: AsyncSession = Depends(get_db),
+    loader: ProductLoader = Depends(get_product_loader),
     token: str = Depends(oauth2_scheme),
 ):
     """
@@ -196,7 +199,7 @@ async def get_cart_products(
         HTTPException: If user not found.
     """
     logger.info("Fetching cart products for user with token")
-    products = await get_products_cart(db, token)
+    products = await get_products_cart(db, token, loader)
     if products is None:
         logger.warning("User not found for token during cart retrieval")
         raise HTTPException(
@@ -204,7 +207,7 @@ async def get_cart_products(
             detail="User not found",
         )
     logger.info("Returned %d products from user cart", len(products))
-    return products
+    return json_response(product_rows, products)
 
 
 @router.delete("/cart/remove/{product_id}")
@@ -0,0 +1,27 @@
+from typing import Dict, List
+from pydantic import BaseModel
+
+# Totals of the admin dashboard, read from the counters table in one query.
+class AdminSummary(BaseModel):
+    users: int
+    # Registered users.
+
+    products: int
+    # Products in the catalog.
+
+    products_by_type: Dict[str, int]
+    # Products per product type, every type included.
+
+    purchases: int
+    # Purchases in any status.
+
+    purchases_by_status: Dict[str, int]
+    # Purchases per status, every status included.
+
+# Outcome of a purchase partition maintenance run.
+class PartitionMaintenanceResult(BaseModel):
+    created: List[str]
+    # Monthly partitions created.
+
+    archived: List[str]
+    # Monthly partitions detached and moved to the archive schema.
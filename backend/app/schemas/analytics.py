@@ -0,0 +1,59 @@
+from datetime import date
+from enum import Enum
+from typing import List, Optional
+from pydantic import BaseModel
+from app.schemas.purchase import StatusTypeEnum
+
+# Period length of a sales report.
+class SalesGrainEnum(str, Enum):
+    day = "day"
+    week = "week"
+    month = "month"
+
+# Breakdown of a sales report.
+class SalesBreakdownEnum(str, Enum):
+    none = "none"
+    status = "status"
+    product = "product"
+    type = "type"
+    state = "state"
+
+# One period (and breakdown key) of a sales report.
+class SalesPoint(BaseModel):
+    bucket: date
+    # First day of the period.
+
+    key: Optional[str] = None
+    # Status, product ID, product type or state; None without a breakdown.
+
+    orders: int
+    # Number of purchases.
+
+    revenue: float
+    # Sum of the purchases' amounts.
+
+# Sales report served from the rollup tables.
+class SalesReport(BaseModel):
+    grain: SalesGrainEnum
+    # Period length.
+
+    by: SalesBreakdownEnum
+    # Breakdown of the points.
+
+    start: date
+    # First day included.
+
+    end: date
+    # Last day included.
+
+    statuses: List[StatusTypeEnum]
+    # Purchase statuses counted.
+
+    total_orders: int
+    # Purchases over the whole range.
+
+    total_revenue: float
+    # Revenue over the whole range.
+
+    points: List[SalesPoint]
+    # One entry per period and key, ordered by period then key.
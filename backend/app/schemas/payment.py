@@ -0,0 +1,13 @@
+from enum import Enum
+from typing import Optional
+from pydantic import BaseModel
+
+# Payment methods offered at checkout.
+class PaymentMethodEnum(str, Enum):
+    card = "card"
+    boleto = "boleto"
+
+# Request body of a cart checkout; products and prices come from the server.
+class CheckoutRequest(BaseModel):
+    payment_method: Optional[PaymentMethodEnum] = None
+    # Method offered on the Stripe page; both are offered if omitted.
@@ -0,0 +1,66 @@
+from datetime import datetime
+from enum import Enum
+from typing import Any, Dict, List, Optional
+from pydantic import BaseModel, Field
+
+
+# Request body used by admins to drain a GPU node or bring it back into rotation.
+class NodeMaintenanceUpdate(BaseModel):
+    url: str
+    # Base URL of the pipeline server, exactly as configured in GPU_SERVER_URLS.
+
+    maintenance: bool
+    # True stops routing new jobs to the node; its existing jobs stay reachable.
+
+
+class PipelineJobStatusEnum(str, Enum):
+    QUEUED = 'queued' # Accepted by a GPU node, waiting for a free slot.
+    RUNNING = 'running' # Pipeline is processing the images.
+    COMPLETED = 'completed' # Pipeline finished and results are downloadable.
+    FAILED = 'failed' # Pipeline failed or the stream ended before completion.
+
+
+# Pydantic model representing a persisted pipeline job.
+class PipelineJob(BaseModel):
+    id: str
+    user_id: Optional[int]
+    node_url: str
+    status: PipelineJobStatusEnum
+    filename: Optional[str]
+    upload_size: Optional[int]
+    image_count: Optional[int]
+    current_stage: Optional[str]
+    stage_timings: Optional[Dict[str, Any]]
+    artifact_count: Optional[int]
+    artifact_size: Optional[int]
+    error: Optional[str]
+    created_at: datetime
+    started_at: Optional[datetime]
+    finished_at: Optional[datetime]
+
+    class Config:
+        from_attributes = True # Enables compatibility with ORM objects
+
+
+# Request body that starts a resumable, chunked upload of a photo set ZIP.
+class UploadCreate(BaseModel):
+    filename: str
+    # Name of the ZIP file; must end with .zip.
+
+    total_size: int = Field(gt=0)
+    # Size of the complete file in bytes.
+
+    chunk_size: int = Field(gt=0)
+    # Size of every chunk except the last one, in bytes.
+
+
+# State of a resumable upload, returned by every upload endpoint.
+class UploadStatus(BaseModel):
+    upload_id: str
+    filename: str
+    total_size: int
+    chunk_size: int
+    total_chunks: int
+    received_chunks: List[int]
+    # Indexes of the chunks stored so far; clients resume by sending the rest.
+    complete: bool
@@ -1,5 +1,7 @@
 from pydantic import BaseModel
 from enum import Enum
+from typing import Dict, List, Optional
+from typing_extensions import TypedDict
 
 # Enumeration to define the allowed product categories.
 # Enforces strict typing and value constraints on product type fields.
@@ -10,6 +12,12 @@ class ProductTypeEnum(str, Enum):
     tools = "tools"
     supply = "supply"
 
+# Output formats of product image derivatives.
+class ImageFormatEnum(str, Enum):
+    webp = "webp"
+    jpeg = "jpeg"
+    png = "png"
+
 # Pydantic model representing the schema for product data.
 # Used for validation, serialization, and documentation in API requests/responses.
 class Product(BaseModel):
@@ -34,15 +42,101 @@ class Product(BaseModel):
     type: ProductTypeEnum
     # Product category, restricted to one of the enumerated types.
 
+    sku: Optional[str] = None
+    # Stock keeping unit, unique when set.
+
     class Config:
         orm_mode = True
         # Enables compatibility with ORM objects,
         # allowing automatic data loading from SQLAlchemy models.
 
+# Projection of a product returned when `fields=` selects a subset of columns.
+# Unselected fields are left unset and omitted from the response.
+class ProductPartial(BaseModel):
+    id: int
+    # Always included; identifies the product.
+
+    name: Optional[str] = None
+    price: Optional[float] = None
+    description: Optional[str] = None
+    sourceImage: Optional[str] = None
+    sourceModel: Optional[str] = None
+    type: Optional[ProductTypeEnum] = None
+    sku: Optional[str] = None
+
+# Plain product row as selected by list queries, serialized without model
+# instances on the fast JSON path. Keys are absent when not projected.
+class ProductRow(TypedDict, total=False):
+    id: int
+    name: str
+    price: float
+    description: str
+    sourceImage: str
+    sourceModel: str
+    type: ProductTypeEnum
+    sku: Optional[str]
+
+# Columns a product listing can be ordered by (ties are broken by id).
+class ProductSortEnum(str, Enum):
+    id = "id"
+    price = "price"
+    name = "name"
+
+class SortOrderEnum(str, Enum):
+    asc = "asc"
+    desc = "desc"
+
 class ProductCreate(BaseModel):
     name: str
     price: float
     description: str
     sourceImage: str
     sourceModel: str
-    type: ProductTypeEnum
\ No newline at end of file
+    type: ProductTypeEnum
+    sku: Optional[str] = None
+
+# Response of /products/search: ranked hits plus per-type counts of all matches.
+class ProductSearchResponse(BaseModel):
+    query: str
+    # Search text as submitted.
+
+    total: int
+    # Number of matching products, respecting the type filter.
+
+    items: List[Product]
+    # Best matches first, at most `limit` of them.
+
+    facets: Dict[ProductTypeEnum, int]
+    # Matches per product type, ignoring the type filter, for refinement UIs.
+
+
+# A row of a bulk import that was rejected, with the reasons.
+class ProductImportError(BaseModel):
+    row: int
+    # 1-based record number in the uploaded file (CSV header excluded).
+
+    errors: List[str]
+    # Validation or parsing messages for the row.
+
+# Summary returned by POST /products/import.
+class ProductImportResult(BaseModel):
+    rows_received: int
+    # Records read from the upload.
+
+    inserted: int
+    # Products created.
+
+    updated: int
+    # Existing products overwritten through their SKU (upsert mode only).
+
+    failed: int
+    # Records rejected; the first ones are detailed in `errors`.
+
+    errors: List[ProductImportError]
+    # Details of rejected records, capped to keep the response small.
+
+    elapsed_seconds: float
+    # Wall time of the import, including reading the upload.
+
+    rows_per_second: float
+    # Throughput over `rows_received`.
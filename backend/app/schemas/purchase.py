@@ -1,5 +1,7 @@
-from typing import Optional
-from pydantic import BaseModel, Field
+from typing import List, Optional
+from typing_extensions import NotRequired, TypedDict
+from app.schemas.product import ProductRow
+from pydantic import BaseModel, Field, model_validator
 from enum import Enum
 from datetime import datetime, timezone
 
@@ -36,12 +38,35 @@ class Purchase(BaseModel):
     # User cep it must be an 8 digit number
     status: StatusTypeEnum
     # Purchase status, restricted to enum types.
+    amount: Optional[float] = None
+    # Price paid, None if it was not recorded
+    stripe_session_id: Optional[str] = None
+    # Stripe Checkout Session, None for purchases not created by the payment webhook
     date: datetime
     # Date that product was purchased
 
     class Config:
         from_attributes = True # Enables compatibility with ORM objects
 
+# Plain purchase row as selected by list queries, serialized without model
+# instances on the fast JSON path.
+class PurchaseRow(TypedDict):
+    id: int
+    product_id: int
+    email: str
+    name: str
+    address: str
+    complement: Optional[str]
+    city: str
+    state: str
+    cep: int
+    status: StatusTypeEnum
+    amount: Optional[float]
+    stripe_session_id: Optional[str]
+    date: datetime
+    product: NotRequired[Optional[ProductRow]]
+    # Purchased product, only present when requested with include_product
+
 class PurchaseCreate(BaseModel):
     product_id: int
     email: str
@@ -57,4 +82,77 @@ class PurchaseCreate(BaseModel):
     class Config:
         from_attributes = True
         # Enables compatibility with ORM objects,
-        # allowing automatic data loading from SQLAlchemy models.
\ No newline at end of file
+        # allowing automatic data loading from SQLAlchemy models.
+
+class PurchaseStatusUpdate(BaseModel):
+    status: StatusTypeEnum
+    # New status of the purchase
+
+# Statuses a purchase may move to from each status. Fulfilment only moves
+# forward (steps may be skipped); cancellations and refunds end an order.
+ALLOWED_STATUS_TRANSITIONS = {
+    StatusTypeEnum.PENDING: {StatusTypeEnum.PAID, StatusTypeEnum.CANCELED, StatusTypeEnum.FAILED},
+    StatusTypeEnum.PAID: {StatusTypeEnum.PROCESSING, StatusTypeEnum.SHIPPED, StatusTypeEnum.DELIVERED,
+                          StatusTypeEnum.CANCELED, StatusTypeEnum.REFUNDED},
+    StatusTypeEnum.PROCESSING: {StatusTypeEnum.SHIPPED, StatusTypeEnum.DELIVERED,
+                                StatusTypeEnum.CANCELED, StatusTypeEnum.REFUNDED},
+    StatusTypeEnum.SHIPPED: {StatusTypeEnum.DELIVERED, StatusTypeEnum.REFUNDED},
+    StatusTypeEnum.DELIVERED: {StatusTypeEnum.REFUNDED},
+    StatusTypeEnum.CANCELED: set(),
+    StatusTypeEnum.REFUNDED: set(),
+    StatusTypeEnum.FAILED: set(),
+}
+
+# Purchases selected by a bulk status change; every condition given must hold.
+class PurchaseStatusFilter(BaseModel):
+    status: Optional[StatusTypeEnum] = None
+    # Current status of the purchases
+    since: Optional[datetime] = None
+    # Purchases made at or after this date
+    until: Optional[datetime] = None
+    # Purchases made before this date
+    product_id: Optional[int] = None
+    # Purchases of this product
+
+# Request body of a bulk status change: either `ids` or `filter`.
+class BulkStatusUpdate(BaseModel):
+    status: StatusTypeEnum
+    # New status of the purchases
+    ids: Optional[List[int]] = Field(None, min_length=1, max_length=5000)
+    # Purchases to change; each gets an outcome
+    filter: Optional[PurchaseStatusFilter] = None
+    # Purchases to change, instead of ids; only those allowed to move to `status` are selected
+    limit: int = Field(1000, ge=1, le=5000)
+    # Most purchases changed through a filter in one request
+
+    @model_validator(mode="after")
+    def one_selection(self):
+        if (self.ids is None) == (self.filter is None):
+            raise ValueError("Give either ids or filter")
+        return self
+
+class StatusOutcomeEnum(str, Enum):
+    UPDATED = 'updated' # The status was changed.
+    UNCHANGED = 'unchanged' # The purchase already had the status.
+    NOT_FOUND = 'not_found' # No purchase has the ID.
+    INVALID_TRANSITION = 'invalid_transition' # The current status cannot move to the new one.
+
+# Result of a bulk status change for one purchase.
+class PurchaseStatusOutcome(BaseModel):
+    id: int
+    # Purchase ID
+    outcome: StatusOutcomeEnum
+    # What happened to the purchase
+    previous_status: Optional[StatusTypeEnum] = None
+    # Status before the change, None if the purchase does not exist
+
+# Response of a bulk status change.
+class BulkStatusUpdateResult(BaseModel):
+    status: StatusTypeEnum
+    # Status requested
+    updated: int
+    # Purchases changed
+    has_more: bool
+    # With a filter: the limit was reached and more purchases may match; repeat the request
+    results: List[PurchaseStatusOutcome]
+    # One outcome per requested ID (in request order), or per purchase changed through a filter
@@ -0,0 +1,290 @@
+import asyncio
+import logging
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta, timezone
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException, status as st
+from sqlalchemy import Integer, cast, delete, func, literal, select, text, union_all
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.database_connection import AsyncSessionLocal
+from app.models.product import ProductModel
+from app.models.purchase import PurchaseModel
+from app.models.sales_rollup import SalesRollupModel
+from app.schemas.analytics import SalesBreakdownEnum, SalesGrainEnum, SalesPoint, SalesReport
+from app.schemas.purchase import StatusTypeEnum
+from app.services.purchase_partition_service import add_months, month_start
+
+logger = logging.getLogger(__name__)
+
+# Statuses counted as sales unless a report asks for others
+REVENUE_STATUSES = (
+    StatusTypeEnum.PAID,
+    StatusTypeEnum.PROCESSING,
+    StatusTypeEnum.SHIPPED,
+    StatusTypeEnum.DELIVERED,
+)
+
+# Longest range a report may cover, in periods
+MAX_REPORT_PERIODS = 1000
+
+_ROLLUP_KEY = ("grain", "dimension", "bucket", "key", "status")
+
+_CENT = Decimal("0.01")
+
+
+def period_start(day: date, grain: SalesGrainEnum) -> date:
+    """First day of the period of `grain` containing `day` (weeks start on Monday)."""
+    if grain == SalesGrainEnum.week:
+        return day - timedelta(days=day.weekday())
+    if grain == SalesGrainEnum.month:
+        return day.replace(day=1)
+    return day
+
+
+def _utc_day(moment: datetime) -> date:
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.astimezone(timezone.utc).date()
+
+
+def sales_deltas(changes: Iterable[Tuple[PurchaseModel, StatusTypeEnum, int]]) -> List[dict]:
+    """
+    Turns purchase changes into rollup increments.
+
+    Args:
+        changes: (purchase, status, sign) triples; sign is +1 to count the
+            purchase under `status` and -1 to stop counting it there. A
+            status change is a -1 for the old status and a +1 for the new.
+
+    Returns:
+        List[dict]: One increment per rollup row, merged and sorted by key
+            so concurrent transactions lock rollup rows in the same order.
+    """
+    merged: Dict[tuple, list] = defaultdict(lambda: [0, Decimal(0)])
+    for purchase, status, sign in changes:
+        day = _utc_day(purchase.date)
+        # Amounts are floats until read back from the database
+        amount = Decimal(str(purchase.amount or 0)).quantize(_CENT)
+        for grain in SalesGrainEnum:
+            bucket = period_start(day, grain)
+            for dimension, key in (("all", ""), ("product", str(purchase.product_id)), ("state", purchase.state)):
+                totals = merged[(grain.value, dimension, bucket, key, StatusTypeEnum(status))]
+                totals[0] += sign
+                totals[1] += sign * amount
+    return [
+        dict(zip(_ROLLUP_KEY, key), orders=orders, revenue=revenue)
+        for key, (orders, revenue) in sorted(merged.items(), key=lambda item: item[0][:4] + (item[0][4].name,))
+        if orders or revenue
+    ]
+
+
+async def apply_sales_deltas(db: AsyncSession, deltas: Sequence[dict]) -> None:
+    """
+    Adds increments to the rollup rows with one upsert.
+
+    Must run in the transaction that writes the purchases, so rollups and
+    purchases commit (or roll back) together.
+    """
+    if not deltas:
+        return
+    statement = insert(SalesRollupModel).values(list(deltas))
+    statement = statement.on_conflict_do_update(
+        index_elements=list(_ROLLUP_KEY),
+        set_={
+            "orders": SalesRollupModel.orders + statement.excluded.orders,
+            "revenue": SalesRollupModel.revenue + statement.excluded.revenue,
+        },
+    )
+    await db.execute(statement)
+
+
+async def record_purchase_created(db: AsyncSession, purchase: PurchaseModel) -> None:
+    """Counts a new purchase in the rollups."""
+    await apply_sales_deltas(db, sales_deltas([(purchase, purchase.status, 1)]))
+
+
+async def record_status_change(db: AsyncSession, purchase: PurchaseModel, old_status: StatusTypeEnum) -> None:
+    """Moves a purchase from its old status to its current one in the rollups."""
+    if old_status == purchase.status:
+        return
+    await apply_sales_deltas(db, sales_deltas([(purchase, old_status, -1), (purchase, purchase.status, 1)]))
+
+
+def _first_period_from(day: date, grain: SalesGrainEnum) -> date:
+    # First period of `grain` starting on or after `day`
+    start = period_start(day, grain)
+    if start == day:
+        return start
+    if grain == SalesGrainEnum.week:
+        return start + timedelta(days=7)
+    return period_start(start + timedelta(days=31), grain)
+
+
+async def rebuild_sales_rollups(db: AsyncSession, since: Optional[date] = None) -> int:
+    """
+    Recomputes the rollup rows from the purchases table.
+
+    Takes a full scan of the purchases rebuilt; meant for backfills and
+    repairs, not for request handling. The rollups are locked against
+    writes until the caller commits, so purchases written meanwhile wait
+    and are then added to the rebuilt rows instead of being lost or
+    counted twice.
+
+    Args:
+        db (AsyncSession): Async database session.
+        since (Optional[date]): Only periods starting on or after this day
+            are rebuilt. Defaults to the oldest month kept in purchases
+            (PURCHASE_RETENTION_MONTHS), so the rollups of archived
+            purchases are kept; without retention, everything is rebuilt.
+
+    Returns:
+        int: Number of rollup rows written.
+    """
+    if since is None and settings.purchase_retention_months > 0:
+        oldest = add_months(month_start(datetime.now(timezone.utc)), -settings.purchase_retention_months)
+        since = oldest.date()
+    await db.execute(text(f"LOCK TABLE {SalesRollupModel.__tablename__} IN EXCLUSIVE MODE"))
+    day = func.timezone("UTC", PurchaseModel.date)
+    buckets = {
+        SalesGrainEnum.day: cast(day, SalesRollupModel.bucket.type),
+        SalesGrainEnum.week: cast(func.date_trunc("week", day), SalesRollupModel.bucket.type),
+        SalesGrainEnum.month: cast(func.date_trunc("month", day), SalesRollupModel.bucket.type),
+    }
+    keys = {
+        "all": literal(""),
+        "product": cast(PurchaseModel.product_id, SalesRollupModel.key.type),
+        "state": PurchaseModel.state,
+    }
+    selects = []
+    for grain, bucket in buckets.items():
+        start = _first_period_from(since, grain) if since else None
+        cleared = delete(SalesRollupModel).where(SalesRollupModel.grain == grain.value)
+        if start:
+            cleared = cleared.where(SalesRollupModel.bucket >= start)
+        for dimension, key in keys.items():
+            query = select(
+                literal(grain.value).label("grain"),
+                literal(dimension).label("dimension"),
+                bucket.label("bucket"),
+                key.label("key"),
+                PurchaseModel.status.label("status"),
+                func.count().label("orders"),
+                func.coalesce(func.sum(PurchaseModel.amount), 0).label("revenue"),
+            ).group_by(bucket, key, PurchaseModel.status)
+            if start:
+                query = query.where(PurchaseModel.date >= datetime.combine(start, time(), timezone.utc))
+            selects.append(query)
+        await db.execute(cleared)
+    result = await db.execute(
+        insert(SalesRollupModel).from_select(list(_ROLLUP_KEY) + ["orders", "revenue"], union_all(*selects))
+    )
+    logger.info("Sales rollups rebuilt from purchases since %s: %d rows", since or "the start", result.rowcount)
+    return result.rowcount
+
+
+async def run_sales_rollup_rebuild(interval: float = settings.sales_rollup_rebuild_interval) -> None:
+    """
+    Rebuilds the sales rollups every `interval` seconds, until cancelled.
+
+    Corrects any drift of the incremental rollups, e.g. from purchases
+    edited outside the application.
+    """
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            async with AsyncSessionLocal() as db:
+                await rebuild_sales_rollups(db)
+                await db.commit()
+        except Exception as e:
+            logger.error("Sales rollup rebuild failed: %s", str(e))
+
+
+async def get_sales_report(
+    db: AsyncSession,
+    grain: SalesGrainEnum,
+    start: date,
+    end: date,
+    by: SalesBreakdownEnum = SalesBreakdownEnum.none,
+    statuses: Optional[List[StatusTypeEnum]] = None,
+) -> SalesReport:
+    """
+    Returns orders and revenue per period, optionally broken down.
+
+    Reads only the rollup rows of the requested range, so the cost depends
+    on the number of periods and keys, not on the number of purchases.
+    Breakdowns by product type join the product rollups to the (small)
+    products table, so they follow products moved to another type.
+
+    Args:
+        db (AsyncSession): Async database session.
+        grain (SalesGrainEnum): day, week or month.
+        start (date): First day included; rounded down to its period.
+        end (date): Last day included.
+        by (SalesBreakdownEnum): none, status, product, type or state.
+        statuses (Optional[List[StatusTypeEnum]]): Statuses to count. Defaults
+            to every status when broken down by status, otherwise to REVENUE_STATUSES.
+
+    Returns:
+        SalesReport: Points ordered by period, then key.
+
+    Raises:
+        HTTPException: If the range is empty or too long (400 error).
+    """
+    start = period_start(start, grain)
+    periods = {SalesGrainEnum.day: 1, SalesGrainEnum.week: 7, SalesGrainEnum.month: 28}[grain]
+    if end < start or (end - start).days // periods > MAX_REPORT_PERIODS:
+        raise HTTPException(status_code=st.HTTP_400_BAD_REQUEST, detail="Invalid or too long date range")
+    if not statuses:
+        statuses = list(StatusTypeEnum) if by == SalesBreakdownEnum.status else list(REVENUE_STATUSES)
+
+    rollup = SalesRollupModel
+    dimension = {
+        SalesBreakdownEnum.product: "product",
+        SalesBreakdownEnum.type: "product",
+        SalesBreakdownEnum.state: "state",
+    }.get(by, "all")
+    key = {
+        SalesBreakdownEnum.status: rollup.status,
+        SalesBreakdownEnum.type: func.coalesce(cast(ProductModel.type, rollup.key.type), "unknown"),
+    }.get(by, rollup.key)
+    group = [rollup.bucket] if by == SalesBreakdownEnum.none else [rollup.bucket, key]
+
+    query = (
+        select(*group, func.sum(rollup.orders), func.sum(rollup.revenue))
+        .where(
+            rollup.grain == grain.value,
+            rollup.dimension == dimension,
+            rollup.bucket.between(start, end),
+            rollup.status.in_(statuses),
+        )
+        .group_by(*group)
+        .order_by(*group)
+    )
+    if by == SalesBreakdownEnum.type:
+        query = query.outerjoin(ProductModel, ProductModel.id == cast(rollup.key, Integer))
+
+    result = await db.execute(query)
+    points = []
+    for row in result.all():
+        bucket, point_key = row[0], (row[1] if len(group) > 1 else None)
+        if isinstance(point_key, StatusTypeEnum):
+            point_key = point_key.value
+        orders, revenue = row[-2], row[-1]
+        if orders:
+            points.append(SalesPoint(bucket=bucket, key=point_key, orders=orders, revenue=round(revenue, 2)))
+    logger.info("Sales report %s by %s from %s to %s: %d points", grain.value, by.value, start, end, len(points))
+    return SalesReport(
+        grain=grain,
+        by=by,
+        start=start,
+        end=end,
+        statuses=statuses,
+        total_orders=sum(point.orders for point in points),
+        total_revenue=round(sum(point.revenue for point in points), 2),
+        points=points,
+    )
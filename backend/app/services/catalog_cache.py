@@ -0,0 +1,122 @@
+import hashlib
+import logging
+import time
+from collections import OrderedDict
+from contextvars import ContextVar
+from typing import Any, Hashable, Optional, Tuple
+
+from pydantic_core import to_json
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Returned by CatalogCache.get when a key is absent or expired
+MISS = object()
+
+# ETag of the catalog value last read or stored by the current request
+_current_etag: ContextVar[Optional[str]] = ContextVar("catalog_etag", default=None)
+
+
+def _etag(value: Any, version: int) -> str:
+    digest = hashlib.blake2b(to_json(value), digest_size=12)
+    return f'W/"{version}.{digest.hexdigest()}"'
+
+
+class CatalogCache:
+    """
+    In-process read-through cache for product catalog lookups.
+
+    Entries expire after `ttl` seconds and the least recently used entry is
+    evicted once `max_entries` is reached. Every write to the catalog must
+    call `invalidate()`, which drops all entries and bumps `version`; a
+    result computed from a query that started before an invalidation is not
+    stored, so a concurrent write can never be masked by a stale entry.
+
+    Each value gets an ETag when it is stored, made of the catalog version
+    and a digest of the value, so validators change with every write and
+    stay correct when an entry is reloaded or served by another worker.
+    `current_etag()` returns the tag of the value the current request used.
+    """
+
+    def __init__(self, ttl: float, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.version = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any, str]]" = OrderedDict()
+
+    def get(self, key: Hashable) -> Any:
+        """Returns the cached value for `key`, or MISS."""
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, value, etag = entry
+            if expires_at > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                _current_etag.set(etag)
+                return value
+            del self._entries[key]
+        self.misses += 1
+        _current_etag.set(None)
+        return MISS
+
+    def set(self, key: Hashable, value: Any, version: Optional[int] = None) -> None:
+        """
+        Stores a value.
+
+        Args:
+            key (Hashable): Cache key, e.g. the lookup's filter parameters.
+            value (Any): Value to cache; must not be mutated afterwards.
+            version (Optional[int]): `version` read before the value was loaded.
+                The value is discarded if the catalog changed in the meantime.
+        """
+        version = self.version if version is None else version
+        etag = _etag(value, version)
+        _current_etag.set(etag)
+        if self.ttl <= 0 or self.max_entries <= 0:
+            return
+        if version != self.version:
+            return
+        self._entries[key] = (time.monotonic() + self.ttl, value, etag)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self) -> None:
+        """Drops every entry; call after any write to the products table."""
+        self._entries.clear()
+        self.version += 1
+        logger.info("Catalog cache invalidated (version %d)", self.version)
+
+    def current_etag(self) -> Optional[str]:
+        """ETag of the value returned by the last get/set of this request."""
+        return _current_etag.get()
+
+    def use_etag(self, etag: Optional[str]) -> None:
+        """Makes `etag` the current request's tag, e.g. for a shared result."""
+        _current_etag.set(etag)
+
+    def stats(self) -> dict:
+        """Hit/miss counters and current size, for monitoring."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl,
+            "version": self.version,
+        }
+
+
+# Shared by all requests of this process
+catalog_cache = CatalogCache(
+    ttl=settings.catalog_cache_ttl,
+    max_entries=settings.catalog_cache_max_entries,
+)
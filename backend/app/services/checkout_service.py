@@ -0,0 +1,104 @@
+import logging
+from collections import Counter
+from typing import Optional
+
+from fastapi import HTTPException, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.security import get_subject_from_token
+from app.models.product import ProductModel
+from app.schemas.payment import PaymentMethodEnum
+from app.services.stripe_service import stripe_client
+from app.services.stripe_webhook_service import encode_cart_metadata, encode_unit_amounts
+from app.services.user_service import get_user_by_email
+
+logger = logging.getLogger(__name__)
+
+# Stripe limits: line items per payment session and characters per metadata value
+MAX_LINE_ITEMS = 100
+MAX_METADATA_LENGTH = 500
+
+PAYMENT_METHODS = tuple(method.value for method in PaymentMethodEnum)
+SUCCESS_URL = "http://localhost:5173/sucess"
+CANCEL_URL = "http://localhost:5173/"
+
+
+async def create_cart_checkout(db: AsyncSession, token: str, payment_method: Optional[str] = None) -> dict:
+    """
+    Creates one Stripe Checkout Session for everything in the user's cart.
+
+    The cart's products are read with a single IN query and every line item
+    is priced from the database, so the client never sets an amount. A
+    product in the cart several times becomes one line item with that
+    quantity. The quantities and the prices charged go to the session
+    metadata, from which the payment webhook creates the purchases.
+
+    Args:
+        db (AsyncSession): Async database session.
+        token (str): JWT token identifying the user.
+        payment_method (Optional[str]): "card" or "boleto"; both are offered if omitted.
+
+    Returns:
+        dict: The Stripe session ID and checkout URL.
+
+    Raises:
+        HTTPException: For invalid tokens (401), a missing user (404), an
+            empty or too large cart (400).
+        StripeAPIError: If Stripe does not create the session.
+    """
+    try:
+        user_email = get_subject_from_token(token)
+    except Exception:
+        logger.warning("Invalid token during cart checkout")
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
+
+    user = await get_user_by_email(db, user_email)
+    if not user:
+        logger.warning("User not found during cart checkout: %s", user_email)
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+
+    cart = list(user.product_cart or [])
+    products = {}
+    if cart:
+        result = await db.execute(
+            select(ProductModel.id, ProductModel.name, ProductModel.price).where(ProductModel.id.in_(set(cart)))
+        )
+        products = {product.id: product for product in result.all()}
+    # Quantities of the products that still exist, in cart order
+    quantities = dict(Counter(product_id for product_id in cart if product_id in products))
+    if not quantities:
+        logger.info("Checkout requested with an empty cart: %s", user_email)
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Cart is empty")
+    if len(cart) > sum(quantities.values()):
+        logger.warning("Skipping %d cart entries of deleted products for user: %s",
+                       len(cart) - sum(quantities.values()), user_email)
+
+    # Stripe expects amounts in cents
+    unit_amounts = {product_id: round(products[product_id].price * 100) for product_id in quantities}
+    metadata = {"product_ids": encode_cart_metadata(quantities), "unit_amounts": encode_unit_amounts(unit_amounts)}
+    if len(quantities) > MAX_LINE_ITEMS or any(len(value) > MAX_METADATA_LENGTH for value in metadata.values()):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Too many products in the cart")
+
+    session = await stripe_client.create_checkout_session({
+        "payment_method_types": [payment_method] if payment_method in PAYMENT_METHODS else list(PAYMENT_METHODS),
+        "line_items": [{
+            "price_data": {
+                "currency": "brl",
+                "product_data": {"name": products[product_id].name},
+                "unit_amount": unit_amounts[product_id],
+            },
+            "quantity": quantity,
+        } for product_id, quantity in quantities.items()],
+        "mode": "payment",
+        "customer_email": user.email,
+        "client_reference_id": str(user.id),
+        "metadata": metadata,
+        "shipping_address_collection": {"allowed_countries": ["BR"]},
+        "success_url": SUCCESS_URL,
+        "cancel_url": CANCEL_URL,
+        "locale": "pt-BR",
+    })
+    logger.info("Checkout session %s created for %d products (%d units) of user: %s",
+                session["id"], len(quantities), sum(quantities.values()), user_email)
+    return {"id": session["id"], "url": session["url"]}
@@ -0,0 +1,118 @@
+import asyncio
+import logging
+from typing import Callable, Dict
+
+from sqlalchemy import String, cast, func, literal, select, union_all
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.database_connection import AsyncSessionLocal
+from app.models.counter import CounterModel
+from app.models.product import ProductModel
+from app.models.purchase import PurchaseModel
+from app.models.user import User
+from app.schemas.admin import AdminSummary
+from app.schemas.product import ProductTypeEnum
+from app.schemas.purchase import StatusTypeEnum
+
+logger = logging.getLogger(__name__)
+
+
+async def get_counter(db: AsyncSession, name: str) -> int:
+    """Returns one counter, 0 if nothing has been counted under `name` yet."""
+    result = await db.execute(select(CounterModel.value).where(CounterModel.name == name))
+    return result.scalar() or 0
+
+
+async def get_counters(db: AsyncSession) -> Dict[str, int]:
+    """Returns every counter by name, in one query."""
+    result = await db.execute(select(CounterModel.name, CounterModel.value))
+    return {name: value for name, value in result.all()}
+
+
+async def get_admin_summary(db: AsyncSession) -> AdminSummary:
+    """
+    Returns the totals of the admin dashboard from a single read of the
+    counters table, with every product type and purchase status present.
+    """
+    counters = await get_counters(db)
+    return AdminSummary(
+        users=counters.get("users", 0),
+        products=counters.get("products", 0),
+        products_by_type={t.value: counters.get(f"products.type.{t.value}", 0) for t in ProductTypeEnum},
+        purchases=counters.get("purchases", 0),
+        purchases_by_status={s.value: counters.get(f"purchases.status.{s.value}", 0) for s in StatusTypeEnum},
+    )
+
+
+def _actual_counts():
+    """count(*) of every counter, grouped straight from the counted tables."""
+    def sliced(prefix: str, column):
+        return select(literal(prefix) + func.lower(cast(column, String)), func.count()).group_by(column)
+
+    return union_all(
+        select(literal("users"), func.count()).select_from(User),
+        select(literal("products"), func.count()).select_from(ProductModel),
+        sliced("products.type.", ProductModel.type),
+        select(literal("purchases"), func.count()).select_from(PurchaseModel),
+        sliced("purchases.status.", PurchaseModel.status),
+    )
+
+
+async def reconcile_counters(session_factory: Callable[[], AsyncSession] = AsyncSessionLocal) -> Dict[str, int]:
+    """
+    Recounts every table and corrects counters that drifted.
+
+    Counts and counters are read in one REPEATABLE READ snapshot, where
+    they describe the same committed rows, so their difference is the
+    exact drift (e.g. from a TRUNCATE or rows written before the triggers
+    existed). The drift is then added in a second transaction, as the
+    triggers add their increments, so writes that commit meanwhile are
+    neither lost nor blocked.
+
+    Args:
+        session_factory (Callable[[], AsyncSession]): Session factory.
+
+    Returns:
+        Dict[str, int]: The corrections applied, by counter name.
+    """
+    async with session_factory() as db:
+        await db.connection(execution_options={"isolation_level": "REPEATABLE READ"})
+        actual = {name: count for name, count in (await db.execute(_actual_counts())).all()}
+        stored = await get_counters(db)
+        await db.rollback()
+
+    drift = {
+        name: actual.get(name, 0) - stored.get(name, 0)
+        for name in sorted(actual.keys() | stored.keys())
+        if actual.get(name, 0) != stored.get(name, 0)
+    }
+    if drift:
+        async with session_factory() as db:
+            statement = insert(CounterModel).values([{"name": name, "value": delta} for name, delta in drift.items()])
+            statement = statement.on_conflict_do_update(
+                index_elements=[CounterModel.name],
+                set_={"value": CounterModel.value + statement.excluded.value},
+            )
+            await db.execute(statement)
+            await db.commit()
+        logger.warning("Corrected %d drifted counters: %s", len(drift), drift)
+    else:
+        logger.info("Counters reconciled, no drift")
+    return drift
+
+
+async def run_counter_reconciliation(interval: float = settings.counter_reconcile_interval) -> None:
+    """
+    Reconciles the counters now and then every `interval` seconds, until cancelled.
+
+    The first pass also seeds the counters of a database whose tables were
+    just created by the application.
+    """
+    while True:
+        try:
+            await reconcile_counters()
+        except Exception as e:
+            logger.error("Counter reconciliation failed: %s", str(e))
+        await asyncio.sleep(interval)
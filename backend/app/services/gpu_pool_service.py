@@ -0,0 +1,247 @@
+import asyncio
+import logging
+import time
+from typing import Dict, List, Optional
+
+import httpx
+from fastapi import HTTPException, status
+from fastapi.responses import StreamingResponse
+from starlette.types import Receive, Scope, Send
+
+from app.core.config import settings
+
+# Configure logger for this module
+logger = logging.getLogger(__name__)
+
+
+class GPUNode:
+    """
+    A single photogrammetry pipeline server known to the backend.
+
+    Load is taken from the node's own /health report (running plus queued
+    jobs) plus the jobs this process routed to it since that report, so a
+    burst of submissions between two health probes still spreads out.
+    """
+
+    def __init__(self, url: str, maintenance: bool = False):
+        self.url = url.rstrip("/")
+        self.maintenance = maintenance
+        self.healthy = False
+        self.active_jobs = 0
+        self.queue_length = 0
+        self.in_flight = 0
+        # Jobs routed here since the last probe, which its report does not count yet
+        self.reserved = 0
+        self.last_checked: Optional[float] = None
+        self.last_error: Optional[str] = None
+
+    @property
+    def load(self) -> int:
+        """Number of jobs the node is running or about to run."""
+        return self.active_jobs + self.queue_length + self.reserved
+
+    @property
+    def accepts_jobs(self) -> bool:
+        """True when new jobs may be routed to this node."""
+        return self.healthy and not self.maintenance
+
+    def to_dict(self) -> dict:
+        return {
+            "url": self.url,
+            "healthy": self.healthy,
+            "maintenance": self.maintenance,
+            "active_jobs": self.active_jobs,
+            "queue_length": self.queue_length,
+            "in_flight": self.in_flight,
+            "reserved": self.reserved,
+            "load": self.load,
+            "last_checked": self.last_checked,
+            "last_error": self.last_error,
+        }
+
+
+class GPUPool:
+    """
+    Pool of pipeline servers with least-loaded routing.
+
+    New jobs go to the healthy, non-maintenance node with the smallest load.
+    The node that accepted a job is remembered so downloads and file listings
+    for that job are sent back to the same node. Nodes put in maintenance
+    drain: they get no new jobs but keep serving the jobs they already own.
+    """
+
+    def __init__(
+        self,
+        urls: List[str],
+        maintenance_urls: List[str],
+        health_interval: float,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        maintenance = {url.rstrip("/") for url in maintenance_urls}
+        self.nodes: Dict[str, GPUNode] = {}
+        for url in urls:
+            url = url.strip().rstrip("/")
+            if url:
+                self.nodes[url] = GPUNode(url, maintenance=url in maintenance)
+        self.health_interval = health_interval
+        # Optional transport override, used by tests to fake pipeline servers
+        self.transport = transport
+        self._job_nodes: Dict[str, str] = {}
+        self._last_refresh = 0.0
+        self._refresh_lock = asyncio.Lock()
+
+    async def _probe(self, client: httpx.AsyncClient, node: GPUNode) -> None:
+        """Refresh one node's health and queue information."""
+        try:
+            response = await client.get(f"{node.url}/health")
+            if response.status_code != 200:
+                node.healthy = False
+                node.last_error = f"HTTP {response.status_code}"
+                return
+            payload = response.json()
+            node.healthy = payload.get("status") == "healthy"
+            node.active_jobs = int(payload.get("active_jobs", 0))
+            node.queue_length = int(payload.get("queue_length", 0))
+            node.reserved = 0
+            node.last_error = None
+        except Exception as e:
+            node.healthy = False
+            node.last_error = str(e)
+            logger.warning("GPU node %s health probe failed: %s", node.url, str(e))
+        finally:
+            node.last_checked = time.time()
+
+    async def refresh(self, force: bool = False) -> None:
+        """
+        Probe every node's /health endpoint.
+
+        Probes run concurrently and are skipped when the last refresh is more
+        recent than the configured health interval, unless forced.
+        """
+        async with self._refresh_lock:
+            if not force and time.monotonic() - self._last_refresh < self.health_interval:
+                return
+            async with httpx.AsyncClient(timeout=5.0, transport=self.transport) as client:
+                await asyncio.gather(*(self._probe(client, node) for node in self.nodes.values()))
+            self._last_refresh = time.monotonic()
+
+    async def acquire_node(self) -> GPUNode:
+        """
+        Select the least-loaded node for a new job and reserve a slot on it.
+
+        The caller must hand the node back with release_node() once the job's
+        stream has ended.
+
+        Raises:
+            HTTPException: 503 if no healthy node is accepting jobs.
+        """
+        await self.refresh()
+        candidates = [node for node in self.nodes.values() if node.accepts_jobs]
+        if not candidates:
+            # Health information may be stale after an outage; retry once.
+            await self.refresh(force=True)
+            candidates = [node for node in self.nodes.values() if node.accepts_jobs]
+        if not candidates:
+            logger.error("No GPU node is available for new jobs")
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="No GPU server is available",
+            )
+
+        node = min(candidates, key=lambda n: n.load)
+        node.in_flight += 1
+        node.reserved += 1
+        logger.info("Routing new job to GPU node %s (load %d)", node.url, node.load)
+        return node
+
+    def release_node(self, node: GPUNode) -> None:
+        """Release a slot reserved by acquire_node()."""
+        node.in_flight = max(node.in_flight - 1, 0)
+        # A job that ended before the next probe no longer loads the node
+        node.reserved = max(node.reserved - 1, 0)
+
+    def remember_job(self, job_id: str, node: GPUNode) -> None:
+        """Record which node owns a job."""
+        self._job_nodes[job_id] = node.url
+
+    async def node_for_job(self, job_id: str, node_url: Optional[str] = None) -> GPUNode:
+        """
+        Return the node that owns a job.
+
+        A node URL recorded elsewhere (e.g. the pipeline_jobs table) can be
+        passed as a hint. Jobs unknown to this process are otherwise looked up
+        by asking every node for the job's file tree.
+
+        Raises:
+            HTTPException: 404 if no node knows the job.
+        """
+        if node_url and node_url.rstrip("/") in self.nodes:
+            self._job_nodes[job_id] = node_url.rstrip("/")
+        url = self._job_nodes.get(job_id)
+        if url and url in self.nodes:
+            return self.nodes[url]
+
+        async def owns(client: httpx.AsyncClient, node: GPUNode) -> bool:
+            try:
+                response = await client.get(f"{node.url}/jobs/{job_id}/files")
+                return response.status_code == 200
+            except httpx.HTTPError:
+                return False
+
+        nodes = list(self.nodes.values())
+        async with httpx.AsyncClient(timeout=5.0, transport=self.transport) as client:
+            results = await asyncio.gather(*(owns(client, node) for node in nodes))
+        for node, found in zip(nodes, results):
+            if found:
+                self.remember_job(job_id, node)
+                return node
+
+        logger.warning("Job %s not found on any GPU node", job_id)
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+
+    def set_maintenance(self, url: str, maintenance: bool) -> GPUNode:
+        """
+        Put a node into (or take it out of) maintenance.
+
+        Raises:
+            HTTPException: 404 if the URL is not part of the pool.
+        """
+        node = self.nodes.get(url.rstrip("/"))
+        if node is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="GPU node not found")
+        node.maintenance = maintenance
+        logger.info("GPU node %s maintenance set to %s", node.url, maintenance)
+        return node
+
+    def snapshot(self) -> List[dict]:
+        """Current state of every node, for the admin UI."""
+        return [node.to_dict() for node in self.nodes.values()]
+
+
+class NodeStreamingResponse(StreamingResponse):
+    """
+    Streaming response that holds a node slot reserved by acquire_node().
+
+    The slot is released when the response ends, however it ends: also
+    when the client is gone before the stream starts, in which case the
+    stream's own cleanup never runs.
+    """
+
+    def __init__(self, content, pool: GPUPool, node: GPUNode, **kwargs):
+        super().__init__(content, **kwargs)
+        self.pool = pool
+        self.node = node
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            self.pool.release_node(self.node)
+
+
+# Single pool shared by the whole application.
+gpu_pool = GPUPool(
+    urls=settings.gpu_server_urls,
+    maintenance_urls=settings.gpu_maintenance_urls,
+    health_interval=settings.gpu_health_interval,
+)
@@ -0,0 +1,339 @@
+import asyncio
+import hashlib
+import io
+import logging
+import multiprocessing
+import os
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Optional, Tuple
+
+import httpx
+from fastapi import HTTPException, status
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from app.core.config import settings
+from app.schemas.product import ImageFormatEnum
+from app.services.single_flight import single_flight
+
+logger = logging.getLogger(__name__)
+
+# Widths a derivative can be rendered at; any other width is rejected so the
+# cache cannot be filled with one entry per pixel.
+WIDTH_PRESETS = (160, 320, 640, 960, 1280, 1920)
+
+MEDIA_TYPES = {
+    ImageFormatEnum.webp: "image/webp",
+    ImageFormatEnum.jpeg: "image/jpeg",
+    ImageFormatEnum.png: "image/png",
+}
+
+_QUALITY = {ImageFormatEnum.webp: 80, ImageFormatEnum.jpeg: 82, ImageFormatEnum.png: None}
+
+# Bump when the rendering below changes, so old derivatives stop being used
+_RENDER_VERSION = 1
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+# Fingerprints of remote sources, by URL: (expiry on the monotonic clock, fingerprint)
+_remote_fingerprints: Dict[str, Tuple[float, str]] = {}
+
+
+def render_derivative(data: bytes, width: int, format: str, quality: Optional[int]) -> bytes:
+    """
+    Resizes and re-encodes an image. Runs in the worker processes.
+
+    The image is scaled down to `width` (never up), keeping its aspect
+    ratio and honouring the EXIF orientation; metadata is not copied.
+    """
+    with Image.open(io.BytesIO(data)) as image:
+        image = ImageOps.exif_transpose(image)
+        if image.width > width:
+            height = max(1, round(image.height * width / image.width))
+            image = image.resize((width, height), Image.Resampling.LANCZOS)
+        if format == "jpeg":
+            image = image.convert("RGB")
+        elif image.mode not in ("RGB", "RGBA", "L", "LA"):
+            image = image.convert("RGBA" if "transparency" in image.info else "RGB")
+        out = io.BytesIO()
+        if format == "png":
+            image.save(out, "PNG", optimize=True)
+        elif format == "webp":
+            image.save(out, "WEBP", quality=quality, method=4)
+        else:
+            image.save(out, "JPEG", quality=quality, optimize=True, progressive=True)
+        return out.getvalue()
+
+
+class DerivativeCache:
+    """
+    Disk cache of rendered image derivatives with LRU eviction.
+
+    Files are named after the hash of their source and rendition, spread
+    over 256 subdirectories. A file's mtime is refreshed on every hit, and
+    once the cache grows past `max_bytes` the least recently used files are
+    removed until it is back under 90% of the limit. Several workers may
+    share the directory: writes are atomic renames and files vanishing
+    under another worker's eviction are treated as misses.
+    """
+
+    def __init__(self, root: str, max_bytes: int):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._size: Optional[int] = None
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, key[:2], key)
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Returns the cached derivative, or None."""
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return data
+
+    def put(self, key: str, data: bytes) -> None:
+        """Stores a derivative and evicts old ones if the cache is full."""
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(temp_path, "wb") as f:
+            f.write(data)
+        os.replace(temp_path, path)
+        if self._size is None:
+            self._size = sum(size for _, size, _ in self._files())
+        else:
+            self._size += len(data)
+        if self._size > self.max_bytes:
+            self._evict()
+
+    def _files(self):
+        for directory, _, names in os.walk(self.root):
+            for name in names:
+                path = os.path.join(directory, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                yield stat.st_mtime, stat.st_size, path
+
+    def _evict(self) -> None:
+        files = sorted(self._files())
+        size = sum(file_size for _, file_size, _ in files)
+        target = self.max_bytes * 0.9
+        for _, file_size, path in files:
+            if size <= target:
+                break
+            try:
+                os.remove(path)
+                self.evictions += 1
+            except FileNotFoundError:
+                pass
+            size -= file_size
+        self._size = size
+        logger.info("Image cache trimmed to %d bytes", size)
+
+    def stats(self) -> dict:
+        """Hit/miss counters and size, for monitoring."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "bytes": self._size,
+            "max_bytes": self.max_bytes,
+        }
+
+
+# Shared by all requests of this process
+derivative_cache = DerivativeCache(settings.image_cache_dir, settings.image_cache_max_bytes)
+
+
+def _local_path(source: str) -> str:
+    root = os.path.realpath(settings.image_source_dir)
+    path = os.path.realpath(os.path.join(root, source.lstrip("/")))
+    if os.path.commonpath([root, path]) != root:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Image not found")
+    return path
+
+
+async def _remote_fingerprint(source: str) -> str:
+    cached = _remote_fingerprints.get(source)
+    if cached and cached[0] > time.monotonic():
+        return cached[1]
+    try:
+        async with httpx.AsyncClient(timeout=10.0, follow_redirects=True) as client:
+            response = await client.head(source)
+            response.raise_for_status()
+    except httpx.HTTPError as e:
+        logger.error("Could not check source image %s: %s", source, e)
+        raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail="Source image unavailable")
+    validators = [response.headers.get(name) for name in ("etag", "last-modified", "content-length")]
+    if validators[0] or validators[1]:
+        fingerprint = "|".join(value or "" for value in validators)
+    else:
+        # Nothing tells versions apart but the bytes themselves
+        fingerprint = hashlib.blake2b(await _read_source(source), digest_size=16).hexdigest()
+    _remote_fingerprints[source] = (time.monotonic() + settings.catalog_max_age, fingerprint)
+    return fingerprint
+
+
+async def source_fingerprint(source: str) -> str:
+    """
+    Identifies the current content of an image source without reading it:
+    size and modification time of local files, ETag / Last-Modified and
+    length of URLs (re-checked every CATALOG_MAX_AGE seconds).
+
+    Raises:
+        HTTPException: If the source is missing (404) or cannot be reached (502).
+    """
+    if source.startswith(("http://", "https://")):
+        return await _remote_fingerprint(source)
+    try:
+        stat = os.stat(_local_path(source))
+    except (FileNotFoundError, NotADirectoryError):
+        logger.warning("Source image %s not found", source)
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Image not found")
+    return f"{stat.st_size}:{stat.st_mtime_ns}"
+
+
+async def image_version(source: str) -> str:
+    """
+    Short hash of a product's image reference and its current content.
+
+    Derivative URLs carry it, so they can be cached as immutable: pointing
+    a product at a new image, or overwriting the image it points at,
+    changes its derivative URLs.
+    """
+    fingerprint = await source_fingerprint(source)
+    return hashlib.blake2b(f"{source}|{fingerprint}".encode(), digest_size=8).hexdigest()
+
+
+def check_width(width: int) -> None:
+    """
+    Raises:
+        HTTPException: If `width` is not one of WIDTH_PRESETS (400 error).
+    """
+    if width not in WIDTH_PRESETS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unsupported width {width}. Allowed: {', '.join(map(str, WIDTH_PRESETS))}",
+        )
+
+
+def _executor() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        # Spawned rather than forked: the server process runs threads and an event loop
+        _pool = ProcessPoolExecutor(
+            max_workers=settings.image_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _pool
+
+
+def shutdown_image_workers() -> None:
+    """Stops the encoding processes; call on application shutdown."""
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(cancel_futures=True)
+        _pool = None
+
+
+async def _read_source(source: str) -> bytes:
+    # Product images are either absolute URLs or paths under IMAGE_SOURCE_DIR
+    if source.startswith(("http://", "https://")):
+        try:
+            async with httpx.AsyncClient(timeout=10.0, follow_redirects=True) as client:
+                async with client.stream("GET", source) as response:
+                    response.raise_for_status()
+                    data = bytearray()
+                    async for chunk in response.aiter_bytes():
+                        data += chunk
+                        if len(data) > settings.image_max_source_bytes:
+                            raise HTTPException(
+                                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                                detail="Source image is too large",
+                            )
+                    return bytes(data)
+        except httpx.HTTPError as e:
+            logger.error("Could not fetch source image %s: %s", source, e)
+            raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail="Source image unavailable")
+
+    path = _local_path(source)
+    try:
+        if os.path.getsize(path) > settings.image_max_source_bytes:
+            raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail="Source image is too large")
+        return await asyncio.to_thread(_read_file, path)
+    except (FileNotFoundError, IsADirectoryError):
+        logger.warning("Source image %s not found", path)
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Image not found")
+
+
+def _read_file(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
+
+
+async def get_image_derivative(source: str, width: int, format: ImageFormatEnum) -> Tuple[str, bytes]:
+    """
+    Returns a product image resized to `width` and encoded as `format`.
+
+    Derivatives are served from the disk cache, keyed by the source's
+    current fingerprint (see source_fingerprint), so a changed source is
+    rendered again; on a miss the source is read once, encoded in the
+    worker process pool, and stored. Concurrent requests for the same
+    missing derivative share one encode.
+
+    Args:
+        source (str): The product's `sourceImage`.
+        width (int): Target width, one of WIDTH_PRESETS.
+        format (ImageFormatEnum): Output format.
+
+    Returns:
+        Tuple[str, bytes]: The derivative's cache key (usable as an ETag) and its bytes.
+
+    Raises:
+        HTTPException: If the width is not a preset (400), the source is missing (404),
+            unreadable or too large (422), or cannot be fetched (502).
+    """
+    check_width(width)
+    quality = _QUALITY[format]
+    fingerprint = await source_fingerprint(source)
+    key = hashlib.blake2b(
+        f"{_RENDER_VERSION}|{source}|{fingerprint}|{width}|{format.value}|{quality}".encode(), digest_size=16
+    ).hexdigest()
+
+    data = await asyncio.to_thread(derivative_cache.get, key)
+    if data is not None:
+        return key, data
+
+    async def render():
+        original = await _read_source(source)
+        loop = asyncio.get_running_loop()
+        try:
+            rendered = await loop.run_in_executor(
+                _executor(), render_derivative, original, width, format.value, quality
+            )
+        except (UnidentifiedImageError, Image.DecompressionBombError, OSError) as e:
+            logger.error("Could not render %s: %s", source, e)
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail="Source image could not be decoded"
+            )
+        await asyncio.to_thread(derivative_cache.put, key, rendered)
+        logger.info("Rendered %s at %dpx as %s: %d -> %d bytes",
+                    source, width, format.value, len(original), len(rendered))
+        return rendered
+
+    return key, await single_flight.do(("image", key), render)
@@ -0,0 +1,47 @@
+import base64
+import json
+import logging
+from typing import Any, List
+
+from fastapi import HTTPException, status
+
+logger = logging.getLogger(__name__)
+
+
+def encode_cursor(values: List[Any]) -> str:
+    """
+    Encodes the sort key of the last row of a page as an opaque cursor.
+
+    Args:
+        values (List[Any]): JSON-serializable sort key values, e.g. [price, id].
+
+    Returns:
+        str: URL-safe cursor string.
+    """
+    raw = json.dumps(values, separators=(",", ":"), default=str).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, length: int) -> List[Any]:
+    """
+    Decodes a cursor produced by `encode_cursor`.
+
+    Args:
+        cursor (str): Cursor received from the client.
+        length (int): Number of sort key values the cursor must contain.
+
+    Returns:
+        List[Any]: The sort key values.
+
+    Raises:
+        HTTPException: If the cursor is malformed (400 error).
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except (ValueError, TypeError):
+        values = None
+    if not isinstance(values, list) or len(values) != length:
+        logger.warning("Rejected malformed cursor %r", cursor)
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+    return values
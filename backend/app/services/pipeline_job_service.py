@@ -0,0 +1,260 @@
+import asyncio
+import json
+import logging
+import re
+from datetime import datetime, timezone
+from typing import List, Optional
+
+import httpx
+from fastapi import HTTPException, status as st
+from sqlalchemy import select, update, desc
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.database_connection import AsyncSessionLocal
+from app.models.pipeline_job import PipelineJobModel
+from app.schemas.pipeline import PipelineJobStatusEnum
+from app.services.sse_relay import SSEDecoder
+
+logger = logging.getLogger(__name__)
+
+# Messages emitted by the GPU node that carry job state
+_STARTED_RE = re.compile(r"^Job \S+ started with (\d+) images")
+_PROGRESS_RE = re.compile(r"^PROGRESS:([^:]+):(START|COMPLETE|FAILED):(.*)$")
+_ERROR_PREFIXES = (
+    "ERROR",
+    "EXECUTION ERROR",
+    "GENERATOR ERROR",
+    "STREAMING ERROR",
+    "GPU server error",
+    "Process failed",
+)
+
+
+async def create_pipeline_job(
+    db: AsyncSession,
+    job_id: str,
+    node_url: str,
+    user_id: Optional[int],
+    filename: Optional[str],
+    upload_size: Optional[int],
+) -> PipelineJobModel:
+    """
+    Persists a job as soon as the GPU node has accepted it.
+
+    Args:
+        db (AsyncSession): Async database session.
+        job_id (str): Job ID assigned by the GPU node.
+        node_url (str): Base URL of the node that owns the job.
+        user_id (Optional[int]): Submitting user.
+        filename (Optional[str]): Name of the uploaded ZIP file.
+        upload_size (Optional[int]): Size of the upload in bytes.
+
+    Returns:
+        PipelineJobModel: The created job row.
+    """
+    job = PipelineJobModel(
+        id=job_id,
+        node_url=node_url,
+        user_id=user_id,
+        status=PipelineJobStatusEnum.QUEUED,
+        filename=filename,
+        upload_size=upload_size,
+        stage_timings={},
+        created_at=datetime.now(timezone.utc),
+    )
+    db.add(job)
+    await db.commit()
+    logger.info("Recorded pipeline job %s on node %s", job_id, node_url)
+    return job
+
+
+async def get_pipeline_jobs(
+    db: AsyncSession,
+    status: Optional[PipelineJobStatusEnum] = None,
+    user_id: Optional[int] = None,
+    skip: int = 0,
+    limit: int = 50,
+) -> List[PipelineJobModel]:
+    """
+    Lists pipeline jobs, newest first, optionally filtered by status or user.
+
+    Served from the pipeline_jobs table; the (status, created_at) and
+    (user_id, created_at) indexes back the filtered listings.
+    """
+    query = select(PipelineJobModel)
+    if status:
+        query = query.where(PipelineJobModel.status == status)
+    if user_id is not None:
+        query = query.where(PipelineJobModel.user_id == user_id)
+    query = query.order_by(desc(PipelineJobModel.created_at)).offset(skip).limit(limit)
+
+    result = await db.execute(query)
+    jobs = list(result.scalars().all())
+    logger.info("Retrieved %d pipeline jobs", len(jobs))
+    return jobs
+
+
+async def find_pipeline_job(db: AsyncSession, job_id: str) -> Optional[PipelineJobModel]:
+    """Returns a pipeline job by ID, or None if it is unknown."""
+    result = await db.execute(select(PipelineJobModel).where(PipelineJobModel.id == job_id))
+    return result.scalar_one_or_none()
+
+
+async def get_pipeline_job(db: AsyncSession, job_id: str) -> PipelineJobModel:
+    """
+    Returns a pipeline job by ID.
+
+    Raises:
+        HTTPException: If the job is not found (404 error).
+    """
+    job = await find_pipeline_job(db, job_id)
+    if job is None:
+        logger.warning("Pipeline job %s not found", job_id)
+        raise HTTPException(status_code=st.HTTP_404_NOT_FOUND, detail="Job not found")
+    return job
+
+
+def _summarize_file_tree(tree: dict) -> tuple[int, int]:
+    """Counts files and total bytes in a FILETREE payload."""
+    count, size = 0, 0
+    stack = [tree]
+    while stack:
+        node = stack.pop()
+        if node.get("type") == "file":
+            count += 1
+            size += int(node.get("size") or 0)
+        stack.extend(node.get("children") or [])
+    return count, size
+
+
+class PipelineJobTracker:
+    """
+    Updates a job's row from the progress messages relayed to the client.
+
+    Only state-changing messages (start, stage boundaries, file tree,
+    completion, errors) cause a write; plain log lines are ignored. Each
+    write uses its own short-lived session because the relay outlives the
+    request's database session. Messages already applied are ignored, so
+    the replay a GPU node sends to a new subscriber is harmless.
+    """
+
+    def __init__(self, job_id: str):
+        self.job_id = job_id
+        self.started = False
+        self.stage_timings: dict = {}
+        self.error: Optional[str] = None
+        self.finished = False
+
+    async def _save(self, **values) -> None:
+        try:
+            async with AsyncSessionLocal() as session:
+                await session.execute(
+                    update(PipelineJobModel)
+                    .where(PipelineJobModel.id == self.job_id)
+                    .values(**values)
+                )
+                await session.commit()
+        except Exception as e:
+            # Tracking must never break the stream to the client
+            logger.error("Failed to update pipeline job %s: %s", self.job_id, str(e))
+
+    async def handle_message(self, message: str) -> None:
+        """Applies one SSE data payload to the job's row."""
+        now = datetime.now(timezone.utc)
+
+        started = _STARTED_RE.match(message)
+        if started:
+            if self.started:
+                return
+            self.started = True
+            await self._save(
+                status=PipelineJobStatusEnum.RUNNING,
+                started_at=now,
+                image_count=int(started.group(1)),
+            )
+            return
+
+        progress = _PROGRESS_RE.match(message)
+        if progress:
+            step, phase, text = progress.groups()
+            timing = self.stage_timings.setdefault(step, {})
+            if ("started_at" if phase == "START" else "completed_at") in timing:
+                return
+            if phase == "START":
+                timing.update(name=text, started_at=now.isoformat())
+                await self._save(current_stage=text, stage_timings=dict(self.stage_timings))
+            else:
+                # A failed optional stage (web assets) ends without failing the job
+                timing["completed_at"] = now.isoformat()
+                if phase == "FAILED":
+                    timing["error"] = text
+                await self._save(stage_timings=dict(self.stage_timings))
+            return
+
+        if message.startswith("FILETREE:"):
+            try:
+                count, size = _summarize_file_tree(json.loads(message[len("FILETREE:"):]))
+                await self._save(artifact_count=count, artifact_size=size)
+            except (ValueError, AttributeError) as e:
+                logger.warning("Unreadable file tree for job %s: %s", self.job_id, str(e))
+            return
+
+        if message.startswith("JOB_COMPLETE:"):
+            self.finished = True
+            await self._save(status=PipelineJobStatusEnum.COMPLETED, finished_at=now)
+            return
+
+        if message.startswith(_ERROR_PREFIXES):
+            self.error = message
+            await self._save(error=message)
+            return
+
+        if message == "PIPELINE:FINISHED":
+            await self.fail(self.error or "Pipeline finished without completing")
+
+    async def fail(self, reason: str) -> None:
+        """Marks the job as failed unless it already reached a final state."""
+        if self.finished:
+            return
+        self.finished = True
+        await self._save(
+            status=PipelineJobStatusEnum.FAILED,
+            error=reason,
+            finished_at=datetime.now(timezone.utc),
+        )
+
+
+# Follow-up tasks, referenced here so they are not garbage collected
+_follow_tasks: set = set()
+
+
+async def _follow_pipeline_job(node_url: str, tracker: PipelineJobTracker) -> None:
+    try:
+        timeout = httpx.Timeout(connect=10.0, read=3600.0, write=10.0, pool=10.0)
+        async with httpx.AsyncClient(timeout=timeout) as client:
+            async with client.stream("GET", f"{node_url}/jobs/{tracker.job_id}/events") as response:
+                if response.status_code != 200:
+                    logger.warning("Job %s has no live events on %s", tracker.job_id, node_url)
+                    return
+                decoder = SSEDecoder()
+                async for chunk in response.aiter_bytes():
+                    for event in decoder.feed(chunk):
+                        await tracker.handle_message(event.data.strip())
+    except Exception as e:
+        logger.error("Lost event stream of job %s: %s", tracker.job_id, str(e))
+    finally:
+        await tracker.fail(tracker.error or "Lost track of the job before it finished")
+
+
+def follow_pipeline_job(node_url: str, tracker: PipelineJobTracker) -> None:
+    """
+    Keeps tracking a job after its submitting client went away.
+
+    GPU nodes run jobs independently of the connection that submitted them,
+    so the job's row is kept up to date by subscribing to the node's event
+    stream in a background task. The job is marked failed only if the node
+    no longer knows it or the stream ends without completion.
+    """
+    task = asyncio.create_task(_follow_pipeline_job(node_url, tracker))
+    _follow_tasks.add(task)
+    task.add_done_callback(_follow_tasks.discard)
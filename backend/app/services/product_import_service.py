@@ -0,0 +1,211 @@
+import csv
+import json
+import logging
+import time
+from typing import AsyncIterator, List, Optional
+
+from fastapi import HTTPException, status
+from pydantic import TypeAdapter, ValidationError
+from sqlalchemy import literal_column
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.product import ProductModel
+from app.schemas.product import ProductCreate, ProductImportError, ProductImportResult
+from app.services.catalog_cache import catalog_cache
+
+logger = logging.getLogger(__name__)
+
+# Largest batch per INSERT: asyncpg allows 32767 bind parameters per statement
+MAX_BATCH_SIZE = 4000
+# Rejected rows detailed in the response; the rest are only counted
+MAX_REPORTED_ERRORS = 1000
+
+_product_adapter = TypeAdapter(ProductCreate)
+_columns = list(ProductCreate.model_fields)
+
+
+async def _lines(body: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Splits a byte stream into decoded lines without buffering the whole body."""
+    pending = b""
+    first = True
+    async for chunk in body:
+        pending += chunk
+        *lines, pending = pending.split(b"\n")
+        for line in lines:
+            yield line.decode("utf-8-sig" if first else "utf-8", errors="replace").rstrip("\r")
+            first = False
+    if pending:
+        yield pending.decode("utf-8-sig" if first else "utf-8", errors="replace").rstrip("\r")
+
+
+def _drop_blank_sku(record: dict) -> dict:
+    # A blank SKU means "no SKU" in every format; kept as "", two such rows
+    # would collide on the unique index and fail the whole import
+    sku = record.get("sku")
+    if sku is None or (isinstance(sku, str) and not sku.strip()):
+        record.pop("sku", None)
+    return record
+
+
+async def _ndjson_records(body: AsyncIterator[bytes]) -> AsyncIterator[tuple]:
+    number = 0
+    async for line in _lines(body):
+        if not line.strip():
+            continue
+        number += 1
+        try:
+            record = json.loads(line)
+            if not isinstance(record, dict):
+                raise ValueError("expected a JSON object")
+            yield number, _drop_blank_sku(record), None
+        except ValueError as e:
+            yield number, None, f"Invalid JSON: {e}"
+
+
+async def _csv_records(body: AsyncIterator[bytes]) -> AsyncIterator[tuple]:
+    header: Optional[List[str]] = None
+    number = 0
+    pending: List[str] = []
+    async for line in _lines(body):
+        # A quoted field may contain newlines: wait until the quotes balance
+        pending.append(line)
+        text = "\n".join(pending)
+        if text.count('"') % 2:
+            continue
+        pending = []
+        if not text.strip():
+            continue
+        values = next(csv.reader([text]))
+        if header is None:
+            header = [name.strip() for name in values]
+            continue
+        number += 1
+        if len(values) != len(header):
+            yield number, None, f"Expected {len(header)} columns, got {len(values)}"
+            continue
+        yield number, _drop_blank_sku(dict(zip(header, values))), None
+    if pending:
+        yield number + 1, None, "Unterminated quoted field"
+
+
+def _error_messages(error: ValidationError) -> List[str]:
+    return [f"{'.'.join(str(part) for part in e['loc']) or 'row'}: {e['msg']}" for e in error.errors()]
+
+
+def _dedupe_by_sku(rows: List[dict]) -> List[dict]:
+    # ON CONFLICT cannot touch the same row twice in one statement; the last
+    # occurrence of a SKU within a batch wins, as it would row by row.
+    latest = {}
+    for row in rows:
+        latest[row["sku"]] = row
+    return list(latest.values())
+
+
+async def _write_batch(db: AsyncSession, rows: List[dict], upsert: bool) -> tuple[int, int]:
+    if not rows:
+        return 0, 0
+    if not upsert:
+        await db.execute(insert(ProductModel.__table__).values(rows))
+        return len(rows), 0
+    rows = _dedupe_by_sku(rows)
+    statement = insert(ProductModel.__table__).values(rows)
+    statement = statement.on_conflict_do_update(
+        index_elements=[ProductModel.sku],
+        set_={column: statement.excluded[column] for column in _columns if column != "sku"},
+    ).returning(literal_column("xmax = 0"))
+    created = (await db.execute(statement)).scalars().all()
+    inserted = sum(1 for was_inserted in created if was_inserted)
+    return inserted, len(created) - inserted
+
+
+async def import_products_service(
+    db: AsyncSession,
+    body: AsyncIterator[bytes],
+    format: str,
+    upsert: bool = False,
+    batch_size: int = 1000,
+) -> ProductImportResult:
+    """
+    Imports products from an NDJSON or CSV stream.
+
+    Records are parsed and validated as they arrive and written with one
+    multi-row INSERT per batch, all inside a single transaction that is
+    committed at the end. Invalid records are skipped and reported; a
+    database error rolls the whole import back.
+
+    Args:
+        db (AsyncSession): Async database session.
+        body (AsyncIterator[bytes]): Request body stream.
+        format (str): "ndjson" (one JSON object per line) or "csv" (with a header row).
+        upsert (bool): Update products whose `sku` already exists instead of failing;
+            every record must then have a SKU.
+        batch_size (int): Rows per INSERT statement (at most MAX_BATCH_SIZE).
+
+    Returns:
+        ProductImportResult: Counts, rejected records and throughput.
+
+    Raises:
+        HTTPException: 409 if a row violates a constraint (e.g. duplicate SKU without upsert).
+    """
+    started = time.perf_counter()
+    batch_size = max(1, min(batch_size, MAX_BATCH_SIZE))
+    records = _csv_records(body) if format == "csv" else _ndjson_records(body)
+
+    received = inserted = updated = failed = 0
+    errors: List[ProductImportError] = []
+    batch: List[dict] = []
+
+    def reject(number: int, messages: List[str]) -> None:
+        nonlocal failed
+        failed += 1
+        if len(errors) < MAX_REPORTED_ERRORS:
+            errors.append(ProductImportError(row=number, errors=messages))
+
+    try:
+        async for number, record, problem in records:
+            received += 1
+            if problem:
+                reject(number, [problem])
+                continue
+            try:
+                product = _product_adapter.validate_python(record)
+            except ValidationError as e:
+                reject(number, _error_messages(e))
+                continue
+            if upsert and not product.sku:
+                reject(number, ["sku: required when upserting"])
+                continue
+            batch.append(product.model_dump())
+            if len(batch) >= batch_size:
+                counts = await _write_batch(db, batch, upsert)
+                inserted, updated = inserted + counts[0], updated + counts[1]
+                batch = []
+
+        counts = await _write_batch(db, batch, upsert)
+        inserted, updated = inserted + counts[0], updated + counts[1]
+        await db.commit()
+    except IntegrityError as e:
+        await db.rollback()
+        logger.warning("Product import rolled back after %d rows: %s", received, str(e.orig))
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Import rolled back: {e.orig}",
+        )
+
+    if inserted or updated:
+        catalog_cache.invalidate()
+
+    elapsed = time.perf_counter() - started
+    logger.info("Imported products: %d received, %d inserted, %d updated, %d failed in %.2fs",
+                received, inserted, updated, failed, elapsed)
+    return ProductImportResult(
+        rows_received=received,
+        inserted=inserted,
+        updated=updated,
+        failed=failed,
+        errors=errors,
+        elapsed_seconds=round(elapsed, 3),
+        rows_per_second=round(received / elapsed, 1) if elapsed > 0 else float(received),
+    )
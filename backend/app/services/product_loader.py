@@ -0,0 +1,78 @@
+import asyncio
+import logging
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.product import ProductModel
+from app.services.product_service import PRODUCT_COLUMNS
+
+logger = logging.getLogger(__name__)
+
+
+class ProductLoader:
+    """
+    Request-scoped batching loader for products by ID.
+
+    Every `load`/`load_many` issued before the event loop gets to run the
+    pending batch is answered by a single `SELECT ... WHERE id IN (...)`,
+    and results are memoized for the rest of the request, so rendering N
+    items costs one round trip instead of N. Rows are plain dicts, ready
+    for the fast JSON path.
+
+    Batches run one at a time: loads that arrive while a query is in
+    flight are collected into the next batch, which waits for the session.
+    Create one per request (see `app.dependencies.get_product_loader`);
+    the session must not be used concurrently while a batch is loading.
+    """
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+        self.queries = 0
+        self._loaded: Dict[int, Optional[dict]] = {}
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._in_flight: Dict[int, asyncio.Future] = {}
+        self._batch: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()
+
+    async def load(self, product_id: int) -> Optional[dict]:
+        """Returns the product row, or None if it does not exist."""
+        if product_id in self._loaded:
+            return self._loaded[product_id]
+        future = self._pending.get(product_id) or self._in_flight.get(product_id)
+        if future is None:
+            future = asyncio.get_running_loop().create_future()
+            self._pending[product_id] = future
+            if self._batch is None:
+                self._batch = asyncio.create_task(self._dispatch())
+        return await future
+
+    async def load_many(self, product_ids: Iterable[int]) -> List[Optional[dict]]:
+        """Returns rows in the order of `product_ids`; None for unknown IDs."""
+        return list(await asyncio.gather(*(self.load(product_id) for product_id in product_ids)))
+
+    async def _dispatch(self) -> None:
+        async with self._lock:
+            # Let every caller of the current tick enqueue its IDs first
+            await asyncio.sleep(0)
+            pending, self._pending, self._batch = self._pending, {}, None
+            self._in_flight = pending
+            try:
+                self.queries += 1
+                result = await self.db.execute(
+                    select(*PRODUCT_COLUMNS).where(ProductModel.id.in_(list(pending)))
+                )
+                rows = {row["id"]: dict(row) for row in result.mappings()}
+                logger.debug("Loaded %d of %d products in one query", len(rows), len(pending))
+            except Exception as e:
+                for future in pending.values():
+                    if not future.done():
+                        future.set_exception(e)
+                return
+            finally:
+                self._in_flight = {}
+        for product_id, future in pending.items():
+            self._loaded[product_id] = rows.get(product_id)
+            if not future.done():
+                future.set_result(rows.get(product_id))
@@ -1,11 +1,22 @@
 import logging
-from sqlalchemy import func
+import re
+from sqlalchemy import func, literal, or_, tuple_
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from typing import List, Optional
+from typing import List, Optional, Tuple
 from fastapi import HTTPException
 from app.models.product import ProductModel
-from app.schemas.product import Product, ProductTypeEnum, ProductCreate
+from app.schemas.product import (
+    Product,
+    ProductTypeEnum,
+    ProductCreate,
+    ProductSearchResponse,
+    ProductSortEnum,
+    SortOrderEnum)
+from app.services.catalog_cache import MISS, catalog_cache
+from app.services.counter_service import get_counter
+from app.services.pagination import decode_cursor, encode_cursor
+from app.services.single_flight import single_flight
 
 
 # Configure logger for this module
@@ -17,72 +28,263 @@ async def create_product_service(db: AsyncSession, product: ProductCreate) -> Pr
     db.add(new_product)
     await db.commit()
     await db.refresh(new_product)
+    catalog_cache.invalidate()
     return new_product
 
+# Columns that can be requested with `fields=`; id is always returned
+PRODUCT_FIELDS = tuple(Product.model_fields)
+# Selectable product columns (the search_vector document is never returned)
+PRODUCT_COLUMNS = tuple(getattr(ProductModel, field) for field in PRODUCT_FIELDS)
+
+
+async def _coalesced(flight_key: tuple, load):
+    """
+    Runs a catalog load through single-flight.
+
+    Concurrent identical cache misses share one query; every caller gets the
+    leader's result and ETag.
+    """
+    async def load_with_etag():
+        value = await load()
+        return value, catalog_cache.current_etag()
+
+    value, etag = await single_flight.do(flight_key, load_with_etag)
+    catalog_cache.use_etag(etag)
+    return value
+
+
+def parse_product_fields(fields: Optional[str]) -> tuple:
+    """
+    Validates a comma separated `fields=` projection.
+
+    Returns:
+        tuple: Selected column names, in declaration order, always including id.
+
+    Raises:
+        HTTPException: If an unknown field is requested (400 error).
+    """
+    if not fields:
+        return PRODUCT_FIELDS
+    requested = {field.strip() for field in fields.split(",") if field.strip()}
+    unknown = requested - set(PRODUCT_FIELDS)
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown fields: {', '.join(sorted(unknown))}. Allowed: {', '.join(PRODUCT_FIELDS)}",
+        )
+    return tuple(field for field in PRODUCT_FIELDS if field == "id" or field in requested)
+
+
+def _check_cursor_types(sort: ProductSortEnum, values: list) -> None:
+    sort_type = {ProductSortEnum.id: int, ProductSortEnum.price: (int, float), ProductSortEnum.name: str}[sort]
+    if not isinstance(values[0], sort_type) or not isinstance(values[1], int) \
+            or isinstance(values[0], bool) or isinstance(values[1], bool):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
 async def get_all_products_service(
     db: AsyncSession,
     type: Optional[ProductTypeEnum] = None,
-    name: Optional[str] = None
-) -> List[ProductModel]:
+    name: Optional[str] = None,
+    sort: ProductSortEnum = ProductSortEnum.id,
+    order: SortOrderEnum = SortOrderEnum.asc,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    fields: tuple = PRODUCT_FIELDS
+) -> Tuple[List[dict], Optional[str]]:
     """
-    Retrieves a list of products filtered optionally by type and/or name.
+    Retrieves one page of products filtered optionally by type and/or name.
+
+    Pages are ordered by (sort column, id) and continue after the cursor's
+    row, so every page is an index range scan no matter how deep it is.
+    Only the requested columns are selected. Results are served from the
+    catalog cache, keyed on all parameters, and only loaded from the
+    database on a miss.
 
     Args:
         db (AsyncSession): Asynchronous database session.
         type (Optional[ProductTypeEnum]): Filter products by this type if provided.
         name (Optional[str]): Filter products by name substring if provided.
+        sort (ProductSortEnum): Column to order by.
+        order (SortOrderEnum): Ascending or descending order.
+        limit (int): Maximum number of products in the page.
+        cursor (Optional[str]): Cursor returned with the previous page.
+        fields (tuple): Columns to return, as validated by `parse_product_fields`.
 
     Returns:
-        List[ProductModel]: List of products matching the criteria.
+        Tuple[List[dict], Optional[str]]: The page of products and the cursor of
+        the next page, or None on the last page.
+
+    Raises:
+        HTTPException: If the cursor is invalid (400 error).
     """
     logger.info("Fetching products with filters - type: %s, name: %s", type, name)
-    query = select(ProductModel)
+    key = ("list", type, name, sort, order, limit, cursor, fields)
+    cached = catalog_cache.get(key)
+    if cached is not MISS:
+        logger.info("Served %d products from catalog cache", len(cached[0]))
+        return cached
 
-    if type:
-        query = query.where(ProductModel.type == type)
-        logger.debug("Filtering products by type: %s", type)
+    async def load():
+        version = catalog_cache.version
+        sort_column = getattr(ProductModel, sort.value)
+        columns = [getattr(ProductModel, field) for field in fields]
+        if sort_column not in columns:
+            columns.append(sort_column)
+        query = select(*columns)
+
+        if type:
+            query = query.where(ProductModel.type == type)
+            logger.debug("Filtering products by type: %s", type)
+
+        if name:
+            query = query.where(ProductModel.name.ilike(f"%{name}%"))
+            logger.debug("Filtering products by name containing: %s", name)
+
+        keys = (sort_column, ProductModel.id) if sort != ProductSortEnum.id else (ProductModel.id,)
+        if cursor:
+            values = decode_cursor(cursor, 2)
+            _check_cursor_types(sort, values)
+            after = tuple_(*keys) > tuple_(*values[:len(keys)])
+            before = tuple_(*keys) < tuple_(*values[:len(keys)])
+            query = query.where(after if order == SortOrderEnum.asc else before)
+        query = query.order_by(*(k.asc() if order == SortOrderEnum.asc else k.desc() for k in keys))
+        query = query.limit(limit + 1)
+
+        result = await db.execute(query)
+        rows = result.all()
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last = rows[-1]._mapping
+            next_cursor = encode_cursor([last[sort.value], last["id"]])
+        products = [{field: row._mapping[field] for field in fields} for row in rows]
+        catalog_cache.set(key, (products, next_cursor), version)
+
+        logger.info("Retrieved %d products from database", len(products))
+        return products, next_cursor
+
+    return await _coalesced(("products",) + key[1:], load)
 
-    if name:
-        query = query.where(ProductModel.name.ilike(f"%{name}%"))
-        logger.debug("Filtering products by name containing: %s", name)
 
+def build_search_clauses(q: str):
+    """
+    Builds the match condition and relevance score for a product search.
+
+    Every word of `q` is matched as a prefix against the full-text index of
+    name and description ("bons jun" finds "Bonsai Juniper"); misspelled
+    names are still found through trigram word similarity on the name.
+
+    Args:
+        q (str): Search text.
+
+    Returns:
+        tuple: (condition, rank) SQL expressions; rank is higher for better matches.
+    """
+    words = re.findall(r"\w+", q.lower())
+    tsquery = func.to_tsquery("simple", " & ".join(f"{word}:*" for word in words))
+    full_text = ProductModel.search_vector.op("@@")(tsquery)
+    fuzzy = literal(q).op("<%")(ProductModel.name)
+    rank = func.ts_rank_cd(ProductModel.search_vector, tsquery) + func.word_similarity(q, ProductModel.name)
+    return or_(full_text, fuzzy), rank
+
+
+async def search_products_service(
+    db: AsyncSession,
+    q: str,
+    type: Optional[ProductTypeEnum] = None,
+    limit: int = 20
+) -> ProductSearchResponse:
+    """
+    Ranked, typo-tolerant search over product names and descriptions.
+
+    Both queries are answered from the GIN indexes on `search_vector` and
+    `name`; results are cached in the catalog cache like other catalog reads.
+
+    Args:
+        db (AsyncSession): Asynchronous database session.
+        q (str): Search text.
+        type (Optional[ProductTypeEnum]): Restrict hits to this product type.
+        limit (int): Maximum number of hits to return.
+
+    Returns:
+        ProductSearchResponse: Ranked hits, total and per-type facet counts.
+    """
+    logger.info("Searching products - q: %s, type: %s", q, type)
+    key = ("search", q, type, limit)
+    cached = catalog_cache.get(key)
+    if cached is not MISS:
+        return cached
+
+    version = catalog_cache.version
+    if not re.search(r"\w", q):
+        return ProductSearchResponse(query=q, total=0, items=[], facets={})
+
+    condition, rank = build_search_clauses(q)
+
+    facet_result = await db.execute(
+        select(ProductModel.type, func.count()).where(condition).group_by(ProductModel.type)
+    )
+    facets = {product_type: count for product_type, count in facet_result.all()}
+
+    query = select(ProductModel).where(condition)
+    if type:
+        query = query.where(ProductModel.type == type)
+    query = query.order_by(rank.desc(), ProductModel.id).limit(limit)
     result = await db.execute(query)
-    products = list(result.scalars().all())
 
-    logger.info("Retrieved %d products from database", len(products))
-    return products
+    response = ProductSearchResponse(
+        query=q,
+        total=facets.get(type, 0) if type else sum(facets.values()),
+        items=[Product.model_validate(p, from_attributes=True) for p in result.scalars().all()],
+        facets=facets,
+    )
+    catalog_cache.set(key, response, version)
+    logger.info("Search for %r matched %d products", q, response.total)
+    return response
 
 
-async def get_product_by_id_service(product_id: int, db: AsyncSession) -> ProductModel:
+async def get_product_by_id_service(product_id: int, db: AsyncSession) -> Product:
     """
-    Retrieves a single product by its unique identifier.
+    Retrieves a single product by its unique identifier, through the catalog cache.
 
     Args:
         product_id (int): The ID of the product to retrieve.
         db (AsyncSession): Asynchronous database session.
 
     Returns:
-        ProductModel: The product object if found.
+        Product: The product object if found.
 
     Raises:
         HTTPException: If no product with the given ID is found (404 error).
     """
     logger.info("Fetching product with ID: %d", product_id)
+    key = ("id", product_id)
+    cached = catalog_cache.get(key)
+    if cached is not MISS:
+        return cached
 
-    result = await db.execute(select(ProductModel).where(ProductModel.id == product_id))
-    product = result.scalar_one_or_none()
+    async def load():
+        version = catalog_cache.version
+        result = await db.execute(select(ProductModel).where(ProductModel.id == product_id))
+        product = result.scalar_one_or_none()
 
-    if not product:
-        logger.warning("Product with ID %d not found", product_id)
-        raise HTTPException(status_code=404, detail="Product not found.")
+        if not product:
+            logger.warning("Product with ID %d not found", product_id)
+            raise HTTPException(status_code=404, detail="Product not found.")
 
-    logger.info("Product with ID %d found: %s", product_id, product.name)
-    return product
+        logger.info("Product with ID %d found: %s", product_id, product.name)
+        product = Product.model_validate(product, from_attributes=True)
+        catalog_cache.set(key, product, version)
+        return product
+
+    return await _coalesced(("product", product_id), load)
 
 
 async def get_product_count(db: AsyncSession) -> int:
     """
-    Returns the total count of products in the database.
+    Returns the total count of products in the database, from the counter
+    the database maintains on every insert and delete (no table scan).
 
     Args:
         db (AsyncSession): Async database session.
@@ -91,7 +293,10 @@ async def get_product_count(db: AsyncSession) -> int:
         int: Total number of products.
     """
     logger.info("Getting total products count")
-    result = await db.execute(select(func.count()).select_from(ProductModel))
-    count = result.scalar() or 0 
-    logger.info("Found %d total products in database", count)
-    return count
\ No newline at end of file
+
+    async def load():
+        count = await get_counter(db, "products")
+        logger.info("Found %d total products in database", count)
+        return count
+
+    return await single_flight.do(("product_count",), load)
\ No newline at end of file
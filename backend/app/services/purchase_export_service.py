@@ -0,0 +1,187 @@
+import csv
+import io
+import logging
+import time
+import zlib
+from datetime import datetime
+from typing import AsyncIterator, Callable, Iterable, List, Literal, Optional
+
+from sqlalchemy import asc, desc, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.serialization import purchase_row
+from app.db.database_connection import AsyncSessionLocal
+from app.models.purchase import PurchaseModel
+from app.schemas.purchase import StatusTypeEnum
+
+logger = logging.getLogger(__name__)
+
+# Rows fetched per round trip from the server-side cursor
+EXPORT_BATCH_SIZE = 2000
+
+EXPORT_COLUMNS = [column.name for column in PurchaseModel.__table__.columns]
+
+MEDIA_TYPES = {"csv": "text/csv; charset=utf-8", "ndjson": "application/x-ndjson"}
+
+# Leading characters that make spreadsheets read a CSV cell as a formula
+FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+
+def export_query(
+    status: Optional[StatusTypeEnum] = None,
+    sort_date: Literal["asc", "desc"] = "desc",
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+):
+    """
+    Purchases matching the listing filters, in (date, id) order.
+
+    Uses the same (status, date, id) and (date, id) indexes as the paged
+    listing, so rows come out in index order without a sort.
+    """
+    query = select(*PurchaseModel.__table__.columns)
+    if status:
+        query = query.where(PurchaseModel.status == status)
+    if since:
+        query = query.where(PurchaseModel.date >= since)
+    if until:
+        query = query.where(PurchaseModel.date < until)
+    order = asc if sort_date == "asc" else desc
+    return query.order_by(order(PurchaseModel.date), order(PurchaseModel.id))
+
+
+def _csv_cell(value):
+    # Customer-entered text such as "=HYPERLINK(...)" is exported as text, not as a formula
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def encode_csv(rows: Iterable[dict], header: bool = False) -> bytes:
+    """
+    Encodes rows as CSV lines, with the header line first if `header`.
+
+    Text cells starting with a formula character are prefixed with a
+    quote, so opening the export in a spreadsheet runs no formula.
+    """
+    out = io.StringIO()
+    writer = csv.writer(out, lineterminator="\n")
+    if header:
+        writer.writerow(EXPORT_COLUMNS)
+    for row in rows:
+        writer.writerow([
+            row["status"].value if column == "status"
+            else row["date"].isoformat() if column == "date"
+            else _csv_cell(row[column])
+            for column in EXPORT_COLUMNS
+        ])
+    return out.getvalue().encode("utf-8")
+
+
+def encode_ndjson(rows: Iterable[dict]) -> bytes:
+    """Encodes rows as one JSON object per line, on the fast serializer."""
+    return b"".join(purchase_row.dump_json(row) + b"\n" for row in rows)
+
+
+ENCODERS = {"csv": encode_csv, "ndjson": encode_ndjson}
+
+
+async def encode_export(
+    batches: AsyncIterator[List[dict]],
+    format: Literal["csv", "ndjson"],
+    gzip: bool = False,
+) -> AsyncIterator[bytes]:
+    """
+    Encodes batches of rows into chunks of the export file as they arrive.
+
+    Only the current batch and the compressor's window are held in memory.
+    A CSV export always starts with its header line, even when empty.
+
+    Args:
+        batches (AsyncIterator[List[dict]]): Purchase rows, a batch at a time.
+        format (Literal["csv", "ndjson"]): Output format.
+        gzip (bool): Compress the output into a single gzip member.
+
+    Yields:
+        bytes: Non-empty chunks of the file.
+    """
+    encode = ENCODERS[format]
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if gzip else None
+
+    def output(data: bytes) -> bytes:
+        return compressor.compress(data) if compressor else data
+
+    if format == "csv":
+        chunk = output(encode_csv([], header=True))
+        if chunk:
+            yield chunk
+    async for rows in batches:
+        chunk = output(encode(rows))
+        if chunk:
+            yield chunk
+    if compressor:
+        yield compressor.flush()
+
+
+async def stream_purchases_export(
+    format: Literal["csv", "ndjson"] = "csv",
+    gzip: bool = False,
+    status: Optional[StatusTypeEnum] = None,
+    sort_date: Literal["asc", "desc"] = "desc",
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    session_factory: Callable[[], AsyncSession] = AsyncSessionLocal,
+    batch_size: int = EXPORT_BATCH_SIZE,
+) -> AsyncIterator[bytes]:
+    """
+    Streams every matching purchase as CSV or NDJSON.
+
+    Rows are read through a server-side cursor `batch_size` at a time and
+    encoded as they arrive, so memory stays flat however many rows match
+    and the export runs as fast as the client reads. The generator opens
+    its own session: it runs while the response is sent, after the
+    request's dependencies have been closed.
+
+    Args:
+        format (Literal["csv", "ndjson"]): Output format.
+        gzip (bool): Compress the output on the fly.
+        status (Optional[StatusTypeEnum]): Only purchases with this status.
+        sort_date (Literal["asc", "desc"]): Date order.
+        since (Optional[datetime]): Only purchases made at or after this time.
+        until (Optional[datetime]): Only purchases made before this time.
+        session_factory (Callable[[], AsyncSession]): Session factory.
+        batch_size (int): Rows fetched per round trip.
+
+    Yields:
+        bytes: Chunks of the export file. A database error midway is logged
+            and re-raised, which aborts the transfer so a truncated file is
+            never mistaken for a complete one.
+    """
+    started = time.perf_counter()
+    exported = 0
+
+    async with session_factory() as db:
+        result = await db.stream(
+            export_query(status, sort_date, since, until).execution_options(yield_per=batch_size)
+        )
+
+        async def batches() -> AsyncIterator[List[dict]]:
+            nonlocal exported
+            async for partition in result.mappings().partitions():
+                exported += len(partition)
+                yield [dict(row) for row in partition]
+
+        try:
+            async for chunk in encode_export(batches(), format, gzip):
+                yield chunk
+        except Exception as e:
+            logger.error("Purchase export aborted after %d rows: %s", exported, str(e))
+            raise
+        finally:
+            await result.close()
+
+    elapsed = time.perf_counter() - started
+    logger.info(
+        "Exported %d purchases as %s%s in %.1fs (%.0f rows/s)",
+        exported, format, " (gzip)" if gzip else "", elapsed, exported / elapsed if elapsed else 0,
+    )
@@ -0,0 +1,217 @@
+import asyncio
+import logging
+import re
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.database_connection import AsyncSessionLocal
+from app.models.counter import CounterModel
+from app.models.purchase import DEFAULT_PARTITION
+from app.schemas.admin import PartitionMaintenanceResult
+
+logger = logging.getLogger(__name__)
+
+# Monthly partitions are named after the month they hold, e.g. purchases_y2026m04
+PARTITION_NAME = re.compile(r"^purchases_y(\d{4})m(\d{2})$")
+
+
+def month_start(value: datetime) -> datetime:
+    """First instant (UTC) of the month of `value`."""
+    value = value.astimezone(timezone.utc) if value.tzinfo else value.replace(tzinfo=timezone.utc)
+    return value.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def add_months(month: datetime, months: int) -> datetime:
+    index = month.year * 12 + month.month - 1 + months
+    return month.replace(year=index // 12, month=index % 12 + 1)
+
+
+def partition_name(month: datetime) -> str:
+    return f"purchases_y{month.year:04d}m{month.month:02d}"
+
+
+def _bounds(month: datetime) -> str:
+    # Partition bounds are DDL, which takes no bind parameters; both come from datetimes
+    return f"FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')"
+
+
+async def _partition_months(db: AsyncSession) -> Dict[datetime, str]:
+    """Monthly partitions attached to purchases, by month."""
+    result = await db.execute(text(
+        "SELECT child.relname FROM pg_inherits "
+        "JOIN pg_class AS child ON child.oid = pg_inherits.inhrelid "
+        "WHERE pg_inherits.inhparent = to_regclass('purchases')"
+    ))
+    months = {}
+    for (name,) in result.all():
+        match = PARTITION_NAME.match(name)
+        if match:
+            months[datetime(int(match[1]), int(match[2]), 1, tzinfo=timezone.utc)] = name
+    return months
+
+
+async def create_purchase_partitions(
+    db: AsyncSession,
+    months_ahead: int,
+    now: Optional[datetime] = None,
+    move_stray_rows: bool = False,
+) -> List[str]:
+    """
+    Creates the monthly partitions of the current month and the next
+    `months_ahead` months. The caller commits.
+
+    Months with rows in the default partition (e.g. imported history) need
+    the default partition detached while the rows are moved, which blocks
+    purchases for the duration. They are only handled with
+    `move_stray_rows`; otherwise they are skipped and reported in the log.
+
+    Returns:
+        List[str]: Names of the partitions created.
+    """
+    current = month_start(now or datetime.now(timezone.utc))
+    existing = await _partition_months(db)
+    stray = {
+        month_start(month) for (month,) in (await db.execute(text(
+            f"SELECT DISTINCT date_trunc('month', date, 'UTC') FROM {DEFAULT_PARTITION}"
+        ))).all()
+    }
+    wanted = {add_months(current, offset) for offset in range(months_ahead + 1)}
+    if move_stray_rows:
+        wanted |= stray
+    elif stray:
+        # Postgres cannot create these while the default partition holds their rows
+        wanted -= stray
+        logger.warning("Purchases of %d months are in %s; run POST /admin/purchases/partitions to move them",
+                       len(stray), DEFAULT_PARTITION)
+    created = []
+    for month in sorted(wanted - existing.keys()):
+        name = partition_name(month)
+        if month in stray:
+            # Postgres refuses a partition whose rows sit in the default partition:
+            # detach it, move the month's rows to the new partition and attach it back
+            await db.execute(text(f"ALTER TABLE purchases DETACH PARTITION {DEFAULT_PARTITION}"))
+            await db.execute(text(f"CREATE TABLE {name} PARTITION OF purchases FOR VALUES {_bounds(month)}"))
+            where = f"date >= '{month.isoformat()}' AND date < '{add_months(month, 1).isoformat()}'"
+            await db.execute(text(f"INSERT INTO {name} SELECT * FROM {DEFAULT_PARTITION} WHERE {where}"))
+            await db.execute(text(f"DELETE FROM {DEFAULT_PARTITION} WHERE {where}"))
+            await db.execute(text(f"ALTER TABLE purchases ATTACH PARTITION {DEFAULT_PARTITION} DEFAULT"))
+        else:
+            await db.execute(text(f"CREATE TABLE {name} PARTITION OF purchases FOR VALUES {_bounds(month)}"))
+        created.append(name)
+    return created
+
+
+async def archive_purchase_partitions(
+    db: AsyncSession,
+    retention_months: int,
+    schema: str,
+    tablespace: Optional[str] = None,
+    now: Optional[datetime] = None,
+) -> List[str]:
+    """
+    Detaches the monthly partitions that ended more than `retention_months`
+    months ago and moves them to `schema` (and `tablespace`, if given).
+
+    Archived purchases leave the purchases table, so the purchase counters
+    are decreased by their counts; the sales rollups keep them, as history.
+    The caller commits.
+
+    Returns:
+        List[str]: Names of the partitions archived.
+    """
+    cutoff = add_months(month_start(now or datetime.now(timezone.utc)), -retention_months)
+    expired = [name for month, name in sorted((await _partition_months(db)).items()) if add_months(month, 1) <= cutoff]
+    if not expired:
+        return []
+    await db.execute(text(f"CREATE SCHEMA IF NOT EXISTS {schema}"))
+    for name in expired:
+        counts = (await db.execute(text(
+            f"SELECT 'purchases.status.' || lower(status::text), count(*) FROM {name} GROUP BY status"
+        ))).all()
+        await db.execute(text(f"ALTER TABLE purchases DETACH PARTITION {name}"))
+        if counts:
+            decrements = [{"name": counter, "value": -count} for counter, count in counts]
+            decrements.append({"name": "purchases", "value": -sum(count for _, count in counts)})
+            statement = insert(CounterModel).values(sorted(decrements, key=lambda row: row["name"]))
+            statement = statement.on_conflict_do_update(
+                index_elements=[CounterModel.name],
+                set_={"value": CounterModel.value + statement.excluded.value},
+            )
+            await db.execute(statement)
+        await db.execute(text(f"ALTER TABLE {name} SET SCHEMA {schema}"))
+        if tablespace:
+            await db.execute(text(f"ALTER TABLE {schema}.{name} SET TABLESPACE {tablespace}"))
+            indexes = (await db.execute(
+                text("SELECT indexname FROM pg_indexes WHERE schemaname = :schema AND tablename = :name"),
+                {"schema": schema, "name": name},
+            )).scalars().all()
+            for index in indexes:
+                await db.execute(text(f"ALTER INDEX {schema}.{index} SET TABLESPACE {tablespace}"))
+    return expired
+
+
+async def maintain_purchase_partitions(
+    session_factory: Callable[[], AsyncSession] = AsyncSessionLocal,
+    months_ahead: int = settings.purchase_partition_months_ahead,
+    retention_months: int = settings.purchase_retention_months,
+    archive_schema: str = settings.purchase_archive_schema,
+    archive_tablespace: str = settings.purchase_archive_tablespace,
+    move_stray_rows: bool = False,
+    now: Optional[datetime] = None,
+) -> PartitionMaintenanceResult:
+    """
+    Creates upcoming monthly partitions of purchases and archives expired
+    ones, in one transaction.
+
+    A run is skipped while another process holds the maintenance advisory
+    lock, so starting the job in every application process is safe, and
+    gives up after PURCHASE_PARTITION_LOCK_TIMEOUT when purchases stay
+    locked by other transactions, rather than queueing traffic behind it.
+
+    Args:
+        session_factory (Callable[[], AsyncSession]): Session factory.
+        months_ahead (int): Months after the current one to create partitions for.
+        retention_months (int): Whole months kept in purchases before the
+            current one; 0 keeps everything.
+        archive_schema (str): Schema receiving archived partitions.
+        archive_tablespace (str): Tablespace archived partitions move to; "" leaves them in place.
+        move_stray_rows (bool): Also move rows out of the default partition (see
+            create_purchase_partitions); meant for the admin endpoint, not the periodic job.
+        now (Optional[datetime]): Current time, for tests.
+
+    Returns:
+        PartitionMaintenanceResult: Partitions created and archived.
+    """
+    async with session_factory() as db:
+        if not (await db.execute(text("SELECT pg_try_advisory_xact_lock(hashtext('purchase_partitions'))"))).scalar():
+            logger.info("Purchase partition maintenance is already running in another process")
+            return PartitionMaintenanceResult(created=[], archived=[])
+        await db.execute(
+            text("SELECT set_config('lock_timeout', :timeout, true)"),
+            {"timeout": settings.purchase_partition_lock_timeout},
+        )
+        created = await create_purchase_partitions(db, months_ahead, now, move_stray_rows)
+        archived = []
+        if retention_months > 0:
+            archived = await archive_purchase_partitions(
+                db, retention_months, archive_schema, archive_tablespace or None, now
+            )
+        await db.commit()
+    if created or archived:
+        logger.info("Purchase partitions created: %s; archived: %s", created, archived)
+    return PartitionMaintenanceResult(created=created, archived=archived)
+
+
+async def run_partition_maintenance(interval: float = settings.purchase_partition_interval) -> None:
+    """Maintains the purchase partitions now and then every `interval` seconds, until cancelled."""
+    while True:
+        try:
+            await maintain_purchase_partitions()
+        except Exception as e:
+            logger.error("Purchase partition maintenance failed: %s", str(e))
+        await asyncio.sleep(interval)
@@ -1,18 +1,36 @@
 import logging
-from typing import List, Optional, Literal
+from datetime import datetime
+from typing import List, Optional, Literal, Tuple
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import func, select, desc, asc
+from sqlalchemy import select, desc, asc, tuple_, update
 from fastapi import HTTPException, status as st
+from app.models.product import ProductModel
 from app.models.purchase import PurchaseModel
 from app.schemas.purchase import Purchase, PurchaseCreate
-from app.schemas.purchase import StatusTypeEnum
+from app.schemas.purchase import (
+    ALLOWED_STATUS_TRANSITIONS,
+    BulkStatusUpdateResult,
+    PurchaseStatusFilter,
+    PurchaseStatusOutcome,
+    StatusOutcomeEnum,
+    StatusTypeEnum,
+)
+from app.services.analytics_service import apply_sales_deltas, record_purchase_created, record_status_change, sales_deltas
+from app.services.counter_service import get_counter
+from app.services.pagination import decode_cursor, encode_cursor
+from app.services.single_flight import single_flight
 
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
 
 
 async def create_purchase(db: AsyncSession, purchase: PurchaseCreate) -> PurchaseModel:
+    """
+    Stores a purchase at the product's current price and counts it in the
+    sales rollups, in one transaction.
+    """
     try:
+        price = await db.scalar(select(ProductModel.price).where(ProductModel.id == purchase.product_id))
         db_purchase = PurchaseModel(
             product_id=purchase.product_id,
             email=purchase.email,
@@ -23,9 +41,12 @@ async def create_purchase(db: AsyncSession, purchase: PurchaseCreate) -> Purchas
             state=purchase.state,
             cep=purchase.cep,
             status=purchase.status,
+            amount=price,
             date=purchase.date
         )
         db.add(db_purchase)
+        await db.flush()
+        await record_purchase_created(db, db_purchase)
         await db.commit()
         await db.refresh(db_purchase)
         logger.info(f"Created new purchase with ID {db_purchase.id}")
@@ -39,6 +60,160 @@ async def create_purchase(db: AsyncSession, purchase: PurchaseCreate) -> Purchas
         )
 
 
+async def update_purchase_status(db: AsyncSession, purchase_id: int, status: StatusTypeEnum) -> PurchaseModel:
+    """
+    Changes the status of a purchase and moves it between the sales rollup
+    rows of its old and new status, in one transaction.
+
+    Only moves allowed by ALLOWED_STATUS_TRANSITIONS are applied, as in
+    bulk updates; setting the current status again changes nothing.
+
+    Args:
+        db (AsyncSession): Async database session.
+        purchase_id (int): ID of the purchase.
+        status (StatusTypeEnum): New status.
+
+    Returns:
+        PurchaseModel: The updated purchase.
+
+    Raises:
+        HTTPException: If the purchase does not exist (404), the transition
+            is not allowed (409) or the update fails (500).
+    """
+    result = await db.execute(select(PurchaseModel).where(PurchaseModel.id == purchase_id).with_for_update())
+    purchase = result.scalar_one_or_none()
+    if purchase is None:
+        await db.rollback()
+        logger.warning(f"Purchase with ID {purchase_id} not found")
+        raise HTTPException(status_code=st.HTTP_404_NOT_FOUND, detail="Purchase not found")
+    if purchase.status == status:
+        await db.rollback()
+        return purchase
+    if status not in ALLOWED_STATUS_TRANSITIONS[purchase.status]:
+        await db.rollback()
+        logger.warning(f"Purchase {purchase_id} cannot move from {purchase.status.value} to {status.value}")
+        raise HTTPException(
+            status_code=st.HTTP_409_CONFLICT,
+            detail=f"A {purchase.status.value} purchase cannot become {status.value}"
+        )
+    try:
+        old_status = purchase.status
+        purchase.status = status
+        await record_status_change(db, purchase, old_status)
+        await db.commit()
+        logger.info(f"Purchase {purchase_id} status changed from {old_status.value} to {status.value}")
+        return purchase
+    except Exception as e:
+        await db.rollback()
+        logger.error(f"Error updating purchase {purchase_id} status: {str(e)}")
+        raise HTTPException(
+            status_code=st.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to update purchase status"
+        )
+
+
+async def bulk_update_purchase_status(
+    db: AsyncSession,
+    status: StatusTypeEnum,
+    ids: Optional[List[int]] = None,
+    filters: Optional[PurchaseStatusFilter] = None,
+    limit: int = 1000,
+) -> BulkStatusUpdateResult:
+    """
+    Moves many purchases to a new status with one UPDATE ... RETURNING,
+    in one transaction.
+
+    A single statement locks the selected purchases (in ID order, so
+    concurrent bulk changes cannot deadlock), updates those whose current
+    status may move to `status` according to ALLOWED_STATUS_TRANSITIONS,
+    and returns every locked purchase with its previous status. The sales
+    rollups are adjusted in the same transaction and the counters by their
+    triggers.
+
+    Args:
+        db (AsyncSession): Async database session.
+        status (StatusTypeEnum): New status.
+        ids (Optional[List[int]]): Purchases to change; each gets an outcome.
+        filters (Optional[PurchaseStatusFilter]): Purchases to change, instead
+            of ids; only those allowed to move to `status` are selected.
+        limit (int): Most purchases changed through `filters`.
+
+    Returns:
+        BulkStatusUpdateResult: Per-purchase outcomes.
+
+    Raises:
+        HTTPException: If the update fails (500).
+    """
+    allowed_from = [old for old, targets in ALLOWED_STATUS_TRANSITIONS.items() if status in targets]
+    table = PurchaseModel.__table__
+    locked = select(table.c.id, table.c.status).order_by(table.c.id).with_for_update()
+    if ids is not None:
+        locked = locked.where(table.c.id.in_(set(ids)))
+    else:
+        locked = locked.where(table.c.status.in_(allowed_from)).limit(limit)
+        if filters.status is not None:
+            locked = locked.where(table.c.status == filters.status)
+        if filters.since is not None:
+            locked = locked.where(table.c.date >= filters.since)
+        if filters.until is not None:
+            locked = locked.where(table.c.date < filters.until)
+        if filters.product_id is not None:
+            locked = locked.where(table.c.product_id == filters.product_id)
+    locked = locked.cte("locked")
+    moved = (
+        update(table)
+        .where(table.c.id == locked.c.id, locked.c.status.in_(allowed_from))
+        .values(status=status)
+        .returning(table.c.id, table.c.product_id, table.c.state, table.c.amount, table.c.date)
+        .cte("moved")
+    )
+    statement = (
+        select(locked.c.id, locked.c.status, moved.c.id.is_not(None).label("moved"),
+               moved.c.product_id, moved.c.state, moved.c.amount, moved.c.date)
+        .select_from(locked.outerjoin(moved, moved.c.id == locked.c.id))
+        .order_by(locked.c.id)
+    )
+    try:
+        rows = (await db.execute(statement)).all()
+        changed = [row for row in rows if row.moved]
+        await apply_sales_deltas(db, sales_deltas(
+            change for row in changed for change in ((row, row.status, -1), (row, status, 1))
+        ))
+        await db.commit()
+    except Exception as e:
+        await db.rollback()
+        logger.error(f"Error moving purchases to status {status.value}: {str(e)}")
+        raise HTTPException(
+            status_code=st.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to update purchase statuses"
+        )
+
+    def outcome(row) -> PurchaseStatusOutcome:
+        if row.moved:
+            result = StatusOutcomeEnum.UPDATED
+        elif row.status == status:
+            result = StatusOutcomeEnum.UNCHANGED
+        else:
+            result = StatusOutcomeEnum.INVALID_TRANSITION
+        return PurchaseStatusOutcome(id=row.id, outcome=result, previous_status=row.status)
+
+    if ids is not None:
+        found = {row.id: outcome(row) for row in rows}
+        results = [
+            found.get(purchase_id) or PurchaseStatusOutcome(id=purchase_id, outcome=StatusOutcomeEnum.NOT_FOUND)
+            for purchase_id in ids
+        ]
+    else:
+        results = [outcome(row) for row in rows]
+    logger.info(f"Moved {len(changed)} of {len(results)} purchases to status {status.value}")
+    return BulkStatusUpdateResult(
+        status=status,
+        updated=len(changed),
+        has_more=ids is None and len(rows) == limit,
+        results=results,
+    )
+
+
 async def get_purchases(db: AsyncSession, skip: int = 0, limit: int = 100) -> List[PurchaseModel]:
     try:
         result = await db.execute(select(PurchaseModel).offset(skip).limit(limit))
@@ -53,29 +228,84 @@ async def get_purchases(db: AsyncSession, skip: int = 0, limit: int = 100) -> Li
         )
 
 
+def _decode_purchase_cursor(cursor: str) -> Tuple[datetime, int]:
+    date, purchase_id = decode_cursor(cursor, 2)
+    try:
+        date = datetime.fromisoformat(date)
+    except (TypeError, ValueError):
+        date = None
+    if date is None or date.tzinfo is None or not isinstance(purchase_id, int) or isinstance(purchase_id, bool):
+        raise HTTPException(status_code=st.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+    return date, purchase_id
+
+
 async def get_filtered_purchases(
     db: AsyncSession,
     status: Optional[StatusTypeEnum] = None,
     sort_date: Optional[Literal["asc", "desc"]] = "desc",
     skip: int = 0,
-    limit: int = 100
-) -> List[PurchaseModel]:
+    limit: int = 100,
+    cursor: Optional[str] = None
+) -> Tuple[List[dict], Optional[str]]:
+    """
+    Returns one page of purchases as plain dict rows, newest first unless
+    sort_date is "asc".
+
+    Pages are ordered by (date, id) and continue after the cursor's row, so
+    with the (status, date, id) and (date, id) indexes every page is an
+    index range scan no matter how deep it is, and rows inserted meanwhile
+    do not shift later pages. Pages are read from the monthly partitions in
+    date order, and partitions beyond the cursor are pruned. Only the columns are selected, no ORM
+    instances are built, so the rows can go straight to the fast JSON
+    serializer.
+
+    Args:
+        db (AsyncSession): Async database session.
+        status (Optional[StatusTypeEnum]): Only purchases with this status.
+        sort_date (Optional[Literal["asc", "desc"]]): Date order.
+        skip (int): Rows to skip; deprecated, use `cursor`.
+        limit (int): Page size.
+        cursor (Optional[str]): `next_cursor` of the previous page, requested
+            with the same status and sort_date.
+
+    Returns:
+        Tuple[List[dict], Optional[str]]: The page and the cursor of the next
+            page, or None on the last page.
+
+    Raises:
+        HTTPException: If the cursor is malformed (400) or the query fails (500).
+    """
+    keys = (PurchaseModel.date, PurchaseModel.id)
+    position = _decode_purchase_cursor(cursor) if cursor else None
     try:
-        query = select(PurchaseModel)
+        query = select(*PurchaseModel.__table__.columns)
 
         if status:
             query = query.where(PurchaseModel.status == status)
 
+        # The plain date bound next to the row comparison lets Postgres skip
+        # the monthly partitions the page cannot reach
         if sort_date == "asc":
-            query = query.order_by(asc(PurchaseModel.date))
+            if position:
+                query = query.where(tuple_(*keys) > tuple_(*position), PurchaseModel.date >= position[0])
+            query = query.order_by(*(asc(key) for key in keys))
         else:
-            query = query.order_by(desc(PurchaseModel.date))
+            if position:
+                query = query.where(tuple_(*keys) < tuple_(*position), PurchaseModel.date <= position[0])
+            query = query.order_by(*(desc(key) for key in keys))
 
-        query = query.offset(skip).limit(limit)
+        if skip:
+            query = query.offset(skip)
+        query = query.limit(limit + 1)
         result = await db.execute(query)
-        purchases = result.scalars().all()
+        purchases = [dict(row) for row in result.mappings()]
+        next_cursor = None
+        if len(purchases) > limit:
+            purchases = purchases[:limit]
+            last = purchases[-1]
+            next_cursor = encode_cursor([last["date"].isoformat(), last["id"]])
         logger.info(f"Retrieved {len(purchases)} filtered purchases")
-        return list(purchases)
+        return purchases, next_cursor
     except Exception as e:
         logger.error(f"Error retrieving filtered purchases: {str(e)}")
         raise HTTPException(
@@ -126,7 +356,8 @@ async def get_purchase_by_product_id(db: AsyncSession, product_id: int) -> Purch
 
 async def get_purchase_count(db: AsyncSession) -> int:
     """
-    Returns the total count of purchases in the database.
+    Returns the total count of purchases in the database, from the counter
+    the database maintains on every insert and delete (no table scan).
 
     Args:
         db (AsyncSession): Async database session.
@@ -135,8 +366,10 @@ async def get_purchase_count(db: AsyncSession) -> int:
         int: Total number of purchases.
     """
     logger.info("Getting total purchase count")
-    # CHANGE THIS LINE - use PurchaseModel instead of Purchase
-    result = await db.execute(select(func.count()).select_from(PurchaseModel))
-    count = result.scalar() or 0 
-    logger.info("Found %d total purchases in database", count)
-    return count
\ No newline at end of file
+
+    async def load():
+        count = await get_counter(db, "purchases")
+        logger.info("Found %d total purchases in database", count)
+        return count
+
+    return await single_flight.do(("purchase_count",), load)
\ No newline at end of file
@@ -0,0 +1,89 @@
+import asyncio
+import logging
+from collections import defaultdict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """
+    Coalesces identical concurrent read calls into one execution.
+
+    The first caller for a key (the leader) runs the call, using its own
+    request's database session; callers arriving with the same key while it
+    is in flight wait for and share its result or exception. Nothing is cached:
+    once the call finishes, the next caller starts a new one. If the leader
+    is cancelled (its client went away), a waiting caller takes over.
+
+    Results are shared between callers and must be treated as read-only.
+    Keys are tuples whose first element names the service, which is used
+    to break the metrics down.
+    """
+
+    def __init__(self):
+        self._in_flight: Dict[Hashable, asyncio.Future] = {}
+        self._stats: Dict[str, Dict[str, int]] = defaultdict(lambda: {"calls": 0, "executions": 0, "coalesced": 0})
+
+    async def do(self, key: Tuple, call: Callable[[], Awaitable[T]]) -> T:
+        """
+        Runs `call`, or joins the identical call already in flight.
+
+        Args:
+            key (Tuple): Identifies the call, e.g. ("products", type, name).
+            call (Callable[[], Awaitable[T]]): Performs the read.
+
+        Returns:
+            T: The (possibly shared) result.
+        """
+        stats = self._stats[str(key[0])]
+        stats["calls"] += 1
+        while True:
+            future = self._in_flight.get(key)
+            if future is None:
+                break
+            try:
+                result = await asyncio.shield(future)
+                stats["coalesced"] += 1
+                return result
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    raise  # this caller was cancelled
+                # The leader was cancelled; retry, possibly as the new leader
+
+        future = asyncio.get_running_loop().create_future()
+        # Mark exceptions as retrieved even when nobody else was waiting
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())
+        self._in_flight[key] = future
+        stats["executions"] += 1
+        try:
+            result = await call()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            if self._in_flight.get(key) is future:
+                del self._in_flight[key]
+
+    def stats(self) -> Dict[str, Any]:
+        """Per-service call, execution and coalescing counters."""
+        report = {}
+        for name, stats in self._stats.items():
+            report[name] = {
+                **stats,
+                "coalesced_ratio": round(stats["coalesced"] / stats["calls"], 4) if stats["calls"] else 0.0,
+            }
+        report["in_flight"] = len(self._in_flight)
+        return report
+
+
+# Shared by the read-only services of this process
+single_flight = SingleFlight()
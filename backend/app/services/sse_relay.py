@@ -0,0 +1,203 @@
+import asyncio
+import codecs
+import logging
+import re
+from collections import deque
+from typing import AsyncIterator, Awaitable, Callable, Deque, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Payload prefixes of events that carry job state. These are always delivered;
+# anything else is a log line that may be dropped for a slow consumer.
+CRITICAL_PREFIXES = (
+    "PROGRESS:",
+    "FILETREE:",
+    "JOB_COMPLETE:",
+    "PIPELINE:",
+    "Job ",
+    "ERROR",
+    "EXECUTION ERROR",
+    "GENERATOR ERROR",
+    "STREAMING ERROR",
+    "GPU server error",
+    "Process failed",
+    "Process completed",
+)
+
+KEEPALIVE_FRAME = b":keepalive\n\n"
+
+_LINE_END = re.compile(r"\r\n|\r|\n")
+
+
+class SSEEvent:
+    """A single server-sent event, as dispatched by SSEDecoder."""
+
+    __slots__ = ("data", "event", "id")
+
+    def __init__(self, data: str, event: Optional[str] = None, id: Optional[str] = None):
+        self.data = data
+        self.event = event
+        self.id = id
+
+    @property
+    def critical(self) -> bool:
+        """True for stage, completion and error events, which are never dropped."""
+        return self.event is not None or self.data.startswith(CRITICAL_PREFIXES)
+
+    def encode(self) -> bytes:
+        """Serializes the event back into an SSE frame."""
+        lines = []
+        if self.event is not None:
+            lines.append(f"event: {self.event}")
+        if self.id is not None:
+            lines.append(f"id: {self.id}")
+        lines.extend(f"data: {line}" for line in self.data.split("\n"))
+        return ("\n".join(lines) + "\n\n").encode()
+
+
+class SSEDecoder:
+    """
+    Incremental SSE parser.
+
+    Bytes can be fed in arbitrary chunks; an event is only returned once its
+    terminating blank line has arrived, so events split across network
+    chunks (or multi-byte characters split across chunks) are reassembled.
+    """
+
+    def __init__(self):
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self._buffer = ""
+        self._data: List[str] = []
+        self._event: Optional[str] = None
+        self._id: Optional[str] = None
+
+    def feed(self, chunk: bytes) -> List[SSEEvent]:
+        """Consumes a chunk and returns the events it completed."""
+        self._buffer += self._decoder.decode(chunk)
+        events = []
+        while True:
+            match = _LINE_END.search(self._buffer)
+            # A trailing \r may be the first half of \r\n; wait for more input.
+            if match is None or (match.group() == "\r" and match.end() == len(self._buffer)):
+                break
+            line = self._buffer[:match.start()]
+            self._buffer = self._buffer[match.end():]
+            event = self._process_line(line)
+            if event is not None:
+                events.append(event)
+        return events
+
+    def _process_line(self, line: str) -> Optional[SSEEvent]:
+        if line == "":
+            if not self._data and self._event is None:
+                return None
+            event = SSEEvent("\n".join(self._data), self._event, self._id)
+            self._data, self._event, self._id = [], None, None
+            return event
+        if line.startswith(":"):
+            return None  # comment
+        field, _, value = line.partition(":")
+        if value.startswith(" "):
+            value = value[1:]
+        if field == "data":
+            self._data.append(value)
+        elif field == "event":
+            self._event = value
+        elif field == "id":
+            self._id = value
+        return None
+
+
+class _RelayBuffer:
+    """
+    Bounded queue between the upstream reader and the client writer.
+
+    When more than `max_buffered` events are waiting, the oldest log line is
+    dropped to make room; critical events are always kept. Dropped lines
+    are reported to the client as a single summary event.
+    """
+
+    def __init__(self, max_buffered: int):
+        self.max_buffered = max_buffered
+        self.events: Deque[SSEEvent] = deque()
+        self.dropped = 0
+        self.closed = False
+        self.error: Optional[BaseException] = None
+        self.ready = asyncio.Event()
+
+    def put(self, event: SSEEvent) -> None:
+        if len(self.events) >= self.max_buffered:
+            for i, queued in enumerate(self.events):
+                if not queued.critical:
+                    del self.events[i]
+                    self.dropped += 1
+                    break
+            else:
+                if not event.critical:
+                    self.dropped += 1
+                    return
+        self.events.append(event)
+        self.ready.set()
+
+    def close(self, error: Optional[BaseException] = None) -> None:
+        self.closed = True
+        self.error = error
+        self.ready.set()
+
+
+async def relay_sse(
+    upstream: AsyncIterator[bytes],
+    keepalive_interval: float = 15.0,
+    max_buffered: int = 256,
+    on_event: Optional[Callable[[SSEEvent], Awaitable[None]]] = None,
+) -> AsyncIterator[bytes]:
+    """
+    Relays an upstream SSE byte stream event by event.
+
+    The upstream is read by a background task at its own pace; each parsed
+    event is passed to `on_event` (e.g. job tracking) and buffered for the
+    client. A `:keepalive` comment is sent whenever nothing was written for
+    `keepalive_interval` seconds so proxies keep idle streams open. A slow
+    client causes log lines to be dropped, never stage or completion events.
+
+    Errors raised by the upstream are re-raised after the buffered events
+    have been delivered.
+    """
+    buffer = _RelayBuffer(max_buffered)
+
+    async def read_upstream() -> None:
+        decoder = SSEDecoder()
+        try:
+            async for chunk in upstream:
+                for event in decoder.feed(chunk):
+                    if on_event is not None:
+                        await on_event(event)
+                    buffer.put(event)
+            buffer.close()
+        except Exception as e:
+            buffer.close(e)
+
+    reader = asyncio.create_task(read_upstream())
+    try:
+        while True:
+            if not buffer.events:
+                if buffer.closed:
+                    break
+                buffer.ready.clear()
+                try:
+                    await asyncio.wait_for(buffer.ready.wait(), timeout=keepalive_interval)
+                except asyncio.TimeoutError:
+                    yield KEEPALIVE_FRAME
+                continue
+
+            if buffer.dropped:
+                logger.info("Relay dropped %d log events for a slow client", buffer.dropped)
+                summary = SSEEvent(f"[relay] {buffer.dropped} log line(s) skipped")
+                buffer.dropped = 0
+                yield summary.encode()
+            yield buffer.events.popleft().encode()
+
+        if buffer.error is not None:
+            raise buffer.error
+    finally:
+        reader.cancel()
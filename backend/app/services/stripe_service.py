@@ -0,0 +1,152 @@
+import asyncio
+import logging
+import random
+import uuid
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlencode
+
+import httpx
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Statuses worth retrying: rate limiting and Stripe-side failures
+RETRY_STATUSES = {409, 429, 500, 502, 503, 504}
+
+
+class StripeAPIError(Exception):
+    """A Stripe request failed for good (after any retries)."""
+
+    def __init__(self, message: str, status_code: Optional[int] = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def encode_form(params: Dict[str, Any], prefix: str = "") -> List[Tuple[str, str]]:
+    """
+    Flattens nested parameters into Stripe's form encoding, e.g.
+    {"line_items": [{"quantity": 1}]} -> [("line_items[0][quantity]", "1")].
+    """
+    fields: List[Tuple[str, str]] = []
+    for key, value in params.items():
+        name = f"{prefix}[{key}]" if prefix else str(key)
+        if value is None:
+            continue
+        if isinstance(value, dict):
+            fields += encode_form(value, name)
+        elif isinstance(value, (list, tuple)):
+            for index, item in enumerate(value):
+                if isinstance(item, dict):
+                    fields += encode_form(item, f"{name}[{index}]")
+                else:
+                    fields.append((f"{name}[{index}]", str(item)))
+        elif isinstance(value, bool):
+            fields.append((name, "true" if value else "false"))
+        else:
+            fields.append((name, str(value)))
+    return fields
+
+
+class StripeClient:
+    """
+    Minimal async client for the Stripe API.
+
+    Requests go through one pooled httpx.AsyncClient, so connections (and
+    their TLS sessions) are reused across checkouts and no call blocks the
+    event loop. Every call has a timeout and is retried on network errors,
+    rate limiting and 5xx responses with exponential backoff and full
+    jitter, under a single Idempotency-Key so a retry never creates a
+    second object.
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        base_url: str = "https://api.stripe.com",
+        timeout: float = 10.0,
+        max_retries: int = 2,
+        max_connections: int = 20,
+        backoff: float = 0.5,
+        max_backoff: float = 5.0,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        self.api_key = api_key
+        self.base_url = base_url.rstrip("/")
+        self.timeout = httpx.Timeout(timeout, connect=min(timeout, 5.0))
+        self.max_retries = max_retries
+        self.limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        # Optional transport override, used by tests to talk to the stub server in-process
+        self.transport = transport
+        self._client: Optional[httpx.AsyncClient] = None
+
+    def _http(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                auth=(self.api_key, ""),
+                timeout=self.timeout,
+                limits=self.limits,
+                transport=self.transport,
+                headers={"Stripe-Version": "2024-06-20"},
+            )
+        return self._client
+
+    def _delay(self, attempt: int) -> float:
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+    async def request(self, method: str, path: str, params: Optional[Dict[str, Any]] = None) -> dict:
+        """
+        Sends one API request, retrying transient failures.
+
+        Raises:
+            StripeAPIError: If Stripe rejects the request or it still fails
+                after `max_retries` retries.
+        """
+        headers = {"Content-Type": "application/x-www-form-urlencoded"}
+        if method == "POST":
+            headers["Idempotency-Key"] = str(uuid.uuid4())
+        body = urlencode(encode_form(params or {}))
+        for attempt in range(self.max_retries + 1):
+            retry = attempt < self.max_retries
+            try:
+                response = await self._http().request(method, path, content=body, headers=headers)
+            except httpx.TransportError as e:
+                if not retry:
+                    raise StripeAPIError(f"Stripe unreachable: {e!r}")
+                logger.warning("Stripe %s %s failed (%r), retrying", method, path, e)
+            else:
+                if response.status_code < 400:
+                    return response.json()
+                should_retry = response.headers.get("Stripe-Should-Retry")
+                if not retry or should_retry == "false" or (
+                    response.status_code not in RETRY_STATUSES and should_retry != "true"
+                ):
+                    try:
+                        message = response.json()["error"]["message"]
+                    except (ValueError, KeyError, TypeError):
+                        message = response.text[:200]
+                    raise StripeAPIError(message, response.status_code)
+                logger.warning("Stripe %s %s answered %d, retrying", method, path, response.status_code)
+            await asyncio.sleep(self._delay(attempt))
+        raise StripeAPIError("Stripe request failed")  # not reached
+
+    async def create_checkout_session(self, params: Dict[str, Any]) -> dict:
+        """Creates a Checkout Session; returns Stripe's session object."""
+        return await self.request("POST", "/v1/checkout/sessions", params)
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+# Single client shared by the whole application.
+stripe_client = StripeClient(
+    api_key=settings.stripe_key,
+    base_url=settings.stripe_api_base,
+    timeout=settings.stripe_timeout,
+    max_retries=settings.stripe_max_retries,
+)
@@ -0,0 +1,370 @@
+import asyncio
+import json
+import logging
+import re
+from collections import defaultdict
+from datetime import datetime, timezone
+from decimal import Decimal
+from typing import Callable, Dict, List, Optional, Tuple
+
+import stripe
+from fastapi import HTTPException, status as st
+from sqlalchemy import select, text, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.database_connection import AsyncSessionLocal
+from app.models.product import ProductModel
+from app.models.purchase import PurchaseModel
+from app.models.stripe_event import StripeEventModel
+from app.schemas.purchase import StatusTypeEnum
+from app.services.analytics_service import apply_sales_deltas, sales_deltas
+
+logger = logging.getLogger(__name__)
+
+# Checkout Session events stored in the inbox; every other type is acknowledged and dropped
+HANDLED_EVENTS = (
+    "checkout.session.completed",
+    "checkout.session.async_payment_succeeded",
+    "checkout.session.async_payment_failed",
+)
+
+# Processing attempts before a failing event is left for inspection
+MAX_ATTEMPTS = 5
+
+# Largest postal code the purchases.cep column (a 32-bit integer) holds
+MAX_CEP = 2 ** 31 - 1
+
+_wakeup: Optional[asyncio.Event] = None
+
+
+def verify_event(payload: bytes, signature: Optional[str], secret: str, tolerance: int) -> dict:
+    """
+    Checks the Stripe-Signature header of a webhook body and parses it.
+
+    Raises:
+        HTTPException: If the signature is missing, wrong or too old, or the
+            body is not a Stripe event (400 error).
+    """
+    try:
+        stripe.WebhookSignature.verify_header(payload.decode("utf-8"), signature or "", secret, tolerance)
+        event = json.loads(payload)
+    except (stripe.SignatureVerificationError, UnicodeDecodeError, ValueError) as e:
+        logger.warning("Rejected Stripe webhook: %s", str(e))
+        raise HTTPException(status_code=st.HTTP_400_BAD_REQUEST, detail="Invalid signature")
+    if not isinstance(event, dict) or not isinstance(event.get("id"), str) or not isinstance(event.get("type"), str):
+        raise HTTPException(status_code=st.HTTP_400_BAD_REQUEST, detail="Invalid event")
+    return event
+
+
+async def store_event(db: AsyncSession, event: dict) -> bool:
+    """
+    Writes a verified event to the inbox, once per event ID.
+
+    Returns:
+        bool: False for redeliveries of a stored event and for event types
+            that are not handled, True if the event was stored.
+    """
+    if event["type"] not in HANDLED_EVENTS:
+        logger.info("Ignoring Stripe event %s of type %s", event["id"], event["type"])
+        return False
+    statement = (
+        insert(StripeEventModel)
+        .values(id=event["id"], type=event["type"], payload=event, attempts=0)
+        .on_conflict_do_nothing(index_elements=[StripeEventModel.id])
+        .returning(StripeEventModel.id)
+    )
+    stored = (await db.execute(statement)).scalar() is not None
+    await db.commit()
+    if stored:
+        wake_webhook_worker()
+    else:
+        logger.info("Duplicate delivery of Stripe event %s", event["id"])
+    return stored
+
+
+def _session_status(event_type: str, session: dict) -> StatusTypeEnum:
+    if event_type == "checkout.session.async_payment_succeeded":
+        return StatusTypeEnum.PAID
+    if event_type == "checkout.session.async_payment_failed":
+        return StatusTypeEnum.FAILED
+    # Delayed methods (boleto) complete the session before the payment arrives
+    paid = session.get("payment_status") in ("paid", "no_payment_required")
+    return StatusTypeEnum.PAID if paid else StatusTypeEnum.PENDING
+
+
+def encode_cart_metadata(quantities: Dict[int, int]) -> str:
+    """
+    Products of a session as stored in its `product_ids` metadata:
+    comma separated `id` or `id:quantity` entries, e.g. "4:2,9".
+    """
+    return ",".join(
+        str(product_id) if quantity == 1 else f"{product_id}:{quantity}"
+        for product_id, quantity in quantities.items()
+    )
+
+
+def decode_cart_metadata(value: str) -> List[int]:
+    """
+    Product IDs of a session's `product_ids` metadata, one entry per unit
+    bought (e.g. "4:2,9" -> [4, 4, 9]).
+
+    Raises:
+        ValueError: If an entry is not an ID or a positive quantity.
+    """
+    product_ids: List[int] = []
+    for entry in value.split(","):
+        if not entry.strip():
+            continue
+        product_id, _, quantity = entry.partition(":")
+        units = int(quantity) if quantity else 1
+        if units < 1:
+            raise ValueError(f"invalid quantity in product_ids entry {entry!r}")
+        product_ids += [int(product_id)] * units
+    return product_ids
+
+
+def encode_unit_amounts(amounts: Dict[int, int]) -> str:
+    """
+    Prices charged per unit, in cents, as stored in a session's
+    `unit_amounts` metadata: comma separated `id:cents` entries, e.g. "4:1990,9:500".
+    """
+    return ",".join(f"{product_id}:{cents}" for product_id, cents in amounts.items())
+
+
+def decode_unit_amounts(value: str) -> Dict[int, int]:
+    """
+    Prices charged per unit, in cents, by product ID, from a session's
+    `unit_amounts` metadata (e.g. "4:1990,9:500" -> {4: 1990, 9: 500}).
+
+    Raises:
+        ValueError: If an entry is not an ID and an amount.
+    """
+    amounts: Dict[int, int] = {}
+    for entry in value.split(","):
+        if not entry.strip():
+            continue
+        product_id, _, cents = entry.partition(":")
+        amounts[int(product_id)] = int(cents)
+    return amounts
+
+
+def session_purchases(session: dict, date: datetime) -> List[dict]:
+    """
+    Purchase rows of a Checkout Session, one per product unit bought.
+
+    Products come from the session's `product_ids` metadata and the price
+    charged for each from its `unit_amounts` metadata, both set when the
+    session was created (see encode_cart_metadata and encode_unit_amounts);
+    customer and address from the details Stripe collected at checkout.
+    Sessions created before prices were stored get no amount.
+
+    Raises:
+        ValueError: If the session lacks products, an email or a complete
+            address, or its postal code is not a valid number.
+    """
+    metadata = session.get("metadata") or {}
+    product_ids = decode_cart_metadata(str(metadata.get("product_ids", "")))
+    amounts = decode_unit_amounts(str(metadata.get("unit_amounts", "")))
+    customer = session.get("customer_details") or {}
+    shipping = (
+        session.get("shipping_details")
+        or (session.get("collected_information") or {}).get("shipping_details")
+        or {}
+    )
+    address = shipping.get("address") or customer.get("address") or {}
+    email = customer.get("email") or session.get("customer_email")
+    cep = re.sub(r"\D", "", address.get("postal_code") or "")
+    if not product_ids:
+        raise ValueError("no product_ids in the session metadata")
+    if not (email and address.get("line1") and address.get("city") and address.get("state") and cep):
+        raise ValueError("no customer email or complete shipping address")
+    if int(cep) > MAX_CEP:
+        raise ValueError(f"invalid postal code {address['postal_code']!r}")
+    purchase = {
+        "email": email,
+        "name": shipping.get("name") or customer.get("name") or email,
+        "address": address["line1"],
+        "complement": address.get("line2") or None,
+        "city": address["city"],
+        "state": address["state"],
+        "cep": int(cep),
+        "stripe_session_id": session["id"],
+        "date": date,
+    }
+    return [
+        dict(purchase, product_id=product_id,
+             amount=Decimal(amounts[product_id]) / 100 if product_id in amounts else None)
+        for product_id in product_ids
+    ]
+
+
+async def _apply_events(db: AsyncSession, events: List[StripeEventModel]) -> Tuple[int, int]:
+    """Creates and updates the purchases of a batch of events; the caller commits."""
+    now = datetime.now(timezone.utc)
+    sessions: Dict[str, Tuple[StatusTypeEnum, List[dict]]] = {}
+    for event in sorted(events, key=lambda event: (event.payload.get("created") or 0, event.received_at)):
+        event.processed_at = now
+        session = (event.payload.get("data") or {}).get("object") or {}
+        try:
+            created = datetime.fromtimestamp(event.payload.get("created") or now.timestamp(), timezone.utc)
+            session_status = _session_status(event.type, session)
+            rows = session_purchases(session, created)
+        except (KeyError, TypeError, ValueError) as e:
+            event.error = f"Skipped: {e}"
+            logger.warning("Skipping Stripe event %s: %s", event.id, str(e))
+            continue
+        # Only a pending session moves on; a later "completed, unpaid" never undoes a payment
+        previous = sessions.get(session["id"])
+        if previous is None or previous[0] == StatusTypeEnum.PENDING:
+            sessions[session["id"]] = (session_status, rows)
+    if not sessions:
+        return 0, 0
+
+    # Events of one session may be claimed by concurrent workers: serialize
+    # them per session, taking the locks in a fixed order
+    await db.execute(
+        text("SELECT pg_advisory_xact_lock(hashtext(s)) FROM unnest(CAST(:ids AS text[])) AS s ORDER BY s"),
+        {"ids": sorted(sessions)},
+    )
+    existing = (await db.execute(
+        select(PurchaseModel).where(PurchaseModel.stripe_session_id.in_(list(sessions))).with_for_update()
+    )).scalars().all()
+
+    changes = []
+    moved: Dict[StatusTypeEnum, List[int]] = defaultdict(list)
+    for purchase in existing:
+        session_status = sessions[purchase.stripe_session_id][0]
+        # Only pending purchases follow the payment; later statuses belong to the store
+        if purchase.status == StatusTypeEnum.PENDING and session_status != StatusTypeEnum.PENDING:
+            changes += [(purchase, StatusTypeEnum.PENDING, -1), (purchase, session_status, 1)]
+            moved[session_status].append(purchase.id)
+    for session_status, ids in moved.items():
+        await db.execute(update(PurchaseModel).where(PurchaseModel.id.in_(ids)).values(status=session_status))
+
+    known = {purchase.stripe_session_id for purchase in existing}
+    rows = [
+        dict(row, status=session_status)
+        for session_id, (session_status, session_rows) in sessions.items() if session_id not in known
+        for row in session_rows
+    ]
+    if rows:
+        # Sessions created before the charged prices were stored fall back to the catalog price
+        unpriced = {row["product_id"] for row in rows if row["amount"] is None}
+        if unpriced:
+            prices = dict((await db.execute(
+                select(ProductModel.id, ProductModel.price).where(ProductModel.id.in_(unpriced))
+            )).all())
+            rows = [row if row["amount"] is not None else dict(row, amount=prices.get(row["product_id"])) for row in rows]
+        # One bulk INSERT ... RETURNING for every purchase of the batch
+        created = (await db.scalars(insert(PurchaseModel).returning(PurchaseModel), rows)).all()
+        changes += [(purchase, purchase.status, 1) for purchase in created]
+    await apply_sales_deltas(db, sales_deltas(changes))
+    return len(rows), sum(len(ids) for ids in moved.values())
+
+
+async def _claim_events(db: AsyncSession, limit: int, ids: Optional[List[str]] = None) -> List[StripeEventModel]:
+    """Locks up to `limit` pending inbox events, oldest first, skipping those other workers hold."""
+    query = (
+        select(StripeEventModel)
+        .where(StripeEventModel.processed_at.is_(None), StripeEventModel.attempts < MAX_ATTEMPTS)
+        .order_by(StripeEventModel.received_at)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+    if ids is not None:
+        query = query.where(StripeEventModel.id.in_(ids))
+    return (await db.execute(query)).scalars().all()
+
+
+async def process_inbox_batch(
+    session_factory: Callable[[], AsyncSession] = AsyncSessionLocal,
+    limit: int = settings.stripe_webhook_batch_size,
+) -> int:
+    """
+    Applies up to `limit` pending inbox events in one transaction.
+
+    Events are claimed with FOR UPDATE SKIP LOCKED, so several workers
+    (one per application process) share the inbox without applying an
+    event twice. The purchases of new sessions are inserted together,
+    and purchases whose payment settled are updated with one statement
+    per status. Events that cannot become purchases (e.g. no products in
+    the metadata) are marked processed with the reason.
+
+    If the batch fails, it is rolled back and its events are applied again
+    one per transaction, so a single bad event does not hold back the
+    others; only the events that fail on their own count an attempt, and
+    are retried up to MAX_ATTEMPTS times.
+
+    Args:
+        session_factory (Callable[[], AsyncSession]): Session factory.
+        limit (int): Most events applied at once.
+
+    Returns:
+        int: Number of events claimed; `limit` means more may be pending.
+    """
+    async with session_factory() as db:
+        events = await _claim_events(db, limit)
+        if not events:
+            return 0
+        ids = [event.id for event in events]
+        try:
+            inserted, updated = await _apply_events(db, events)
+            await db.commit()
+        except Exception as e:
+            await db.rollback()
+            logger.warning("Failed to apply %d Stripe events together (%s), applying them one by one", len(ids), str(e))
+            inserted = updated = 0
+            for event_id in ids:
+                # The rollback released the batch; another worker may have applied the event since
+                claimed = await _claim_events(db, 1, [event_id])
+                if not claimed:
+                    continue
+                try:
+                    event_inserted, event_updated = await _apply_events(db, claimed)
+                    await db.commit()
+                except Exception as e:
+                    await db.rollback()
+                    logger.error("Failed to apply Stripe event %s: %s", event_id, str(e))
+                    await db.execute(
+                        update(StripeEventModel)
+                        .where(StripeEventModel.id == event_id)
+                        .values(attempts=StripeEventModel.attempts + 1, error=str(e)[:1000])
+                    )
+                    await db.commit()
+                    continue
+                inserted += event_inserted
+                updated += event_updated
+    logger.info("Applied %d Stripe events: %d purchases created, %d updated", len(ids), inserted, updated)
+    return len(ids)
+
+
+def wake_webhook_worker() -> None:
+    """Makes the worker apply newly stored events now instead of at its next poll."""
+    if _wakeup is not None:
+        _wakeup.set()
+
+
+async def run_webhook_worker(interval: float = settings.stripe_webhook_poll_interval) -> None:
+    """
+    Applies inbox events as they are stored, until cancelled.
+
+    Wakes up when the webhook stores an event in this process, and every
+    `interval` seconds to pick up events stored by other processes or
+    left over by failed attempts.
+    """
+    global _wakeup
+    _wakeup = asyncio.Event()
+    limit = settings.stripe_webhook_batch_size
+    while True:
+        try:
+            while await process_inbox_batch(limit=limit) >= limit:
+                pass
+        except Exception as e:
+            logger.error("Stripe webhook worker failed: %s", str(e))
+        try:
+            await asyncio.wait_for(_wakeup.wait(), interval)
+        except asyncio.TimeoutError:
+            pass
+        _wakeup.clear()
@@ -0,0 +1,265 @@
+import asyncio
+import fcntl
+import hashlib
+import json
+import logging
+import os
+import re
+import shutil
+import time
+import uuid
+from typing import AsyncIterator, List, Optional
+
+import aiofiles
+from fastapi import HTTPException, status
+
+from app.core.config import settings
+from app.schemas.pipeline import UploadCreate, UploadStatus
+
+logger = logging.getLogger(__name__)
+
+# Chunks are stored as chunk_000000, chunk_000001, ... next to manifest.json;
+# the padding is cosmetic, indexes past 999999 simply get more digits
+_CHUNK_RE = re.compile(r"^chunk_(\d+)$")
+_UPLOAD_ID_RE = re.compile(r"^[0-9a-f]{32}$")
+_COPY_BUFFER_SIZE = 1024 * 1024
+
+
+def _upload_dir(upload_id: str) -> str:
+    if not _UPLOAD_ID_RE.match(upload_id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Upload not found")
+    return os.path.join(settings.upload_dir, upload_id)
+
+
+def _chunk_path(directory: str, index: int) -> str:
+    return os.path.join(directory, f"chunk_{index:06d}")
+
+
+def _load_manifest(upload_id: str) -> dict:
+    directory = _upload_dir(upload_id)
+    try:
+        with open(os.path.join(directory, "manifest.json")) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Upload not found")
+
+
+def _received_chunks(directory: str) -> List[int]:
+    chunks = []
+    for name in os.listdir(directory):
+        match = _CHUNK_RE.match(name)
+        if match:
+            chunks.append(int(match.group(1)))
+    return sorted(chunks)
+
+
+def _expected_chunk_size(manifest: dict, index: int) -> int:
+    if index < manifest["total_chunks"] - 1:
+        return manifest["chunk_size"]
+    return manifest["total_size"] - manifest["chunk_size"] * (manifest["total_chunks"] - 1)
+
+
+def _check_owner(manifest: dict, owner: str) -> None:
+    if manifest["owner"] != owner:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Upload not found")
+
+
+def _status(manifest: dict) -> UploadStatus:
+    received = _received_chunks(_upload_dir(manifest["upload_id"]))
+    return UploadStatus(
+        upload_id=manifest["upload_id"],
+        filename=manifest["filename"],
+        total_size=manifest["total_size"],
+        chunk_size=manifest["chunk_size"],
+        total_chunks=manifest["total_chunks"],
+        received_chunks=received,
+        complete=len(received) == manifest["total_chunks"],
+    )
+
+
+def purge_stale_uploads() -> None:
+    """Deletes uploads that were not finalized within UPLOAD_TTL_HOURS."""
+    if not os.path.isdir(settings.upload_dir):
+        return
+    cutoff = time.time() - settings.upload_ttl_hours * 3600
+    for name in os.listdir(settings.upload_dir):
+        directory = os.path.join(settings.upload_dir, name)
+        try:
+            if os.path.getmtime(directory) < cutoff:
+                shutil.rmtree(directory, ignore_errors=True)
+                logger.info("Purged stale upload %s", name)
+        except FileNotFoundError:
+            pass
+
+
+async def create_upload(upload: UploadCreate, owner: str) -> UploadStatus:
+    """
+    Starts a resumable upload and returns its (empty) status.
+
+    Raises:
+        HTTPException: 400 for non-ZIP files, sizes outside the configured
+            limits or more chunks than UPLOAD_MAX_CHUNKS.
+    """
+    if not upload.filename.endswith(".zip"):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Only ZIP files are accepted")
+    if upload.chunk_size > settings.upload_max_chunk_size:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"chunk_size may not exceed {settings.upload_max_chunk_size} bytes",
+        )
+    if upload.total_size > settings.upload_max_size:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"total_size may not exceed {settings.upload_max_size} bytes",
+        )
+    total_chunks = -(-upload.total_size // upload.chunk_size)
+    if total_chunks > settings.upload_max_chunks:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"An upload may have at most {settings.upload_max_chunks} chunks; "
+                   f"use chunks of at least {-(-upload.total_size // settings.upload_max_chunks)} bytes",
+        )
+
+    await asyncio.to_thread(purge_stale_uploads)
+
+    upload_id = uuid.uuid4().hex
+    directory = _upload_dir(upload_id)
+    os.makedirs(directory)
+    manifest = {
+        "upload_id": upload_id,
+        "filename": os.path.basename(upload.filename),
+        "total_size": upload.total_size,
+        "chunk_size": upload.chunk_size,
+        "total_chunks": total_chunks,
+        "owner": owner,
+        "created_at": time.time(),
+    }
+    with open(os.path.join(directory, "manifest.json"), "w") as f:
+        json.dump(manifest, f)
+
+    logger.info("Created upload %s for %s (%d bytes in %d chunks)",
+                upload_id, manifest["filename"], upload.total_size, manifest["total_chunks"])
+    return _status(manifest)
+
+
+async def get_upload_status(upload_id: str, owner: str) -> UploadStatus:
+    """Returns which chunks of an upload have been stored."""
+    manifest = _load_manifest(upload_id)
+    _check_owner(manifest, owner)
+    return _status(manifest)
+
+
+async def write_chunk(
+    upload_id: str,
+    index: int,
+    body: AsyncIterator[bytes],
+    sha256: str,
+    owner: str,
+) -> UploadStatus:
+    """
+    Streams one chunk to disk and verifies its size and SHA-256 checksum.
+
+    The chunk is written to a private temporary file and renamed into place
+    only once verified, so chunks may be uploaded in parallel and retried
+    at will; re-sending a stored chunk simply replaces it.
+
+    Raises:
+        HTTPException: 404 for unknown uploads, 400 for bad indexes or sizes,
+            422 when the checksum does not match.
+    """
+    manifest = _load_manifest(upload_id)
+    _check_owner(manifest, owner)
+    if not 0 <= index < manifest["total_chunks"]:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Chunk index out of range")
+
+    expected_size = _expected_chunk_size(manifest, index)
+    directory = _upload_dir(upload_id)
+    temp_path = f"{_chunk_path(directory, index)}.{uuid.uuid4().hex}.part"
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        async with aiofiles.open(temp_path, "wb") as f:
+            async for data in body:
+                size += len(data)
+                if size > expected_size:
+                    raise HTTPException(
+                        status_code=status.HTTP_400_BAD_REQUEST,
+                        detail=f"Chunk {index} must be {expected_size} bytes",
+                    )
+                digest.update(data)
+                await f.write(data)
+
+        if size != expected_size:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Chunk {index} must be {expected_size} bytes, got {size}",
+            )
+        if digest.hexdigest() != sha256.lower():
+            logger.warning("Checksum mismatch for chunk %d of upload %s", index, upload_id)
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail=f"Checksum mismatch for chunk {index}",
+            )
+        os.replace(temp_path, _chunk_path(directory, index))
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+    logger.info("Stored chunk %d/%d of upload %s", index + 1, manifest["total_chunks"], upload_id)
+    return _status(manifest)
+
+
+def _assemble(directory: str, total_chunks: int, target: str) -> None:
+    with open(target, "wb") as out:
+        for index in range(total_chunks):
+            with open(_chunk_path(directory, index), "rb") as chunk:
+                shutil.copyfileobj(chunk, out, _COPY_BUFFER_SIZE)
+
+
+async def assemble_upload(upload_id: str, owner: str) -> tuple[str, str, int]:
+    """
+    Concatenates all chunks into the final ZIP file.
+
+    Chunks are copied with a fixed-size buffer in a worker thread, so memory
+    use does not depend on the upload size. Assembling twice is harmless, but
+    not at the same time: the upload is locked while it is assembled, which
+    also holds across worker processes.
+
+    Returns:
+        tuple[str, str, int]: Path of the assembled file, original filename and size.
+
+    Raises:
+        HTTPException: 409 if chunks are still missing or the upload is
+            already being assembled.
+    """
+    manifest = _load_manifest(upload_id)
+    _check_owner(manifest, owner)
+    directory = _upload_dir(upload_id)
+    received = _received_chunks(directory)
+    missing = sorted(set(range(manifest["total_chunks"])) - set(received))
+    if missing:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail={"message": "Upload is incomplete", "missing_chunks": missing[:100]},
+        )
+
+    target = os.path.join(directory, "assembled.zip")
+    temp_target = f"{target}.part"
+    # flock is released with the file, so a crashed worker never leaves the upload locked
+    with open(os.path.join(directory, "assemble.lock"), "w") as lock:
+        try:
+            fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Upload is already being assembled")
+        await asyncio.to_thread(_assemble, directory, manifest["total_chunks"], temp_target)
+        os.replace(temp_target, target)
+    logger.info("Assembled upload %s (%d bytes)", upload_id, manifest["total_size"])
+    return target, manifest["filename"], manifest["total_size"]
+
+
+def delete_upload(upload_id: str, owner: Optional[str] = None) -> None:
+    """Removes an upload and all of its chunks."""
+    if owner is not None:
+        _check_owner(_load_manifest(upload_id), owner)
+    shutil.rmtree(_upload_dir(upload_id), ignore_errors=True)
+    logger.info("Deleted upload %s", upload_id)
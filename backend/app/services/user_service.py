@@ -4,10 +4,12 @@ from sqlalchemy.future import select
 from sqlalchemy.exc import IntegrityError
 from app.models.user import User
 from app.models.product import ProductModel 
+from app.services.counter_service import get_counter
+from app.services.product_loader import ProductLoader
 from app.schemas.user import UserCreate
 from app.core.security import get_password_hash, verify_password, get_subject_from_token
 from app.services.smtp_service import send_welcome_email
-from sqlalchemy import func
+from app.services.single_flight import single_flight
 import logging
 
 logger = logging.getLogger(__name__)
@@ -93,16 +95,17 @@ async def authenticate_user(db: AsyncSession, email: str, password: str) -> User
 
 
 
-async def get_products_cart(db: AsyncSession, token: str) -> list[ProductModel] | None:
+async def get_products_cart(db: AsyncSession, token: str, loader: ProductLoader | None = None) -> list[dict] | None:
     """
     Retrieves all products in the authenticated user's cart.
 
     Args:
         db (AsyncSession): Async database session.
         token (str): JWT token for user identification.
+        loader (ProductLoader | None): Request's product loader; one is created if omitted.
 
     Returns:
-        list[ProductModel] | None: List of products in the cart or None if user/token invalid.
+        list[dict] | None: Product rows in the cart or None if user/token invalid.
     """
     logger.info("Getting products from cart using token")
     try:
@@ -130,10 +133,9 @@ async def get_products_cart(db: AsyncSession, token: str) -> list[ProductModel]
         logger.info("User's cart is empty after conversion: %s", user_email)
         return []
    
-    result = await db.execute(
-        select(ProductModel).where(ProductModel.id.in_(cart_ids))
-    )
-    products = list(result.scalars().all())
+    loader = loader or ProductLoader(db)
+    rows = await loader.load_many(dict.fromkeys(cart_ids))
+    products = [row for row in rows if row is not None]
     
     logger.info("Retrieved %d products from user cart for user: %s", len(products), user_email)
     return products
@@ -192,7 +194,8 @@ async def remove_product_from_cart(db: AsyncSession, token: str, product_id: int
 
 async def get_user_count(db: AsyncSession) -> int:
     """
-    Returns the total count of users in the database.
+    Returns the total count of users in the database, from the counter
+    the database maintains on every insert and delete (no table scan).
 
     Args:
         db (AsyncSession): Async database session.
@@ -201,7 +204,10 @@ async def get_user_count(db: AsyncSession) -> int:
         int: Total number of users.
     """
     logger.info("Getting total user count")
-    result = await db.execute(select(func.count(User.id)))
-    count = result.scalar() or 0 
-    logger.info("Found %d total users in database", count)
-    return count
+
+    async def load():
+        count = await get_counter(db, "users")
+        logger.info("Found %d total users in database", count)
+        return count
+
+    return await single_flight.do(("user_count",), load)
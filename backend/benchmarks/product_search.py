@@ -0,0 +1,137 @@
+"""
+Benchmark: indexed product search versus the legacy ILIKE name filter.
+
+Seeds a scratch copy of the products table (same columns and indexes) in a
+separate schema, runs the old ILIKE filter (with index scans disabled, as
+before the search migration, and with the new trigram index) and the new
+search query against it, and prints latency percentiles and the plan each
+query used. Needs a database migrated to
+head; the scratch schema is dropped afterwards unless --keep is given.
+
+    python -m benchmarks.product_search --rows 500000
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import ClauseElement, Executable
+
+from app.core.config import settings
+from app.models.product import ProductModel
+from app.services.product_service import build_search_clauses
+
+SCHEMA = "search_bench"
+QUERIES = ["juniper", "maple", "bonsai pot", "junpier", "glazed ceramic"]
+
+SEED_SQL = f"""
+INSERT INTO {SCHEMA}.products (id, name, price, description, "sourceImage", "sourceModel", type)
+SELECT
+    i,
+    (ARRAY['Juniper','Maple','Pine','Ficus','Azalea','Elm','Olive','Wisteria'])[1 + i % 8] || ' ' ||
+    (ARRAY['Bonsai','Pot','Tray','Shears','Wire','Soil','Stand','Kit'])[1 + (i / 8) % 8] || ' ' || i,
+    (i % 500) + 0.99,
+    'Hand selected ' ||
+    (ARRAY['glazed ceramic','unglazed clay','stainless steel','aluminium','akadama'])[1 + i % 5] ||
+    ' item, grown and inspected in our nursery. Batch ' || i,
+    'images/' || i || '.png',
+    'models/' || i || '.glb',
+    (ARRAY['bonsai','pot','accessory','tools','supply'])[1 + i % 5]::types_enum
+FROM generate_series(1, :rows) AS i
+"""
+
+
+class Explain(Executable, ClauseElement):
+    """EXPLAIN of a statement, keeping its bound parameters."""
+
+    inherit_cache = False
+
+    def __init__(self, statement):
+        self.statement = statement
+
+
+@compiles(Explain)
+def _compile_explain(element, compiler, **kw):
+    return "EXPLAIN " + compiler.process(element.statement, **kw)
+
+
+def legacy_query(q: str):
+    return select(ProductModel).where(ProductModel.name.ilike(f"%{q}%"))
+
+
+def search_query(q: str, limit: int = 20):
+    condition, rank = build_search_clauses(q)
+    return select(ProductModel).where(condition).order_by(rank.desc(), ProductModel.id).limit(limit)
+
+
+async def seed(rows: int) -> None:
+    engine = create_async_engine(settings.database_url)
+    async with engine.begin() as conn:
+        await conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        await conn.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+        await conn.execute(text(f"CREATE TABLE {SCHEMA}.products (LIKE public.products INCLUDING ALL)"))
+        started = time.perf_counter()
+        await conn.execute(text(SEED_SQL), {"rows": rows})
+        print(f"Seeded {rows} products in {time.perf_counter() - started:.1f}s")
+    async with engine.connect() as conn:
+        await conn.execution_options(isolation_level="AUTOCOMMIT")
+        await conn.execute(text(f"VACUUM ANALYZE {SCHEMA}.products"))
+    await engine.dispose()
+
+
+async def measure(session: AsyncSession, query, repeat: int) -> tuple[list[float], int, str]:
+    plan = (await session.execute(Explain(query))).scalars().all()
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        rows = (await session.execute(query)).scalars().all()
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings, len(rows), plan[0].strip()
+
+
+def summary(timings: list[float]) -> str:
+    ordered = sorted(timings)
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    return f"median {statistics.median(ordered):8.2f} ms  p95 {p95:8.2f} ms"
+
+
+async def run(rows: int, repeat: int, keep: bool) -> None:
+    await seed(rows)
+    # Unqualified "products" now resolves to the scratch table, so the
+    # exact queries built by the application are measured.
+    engine = create_async_engine(
+        settings.database_url,
+        connect_args={"server_settings": {"search_path": f"{SCHEMA},public"}},
+    )
+    try:
+        async with AsyncSession(engine) as session:
+            for q in QUERIES:
+                print(f"\nq = {q!r}")
+                # Without the trigram index, ILIKE '%q%' is a sequential scan, as before the migration
+                await session.execute(text("SET LOCAL enable_bitmapscan = off"))
+                timings, count, plan = await measure(session, legacy_query(q), repeat)
+                print(f"  ILIKE, no index  {summary(timings)}  rows {count:6d}  plan: {plan}")
+                await session.rollback()
+
+                for label, query in (("ILIKE, trigram  ", legacy_query(q)), ("search          ", search_query(q))):
+                    timings, count, plan = await measure(session, query, repeat)
+                    print(f"  {label} {summary(timings)}  rows {count:6d}  plan: {plan}")
+    finally:
+        await engine.dispose()
+        if not keep:
+            cleanup = create_async_engine(settings.database_url)
+            async with cleanup.begin() as conn:
+                await conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+            await cleanup.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rows", type=int, default=500_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--keep", action="store_true", help="keep the seeded scratch schema")
+    args = parser.parse_args()
+    asyncio.run(run(args.rows, args.repeat, args.keep))
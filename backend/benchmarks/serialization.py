@@ -0,0 +1,120 @@
+"""
+Microbenchmark: JSON serialization of the hot list endpoints.
+
+Compares, for a page of products and a page of purchases, the previous
+response path (ORM instances validated through Pydantic models, then
+re-validated by FastAPI's response_model) with the fast path (plain dict
+rows dumped by a precompiled TypeAdapter). Both run as real FastAPI routes
+driven in-process over ASGI, one core, no database, so the numbers isolate
+serialization and framework overhead.
+
+    python -m benchmarks.serialization --rows 100 --seconds 3
+"""
+import argparse
+import asyncio
+import time
+from datetime import datetime, timezone
+from typing import List
+
+import httpx
+from fastapi import FastAPI
+
+from app.core.serialization import json_response, product_rows, purchase_rows
+from app.models.product import ProductModel
+from app.models.purchase import PurchaseModel
+from app.schemas.product import Product, ProductTypeEnum
+from app.schemas.purchase import Purchase, StatusTypeEnum
+
+
+def product_data(rows: int) -> List[dict]:
+    return [
+        {
+            "id": i,
+            "name": f"Juniper Bonsai {i}",
+            "price": 100.0 + i,
+            "description": "Hand selected shohin juniper, wired and styled. " * 4,
+            "sourceImage": f"images/{i}.png",
+            "sourceModel": f"models/{i}.glb",
+            "type": ProductTypeEnum.bonsai,
+            "sku": f"JUN-{i}",
+        }
+        for i in range(rows)
+    ]
+
+
+def purchase_data(rows: int) -> List[dict]:
+    return [
+        {
+            "id": i,
+            "product_id": i % 50,
+            "email": f"customer{i}@example.com",
+            "name": "Aiko Tanaka",
+            "address": "1-2-3 Shibuya",
+            "complement": None,
+            "city": "Tokyo",
+            "state": "TK",
+            "cep": 12345678,
+            "status": StatusTypeEnum.PAID,
+            "amount": 120.0 + i,
+            "stripe_session_id": None,
+            "date": datetime(2026, 1, 1, tzinfo=timezone.utc),
+        }
+        for i in range(rows)
+    ]
+
+
+def build_app(rows: int) -> FastAPI:
+    app = FastAPI()
+    products, purchases = product_data(rows), purchase_data(rows)
+
+    @app.get("/before/products", response_model=List[Product])
+    async def products_before():
+        return [Product.model_validate(ProductModel(**row), from_attributes=True) for row in products]
+
+    @app.get("/after/products", response_model=List[Product])
+    async def products_after():
+        return json_response(product_rows, products)
+
+    @app.get("/before/purchases", response_model=List[Purchase])
+    async def purchases_before():
+        return [Purchase.model_validate(PurchaseModel(**row)) for row in purchases]
+
+    @app.get("/after/purchases", response_model=List[Purchase])
+    async def purchases_after():
+        return json_response(purchase_rows, purchases)
+
+    return app
+
+
+async def requests_per_second(client: httpx.AsyncClient, path: str, seconds: float) -> float:
+    for _ in range(20):  # warm up
+        await client.get(path)
+    count = 0
+    started = time.perf_counter()
+    while time.perf_counter() - started < seconds:
+        response = await client.get(path)
+        response.raise_for_status()
+        count += 1
+    return count / (time.perf_counter() - started)
+
+
+async def run(rows: int, seconds: float) -> None:
+    transport = httpx.ASGITransport(app=build_app(rows))
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        before = (await client.get("/before/purchases")).json()
+        after = (await client.get("/after/purchases")).json()
+        assert before == after, "fast path must produce identical JSON"
+
+        print(f"{rows} rows per response, single core\n")
+        for resource in ("products", "purchases"):
+            old = await requests_per_second(client, f"/before/{resource}", seconds)
+            new = await requests_per_second(client, f"/after/{resource}", seconds)
+            print(f"{resource:10s} before {old:8.0f} req/s   after {new:8.0f} req/s   x{new / old:.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rows", type=int, default=100)
+    parser.add_argument("--seconds", type=float, default=3.0)
+    args = parser.parse_args()
+    asyncio.run(run(args.rows, args.seconds))
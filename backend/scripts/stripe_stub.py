@@ -0,0 +1,81 @@
+"""
+Local stub of the Stripe API's Checkout Session endpoint.
+
+Answers POST /v1/checkout/sessions like Stripe does, after a configurable
+latency, and can fail the first attempts of each request (500 or 429) to
+exercise the client's retries. Attempts sharing an Idempotency-Key count as
+one request, and a successful replay returns the same session, as on Stripe.
+Point the backend at it with STRIPE_API_BASE:
+
+    python -m scripts.stripe_stub --port 12111 --latency 0.3 --fail-first 1
+    STRIPE_API_BASE=http://localhost:12111 uvicorn app.main:app
+"""
+import argparse
+import asyncio
+import uuid
+from collections import Counter
+from typing import Dict, List, Tuple
+from urllib.parse import parse_qsl
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+
+def create_stub_app(latency: float = 0.0, fail_first: int = 0, fail_status: int = 500) -> FastAPI:
+    """
+    Builds the stub application.
+
+    Args:
+        latency (float): Seconds each request takes to answer.
+        fail_first (int): Attempts of each idempotency key answered with `fail_status`.
+        fail_status (int): Status of the injected failures.
+
+    The received form fields are kept in `app.state.requests`, one list of
+    (key, value) pairs per attempt, to let tests inspect what was sent.
+    """
+    app = FastAPI()
+    app.state.requests: List[List[Tuple[str, str]]] = []
+    attempts: Counter = Counter()
+    sessions: Dict[str, dict] = {}
+
+    @app.post("/v1/checkout/sessions")
+    async def create_checkout_session(request: Request):
+        fields = parse_qsl((await request.body()).decode(), keep_blank_values=True)
+        app.state.requests.append(fields)
+        key = request.headers.get("Idempotency-Key") or uuid.uuid4().hex
+        attempts[key] += 1
+        await asyncio.sleep(latency)
+        if not request.headers.get("Authorization"):
+            return JSONResponse({"error": {"message": "You did not provide an API key."}}, status_code=401)
+        if attempts[key] <= fail_first:
+            return JSONResponse({"error": {"message": "Injected failure"}}, status_code=fail_status)
+        if key not in sessions:
+            params = dict(fields)
+            if not params.get("success_url") or not params.get("mode"):
+                return JSONResponse({"error": {"message": "Missing required param: mode or success_url."}},
+                                    status_code=400, headers={"Stripe-Should-Retry": "false"})
+            session_id = f"cs_test_{uuid.uuid4().hex}"
+            sessions[key] = {
+                "id": session_id,
+                "object": "checkout.session",
+                "mode": params["mode"],
+                "status": "open",
+                "payment_status": "unpaid",
+                "url": f"https://checkout.stripe.com/c/pay/{session_id}",
+                "metadata": {k[len("metadata["):-1]: v for k, v in fields if k.startswith("metadata[")},
+            }
+        return JSONResponse(sessions[key])
+
+    return app
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--port", type=int, default=12111)
+    parser.add_argument("--latency", type=float, default=0.3, help="seconds per request")
+    parser.add_argument("--fail-first", type=int, default=0, help="failed attempts per idempotency key")
+    parser.add_argument("--fail-status", type=int, default=500)
+    args = parser.parse_args()
+    uvicorn.run(create_stub_app(args.latency, args.fail_first, args.fail_status), port=args.port)
@@ -0,0 +1,134 @@
+"""
+Local fake of Stripe's webhook deliveries.
+
+Builds Checkout Session events shaped like Stripe's, signs them with the
+endpoint secret exactly as Stripe does (Stripe-Signature: t=<unix time>,
+v1=<HMAC-SHA256 of "<t>.<body>">) and posts them to the webhook, each one
+several times and concurrently, as Stripe's at-least-once retries do. The
+purchases created should match the sessions, whatever the duplication.
+
+    STRIPE_WEBHOOK_SECRET=whsec_test python -m scripts.stripe_webhook_fake \\
+        --url http://localhost:8000/stripe/webhook --sessions 200 --duplicates 3 --product-ids 1,2
+"""
+import argparse
+import asyncio
+import hashlib
+import hmac
+import json
+import os
+import random
+import time
+import uuid
+from collections import Counter
+from typing import Dict, List, Optional
+
+import httpx
+
+from app.services.stripe_webhook_service import encode_cart_metadata, encode_unit_amounts
+
+
+def sign(payload: bytes, secret: str, timestamp: Optional[int] = None) -> str:
+    """Stripe-Signature header value for a webhook body."""
+    timestamp = int(time.time()) if timestamp is None else timestamp
+    digest = hmac.new(secret.encode(), f"{timestamp}.".encode() + payload, hashlib.sha256).hexdigest()
+    return f"t={timestamp},v1={digest}"
+
+
+def checkout_session_event(
+    session_id: str,
+    product_ids: List[int],
+    event_type: str = "checkout.session.completed",
+    payment_status: str = "paid",
+    email: str = "customer@example.com",
+    created: Optional[int] = None,
+    unit_amounts: Optional[Dict[int, int]] = None,
+) -> dict:
+    """
+    A Checkout Session event with the fields the webhook worker reads.
+    Without `unit_amounts` (cents per product) the session carries no
+    prices, like sessions created before they were stored.
+    """
+    metadata = {"product_ids": encode_cart_metadata(Counter(product_ids))}
+    if unit_amounts:
+        metadata["unit_amounts"] = encode_unit_amounts(unit_amounts)
+    return {
+        "id": f"evt_{uuid.uuid4().hex}",
+        "object": "event",
+        "type": event_type,
+        "created": int(time.time()) if created is None else created,
+        "livemode": False,
+        "data": {"object": {
+            "id": session_id,
+            "object": "checkout.session",
+            "mode": "payment",
+            "status": "complete",
+            "payment_status": payment_status,
+            "metadata": metadata,
+            "customer_details": {"email": email, "name": "Fake Customer"},
+            "shipping_details": {
+                "name": "Fake Customer",
+                "address": {
+                    "line1": "Rua das Flores 100", "line2": "Apto 12", "city": "São Paulo",
+                    "state": "SP", "postal_code": "01310-100", "country": "BR",
+                },
+            },
+        }},
+    }
+
+
+async def deliver(client: httpx.AsyncClient, url: str, event: dict, secret: str) -> int:
+    payload = json.dumps(event).encode()
+    response = await client.post(
+        url, content=payload, headers={"Stripe-Signature": sign(payload, secret), "Content-Type": "application/json"}
+    )
+    return response.status_code
+
+
+async def run(url: str, secret: str, sessions: int, duplicates: int, product_ids: List[int],
+              boleto: bool, concurrency: int) -> None:
+    events = []
+    for i in range(sessions):
+        session_id = f"cs_test_{uuid.uuid4().hex}"
+        if boleto and i % 2:
+            # Delayed payment: completed unpaid, then settled
+            events.append(checkout_session_event(session_id, product_ids, payment_status="unpaid"))
+            events.append(checkout_session_event(session_id, product_ids, "checkout.session.async_payment_succeeded"))
+        else:
+            events.append(checkout_session_event(session_id, product_ids))
+    deliveries = [event for event in events for _ in range(duplicates)]
+    random.shuffle(deliveries)
+
+    limit = asyncio.Semaphore(concurrency)
+    latencies, codes = [], Counter()
+
+    async def send(client: httpx.AsyncClient, event: dict) -> None:
+        async with limit:
+            started = time.perf_counter()
+            codes[await deliver(client, url, event, secret)] += 1
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    async with httpx.AsyncClient(timeout=30) as client:
+        await asyncio.gather(*(send(client, event) for event in deliveries))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    print(f"{len(deliveries)} deliveries of {len(events)} events for {sessions} sessions in {elapsed:.2f}s")
+    print(f"status codes {dict(codes)}")
+    print(f"ack latency median {latencies[len(latencies) // 2]:.1f} ms, p99 {latencies[int(len(latencies) * 0.99)]:.1f} ms")
+    print(f"expected purchases: {sessions * len(product_ids)}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--url", default="http://localhost:8000/stripe/webhook")
+    parser.add_argument("--secret", default=os.environ.get("STRIPE_WEBHOOK_SECRET", ""))
+    parser.add_argument("--sessions", type=int, default=100)
+    parser.add_argument("--duplicates", type=int, default=3, help="deliveries of each event")
+    parser.add_argument("--product-ids", default="1", help="comma separated products bought per session")
+    parser.add_argument("--boleto", action="store_true", help="settle every other session asynchronously")
+    parser.add_argument("--concurrency", type=int, default=32)
+    args = parser.parse_args()
+    if not args.secret:
+        parser.error("set STRIPE_WEBHOOK_SECRET or pass --secret")
+    asyncio.run(run(args.url, args.secret, args.sessions, args.duplicates,
+                    [int(value) for value in args.product_ids.split(",")], args.boleto, args.concurrency))
@@ -0,0 +1,59 @@
+import asyncio
+import types
+from collections.abc import Mapping
+import pytest
+from sqlalchemy.dialects import postgresql
+
+class RecordingSession:
+    """
+    Fake AsyncSession for service tests without a database.
+
+    Every statement is compiled for Postgres, so tests can assert on the
+    SQL (`sql`) and bound parameters (`params`) a service sends. Results
+    are built from `rows` (mappings or objects, or a function of the
+    compiled statement returning them); `scalar` answers `.scalar()`, and
+    `delay` makes queries slow enough for concurrent callers to overlap.
+    """
+    def __init__(self, rows=(), scalar=None, delay=0.0):
+        self.rows = rows
+        self.scalar = scalar
+        self.delay = delay
+        self.statements = []
+        self.queries = 0
+        self.sql = None
+        self.params = None
+        self.committed = False
+
+    async def execute(self, statement):
+        self.queries += 1
+        self.statements.append(statement)
+        compiled = statement.compile(dialect=postgresql.dialect())
+        self.sql, self.params = str(compiled), compiled.params
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        rows = list(self.rows(compiled) if callable(self.rows) else self.rows)
+        mappings = lambda: [row if isinstance(row, Mapping) else vars(row) for row in rows]
+        return types.SimpleNamespace(
+            mappings=mappings,
+            all=lambda: [types.SimpleNamespace(_mapping=m) for m in mappings()],
+            scalars=lambda: types.SimpleNamespace(all=lambda: rows),
+            scalar_one_or_none=lambda: rows[0] if rows else None,
+            scalar=lambda: self.scalar,
+        )
+
+    async def commit(self):
+        self.committed = True
+
+    async def rollback(self):
+        pass
+
+@pytest.fixture
+def make_session():
+    return RecordingSession
+
+@pytest.fixture
+def product():
+    return types.SimpleNamespace(
+        id=1, name="Juniper", price=120.0, description="Shohin juniper",
+        sourceImage="juniper.png", sourceModel="juniper.glb", type="bonsai", sku=None,
+    )
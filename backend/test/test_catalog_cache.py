@@ -0,0 +1,47 @@
+import asyncio
+import pytest
+from app.services import product_service
+from app.services.catalog_cache import MISS, CatalogCache
+
+@pytest.fixture
+def cache(monkeypatch):
+    cache = CatalogCache(ttl=60, max_entries=2)
+    monkeypatch.setattr(product_service, "catalog_cache", cache)
+    return cache
+
+def test_catalog_reads_hit_the_database_once(cache, make_session, product):
+    db = make_session([product])
+    for _ in range(3):
+        products, _ = asyncio.run(product_service.get_all_products_service(db, type=None, name="jun"))
+        product = asyncio.run(product_service.get_product_by_id_service(1, db))
+    assert db.queries == 2
+    assert products[0]["name"] == product.name == "Juniper"
+    assert cache.stats()["hits"] == 4 and cache.stats()["misses"] == 2
+
+def test_invalidation_discards_entries_and_in_flight_results(cache):
+    cache.set("a", 1)
+    version = cache.version
+    cache.invalidate()
+    cache.set("b", 2, version)
+    assert cache.get("a") is MISS and cache.get("b") is MISS
+
+def test_least_recently_used_entry_is_evicted(cache):
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("b") is MISS
+    assert cache.get("a") == 1 and cache.get("c") == 3
+
+def test_etag_follows_content_and_catalog_version(cache):
+    cache.set("a", [1, 2])
+    first = cache.current_etag()
+    cache.get("a")
+    assert cache.current_etag() == first
+
+    cache.invalidate()
+    cache.set("a", [1, 2])
+    assert cache.current_etag() != first
+
+    cache.get("missing")
+    assert cache.current_etag() is None
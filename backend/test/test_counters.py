@@ -0,0 +1,108 @@
+import asyncio
+import os
+import types
+from datetime import datetime, timezone
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
+from app.models.counter import CounterModel, COUNTED_TABLES, counter_trigger_ddl
+from app.models.purchase import PurchaseModel
+from app.models.user import User
+from app.schemas.purchase import StatusTypeEnum
+from app.services import counter_service
+
+DATABASE_URL = os.environ.get("TEST_DATABASE_URL")
+SCHEMA = "counter_tests"
+
+class CountersSession:
+    """Fake session holding the counters table."""
+    def __init__(self, counters):
+        self.counters = counters
+        self.queries = 0
+
+    async def execute(self, query):
+        self.queries += 1
+        return types.SimpleNamespace(all=lambda: list(self.counters.items()))
+
+def test_summary_is_one_query_and_lists_every_type_and_status():
+    db = CountersSession({"users": 3, "products": 2, "products.type.pot": 2, "purchases": 5, "purchases.status.paid": 5})
+    summary = asyncio.run(counter_service.get_admin_summary(db))
+    assert db.queries == 1
+    assert (summary.users, summary.products, summary.purchases) == (3, 2, 5)
+    assert summary.products_by_type == {"bonsai": 0, "pot": 2, "accessory": 0, "tools": 0, "supply": 0}
+    assert summary.purchases_by_status["paid"] == 5 and sum(summary.purchases_by_status.values()) == 5
+
+@pytest.mark.skipif(not DATABASE_URL, reason="TEST_DATABASE_URL is not set")
+def test_triggers_count_every_write_and_reconciliation_repairs_drift():
+    engine = create_async_engine(
+        DATABASE_URL, poolclass=NullPool,
+        connect_args={"server_settings": {"search_path": f"{SCHEMA},public"}},
+    )
+    sessions = async_sessionmaker(engine, expire_on_commit=False)
+
+    def purchase(i, status):
+        return {"product_id": 1, "email": f"c{i}@example.com", "name": "Customer", "address": "Street",
+                "city": "Kyoto", "state": "KY", "cep": 12345678, "status": status,
+                "date": datetime(2026, 1, 1, tzinfo=timezone.utc)}
+
+    async def summary():
+        async with sessions() as db:
+            return await counter_service.get_admin_summary(db)
+
+    async def run():
+        async with engine.begin() as conn:
+            await conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+            await conn.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+            await conn.execute(text(f"CREATE TYPE {SCHEMA}.types_enum AS ENUM ('bonsai', 'pot', 'accessory', 'tools', 'supply')"))
+            await conn.execute(text(f"CREATE TABLE {SCHEMA}.products (id serial PRIMARY KEY, sku varchar UNIQUE, type {SCHEMA}.types_enum)"))
+            for table in (CounterModel.__table__, User.__table__, PurchaseModel.__table__):
+                await conn.run_sync(lambda sync: table.create(
+                    sync.execution_options(schema_translate_map={None: SCHEMA})))
+            for table in COUNTED_TABLES:
+                for statement in counter_trigger_ddl(table):
+                    await conn.execute(text(statement))
+
+        async with sessions() as db:
+            await db.execute(User.__table__.insert(), [
+                {"email": f"u{i}@example.com", "password": "x", "role": "user"} for i in range(3)])
+            await db.execute(text("INSERT INTO products (sku, type) VALUES ('a', 'bonsai'), ('b', 'bonsai'), ('c', 'pot')"))
+            # Bulk import upsert: one new product, one moved from bonsai to tools
+            await db.execute(text(
+                "INSERT INTO products (sku, type) VALUES ('b', 'tools'), ('d', 'pot') "
+                "ON CONFLICT (sku) DO UPDATE SET type = excluded.type"))
+            await db.execute(PurchaseModel.__table__.insert(), [
+                purchase(i, StatusTypeEnum.PAID if i % 2 else StatusTypeEnum.PENDING) for i in range(1000)])
+            await db.commit()
+        async with sessions() as db:
+            await db.execute(text("UPDATE purchases SET status = 'SHIPPED' WHERE id <= 100 AND status = 'PAID'"))
+            await db.execute(text("UPDATE purchases SET city = 'Osaka'"))
+            await db.execute(text("DELETE FROM purchases WHERE id > 900"))
+            await db.execute(text("INSERT INTO purchases (product_id, email, name, address, city, state, cep, status, date) "
+                                  "SELECT 1, 'x', 'x', 'x', 'x', 'x', 1, 'FAILED', now()"))
+            await db.rollback()  # rolled back writes are not counted
+        counted = await summary()
+
+        async with engine.begin() as conn:
+            await conn.execute(text("UPDATE counters SET value = value + 7 WHERE name = 'purchases.status.paid'"))
+            await conn.execute(text("TRUNCATE users"))  # TRUNCATE fires no row or statement DELETE triggers
+        drift = await counter_service.reconcile_counters(sessions)
+        repaired = await summary()
+        again = await counter_service.reconcile_counters(sessions)
+        return counted, drift, repaired, again
+
+    try:
+        counted, drift, repaired, again = asyncio.run(run())
+    finally:
+        async def drop():
+            async with engine.begin() as conn:
+                await conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+            await engine.dispose()
+        asyncio.run(drop())
+
+    assert (counted.users, counted.products, counted.purchases) == (3, 4, 1000)
+    assert counted.products_by_type == {"bonsai": 1, "pot": 2, "accessory": 0, "tools": 1, "supply": 0}
+    assert {k: v for k, v in counted.purchases_by_status.items() if v} == {"paid": 500, "pending": 500}
+    assert drift == {"purchases.status.paid": -7, "users": -3}
+    assert repaired.users == 0 and repaired.purchases_by_status["paid"] == 500
+    assert again == {}
@@ -0,0 +1,74 @@
+import asyncio
+import httpx
+import pytest
+from app.services.gpu_pool_service import GPUPool, NodeStreamingResponse
+
+NODES = {
+    "http://gpu-a:8090": {"active_jobs": 1, "queue_length": 2},
+    "http://gpu-b:8091": {"active_jobs": 1, "queue_length": 0},
+    "http://gpu-c:8092": {"active_jobs": 0, "queue_length": 0},
+}
+
+def fake_nodes(request: httpx.Request) -> httpx.Response:
+    base = f"{request.url.scheme}://{request.url.host}:{request.url.port}"
+    if request.url.path == "/health":
+        return httpx.Response(200, json={"status": "healthy", **NODES[base]})
+    if request.url.path == "/jobs/job-b/files" and base == "http://gpu-b:8091":
+        return httpx.Response(200, json={"job_id": "job-b", "files": {}})
+    return httpx.Response(404)
+
+def make_pool(maintenance=()):
+    return GPUPool(list(NODES), list(maintenance), health_interval=0, transport=httpx.MockTransport(fake_nodes))
+
+def test_routes_to_least_loaded_node():
+    pool = make_pool()
+    node = asyncio.run(pool.acquire_node())
+    assert node.url == "http://gpu-c:8092"
+
+def test_in_flight_jobs_spread_between_probes():
+    pool = make_pool()
+    pool.health_interval = 3600
+
+    async def acquire_six():
+        return [(await pool.acquire_node()).url for _ in range(6)]
+
+    # Probed loads are a=3, b=1, c=0 and stay stale; each reservation adds one
+    urls = asyncio.run(acquire_six())
+    assert urls == ["http://gpu-c:8092", "http://gpu-b:8091", "http://gpu-c:8092",
+                    "http://gpu-b:8091", "http://gpu-c:8092", "http://gpu-a:8090"]
+    assert [node.load for node in pool.nodes.values()] == [4, 3, 3]
+    # A fresh probe reports the routed jobs itself
+    asyncio.run(pool.refresh(force=True))
+    assert [node.reserved for node in pool.nodes.values()] == [0, 0, 0]
+
+def test_slot_is_released_when_the_client_leaves_before_streaming():
+    pool = make_pool()
+    node = asyncio.run(pool.acquire_node())
+
+    async def events():
+        yield b"data: never sent\n\n"
+
+    async def gone(message):
+        raise OSError("client disconnected")
+
+    async def receive():
+        return {"type": "http.disconnect"}
+
+    response = NodeStreamingResponse(events(), pool, node, media_type="text/event-stream")
+    scope = {"type": "http", "asgi": {"spec_version": "2.4"}}
+    with pytest.raises(Exception):
+        asyncio.run(response(scope, receive, gone))
+    assert node.in_flight == 0 and node.reserved == 0
+
+def test_maintenance_node_is_drained():
+    pool = make_pool(maintenance=["http://gpu-c:8092"])
+    node = asyncio.run(pool.acquire_node())
+    assert node.url == "http://gpu-b:8091"
+
+def test_job_lookup_finds_owning_node():
+    pool = make_pool()
+    node = asyncio.run(pool.node_for_job("job-b"))
+    assert node.url == "http://gpu-b:8091"
+    pool.set_maintenance(node.url, True)
+    # Draining nodes still serve the jobs they own
+    assert asyncio.run(pool.node_for_job("job-b")).url == "http://gpu-b:8091"
@@ -0,0 +1,68 @@
+import asyncio
+import io
+import os
+import pytest
+from fastapi import HTTPException
+from PIL import Image
+from app.services import image_service
+from app.services.image_service import DerivativeCache, get_image_derivative, image_version, render_derivative
+from app.schemas.product import ImageFormatEnum
+
+def png_bytes(width=1200, height=800):
+    out = io.BytesIO()
+    Image.new("RGB", (width, height), (40, 120, 60)).save(out, "PNG")
+    return out.getvalue()
+
+@pytest.fixture
+def media(tmp_path, monkeypatch):
+    source_dir = tmp_path / "media"
+    source_dir.mkdir()
+    (source_dir / "juniper.png").write_bytes(png_bytes())
+    monkeypatch.setattr(image_service.settings, "image_source_dir", str(source_dir))
+    monkeypatch.setattr(image_service, "derivative_cache", DerivativeCache(str(tmp_path / "cache"), 10**9))
+    yield source_dir
+    image_service.shutdown_image_workers()
+
+def test_render_scales_down_keeping_aspect_ratio():
+    webp = render_derivative(png_bytes(), 320, "webp", 80)
+    with Image.open(io.BytesIO(webp)) as image:
+        assert image.format == "WEBP" and image.size == (320, 213)
+    with Image.open(io.BytesIO(render_derivative(png_bytes(100, 50), 320, "jpeg", 82))) as image:
+        assert image.size == (100, 50)  # never upscaled
+
+def test_derivative_is_rendered_once_then_served_from_disk(media):
+    async def run():
+        first = await asyncio.gather(*(get_image_derivative("juniper.png", 160, ImageFormatEnum.webp) for _ in range(3)))
+        second = await get_image_derivative("juniper.png", 160, ImageFormatEnum.webp)
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert len({key for key, _ in first}) == 1 and second == first[0]
+    assert image_service.derivative_cache.stats()["hits"] == 1
+
+def test_overwritten_source_gets_a_new_version_and_derivative(media):
+    async def render():
+        version = await image_version("juniper.png")
+        key, data = await get_image_derivative("juniper.png", 160, ImageFormatEnum.png)
+        with Image.open(io.BytesIO(data)) as image:
+            return version, key, image.size
+
+    before = asyncio.run(render())
+    (media / "juniper.png").write_bytes(png_bytes(800, 800))
+    after = asyncio.run(render())
+    assert before[2] == (160, 107) and after[2] == (160, 160)
+    assert before[0] != after[0] and before[1] != after[1]
+
+def test_rejects_unknown_widths_and_paths_outside_media(media):
+    for source, width, code in (("juniper.png", 500, 400), ("../secret.png", 160, 404), ("missing.png", 160, 404)):
+        with pytest.raises(HTTPException) as error:
+            asyncio.run(get_image_derivative(source, width, ImageFormatEnum.webp))
+        assert error.value.status_code == code
+
+def test_least_recently_used_derivatives_are_evicted(tmp_path):
+    cache = DerivativeCache(str(tmp_path), max_bytes=250)
+    for i, key in enumerate(("aa01", "bb02", "cc03")):
+        cache.put(key, b"x" * 100)
+        os.utime(cache._path(key), (i, i))
+    assert cache.get("aa01") is None and cache.get("cc03") == b"x" * 100
+    assert cache.stats()["evictions"] == 1
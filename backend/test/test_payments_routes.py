@@ -5,9 +5,8 @@ client = TestClient(app)
 
 def test_create_checkout_session():
     data = {
-        "product_name": "Test Bonsai",
-        "amount": 42.00,
         "payment_method": "card"
     }
+    # The cart checkout needs a signed-in user
     r = client.post("/create-checkout-session", json=data)
-    assert r.status_code in (200, 400)
\ No newline at end of file
+    assert r.status_code == 401
\ No newline at end of file
@@ -0,0 +1,45 @@
+import asyncio
+from app.services.pipeline_job_service import PipelineJobTracker
+
+REPLAY = [
+    "Job abc started with 12 images",
+    "PROGRESS:1:START:Camera Init",
+    "PROGRESS:1:COMPLETE:Camera Init",
+]
+
+def test_replayed_events_are_applied_once(monkeypatch):
+    saved = []
+
+    async def save(self, **values):
+        saved.append(values)
+
+    monkeypatch.setattr(PipelineJobTracker, "_save", save)
+    tracker = PipelineJobTracker("abc")
+
+    async def feed():
+        for message in REPLAY + REPLAY + ["JOB_COMPLETE:abc"]:
+            await tracker.handle_message(message)
+
+    asyncio.run(feed())
+    assert len(saved) == 4
+    assert tracker.finished
+
+def test_failed_optional_stage_is_recorded_without_failing_the_job(monkeypatch):
+    async def save(self, **values):
+        pass
+
+    monkeypatch.setattr(PipelineJobTracker, "_save", save)
+    tracker = PipelineJobTracker("abc")
+
+    async def feed():
+        for message in REPLAY + [
+            "PROGRESS:8:START:Web Assets",
+            "PROGRESS:8:FAILED:Web Assets failed with exit code 1",
+            "JOB_COMPLETE:abc",
+        ]:
+            await tracker.handle_message(message)
+
+    asyncio.run(feed())
+    assert tracker.stage_timings["8"]["error"] == "Web Assets failed with exit code 1"
+    assert "completed_at" in tracker.stage_timings["8"]
+    assert tracker.finished and tracker.error is None
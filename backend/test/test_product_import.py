@@ -0,0 +1,69 @@
+import asyncio
+import json
+import pytest
+from fastapi import HTTPException
+from app.services import product_import_service
+from app.services.catalog_cache import CatalogCache
+from app.services.product_import_service import import_products_service
+
+ROW = {"name": "Juniper", "price": 120.0, "description": "Shohin", "sourceImage": "j.png",
+       "sourceModel": "j.glb", "type": "bonsai"}
+
+async def body(data: bytes, size=7):
+    for i in range(0, len(data), size):
+        yield data[i:i + size]
+
+def inserted_flags(compiled):
+    # One "created" flag per inserted row, as RETURNING would give
+    return [True] * sum(1 for key in compiled.params if key.startswith("name_"))
+
+@pytest.fixture(autouse=True)
+def cache(monkeypatch):
+    monkeypatch.setattr(product_import_service, "catalog_cache", CatalogCache(ttl=60, max_entries=10))
+
+@pytest.fixture
+def run(make_session):
+    def run(data, **kwargs):
+        db = make_session(inserted_flags)
+        return db, asyncio.run(import_products_service(db, body(data), **kwargs))
+    return run
+
+def test_ndjson_rows_are_validated_and_batched(run):
+    lines = [json.dumps(ROW)] * 5 + ["{not json", json.dumps({**ROW, "price": "free"})]
+    db, result = run("\n".join(lines).encode(), format="ndjson", batch_size=2)
+    assert (result.rows_received, result.inserted, result.failed) == (7, 5, 2)
+    assert [e.row for e in result.errors] == [6, 7]
+    assert len(db.statements) == 3 and db.committed
+
+def test_blank_ndjson_skus_are_dropped_like_csv_ones(run):
+    lines = [json.dumps({**ROW, "sku": ""}), json.dumps({**ROW, "sku": " "}), json.dumps({**ROW, "sku": None})]
+    db, result = run("\n".join(lines).encode(), format="ndjson")
+    assert (result.inserted, result.failed) == (3, 0)
+    params = db.params
+    assert not any(key.startswith("sku") and value is not None for key, value in params.items())
+    # Without a SKU there is nothing to upsert on
+    db, result = run(lines[0].encode(), format="ndjson", upsert=True)
+    assert result.failed == 1 and "sku" in result.errors[0].errors[0]
+
+def test_csv_upsert_requires_sku_and_handles_quoted_newlines(run):
+    data = (
+        "name,price,description,sourceImage,sourceModel,type,sku\r\n"
+        'Juniper,120,"Shohin,\nstyled",j.png,j.glb,bonsai,JUN-1\r\n'
+        "Pot,30,Blue glaze,p.png,p.glb,pot,\r\n"
+    ).encode()
+    db, result = run(data, format="csv", upsert=True)
+    assert (result.rows_received, result.inserted, result.failed) == (2, 1, 1)
+    assert "sku" in result.errors[0].errors[0]
+    sql = db.sql
+    assert "ON CONFLICT (sku) DO UPDATE" in sql
+
+def test_constraint_violation_rolls_back(make_session):
+    from sqlalchemy.exc import IntegrityError
+
+    class FailingSession(make_session):
+        async def execute(self, statement):
+            raise IntegrityError("INSERT", {}, Exception("duplicate key value"))
+
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(import_products_service(FailingSession(), body(json.dumps(ROW).encode()), format="ndjson"))
+    assert error.value.status_code == 409
@@ -0,0 +1,49 @@
+import asyncio
+from app.services.product_loader import ProductLoader
+
+class FakeSession:
+    def __init__(self, ids):
+        self.ids = ids
+        self.requested = []
+        self.active = 0
+
+    async def execute(self, query):
+        # An AsyncSession cannot run two statements at once
+        assert self.active == 0, "session used concurrently"
+        self.active += 1
+        await asyncio.sleep(0.01)
+        self.active -= 1
+        requested = sorted(query.compile().params["id_1"])
+        self.requested.append(requested)
+        rows = [{"id": i, "name": f"Product {i}"} for i in requested if i in self.ids]
+        return type("Result", (), {"mappings": lambda _: rows})()
+
+def test_loads_within_a_request_share_one_query():
+    db = FakeSession(ids={1, 2, 3})
+    loader = ProductLoader(db)
+
+    async def render():
+        strip = await asyncio.gather(loader.load(3), loader.load_many([1, 2, 9]))
+        again = await loader.load(1)
+        return strip, again
+
+    (third, many), again = asyncio.run(render())
+    assert third["id"] == 3
+    assert [row and row["id"] for row in many] == [1, 2, None]
+    assert again["name"] == "Product 1"
+    assert db.requested == [[1, 2, 3, 9]]
+
+def test_loads_during_a_query_wait_for_it_and_share_the_next_one():
+    db = FakeSession(ids={1, 2, 3, 4})
+    loader = ProductLoader(db)
+
+    async def render():
+        first = asyncio.ensure_future(loader.load_many([1, 2]))
+        await asyncio.sleep(0.005)  # the first query is in flight
+        later = await asyncio.gather(loader.load(2), loader.load(3), loader.load(4))
+        return await first, later
+
+    first, later = asyncio.run(render())
+    assert [row["id"] for row in first] == [1, 2]
+    assert [row["id"] for row in later] == [2, 3, 4]
+    assert db.requested == [[1, 2], [3, 4]]
@@ -0,0 +1,37 @@
+import asyncio
+import pytest
+from fastapi import HTTPException
+from app.schemas.product import ProductSortEnum, SortOrderEnum
+from app.services import product_service
+from app.services.catalog_cache import CatalogCache
+from app.services.pagination import decode_cursor, encode_cursor
+
+@pytest.fixture(autouse=True)
+def no_cache(monkeypatch):
+    monkeypatch.setattr(product_service, "catalog_cache", CatalogCache(ttl=0, max_entries=0))
+
+def test_cursor_round_trip_and_rejects_garbage():
+    assert decode_cursor(encode_cursor([19.99, 42]), 2) == [19.99, 42]
+    with pytest.raises(HTTPException) as error:
+        decode_cursor("not-a-cursor", 2)
+    assert error.value.status_code == 400
+
+def test_page_continues_after_cursor_and_selects_only_requested_fields(make_session):
+    db = make_session([
+        {"id": 7, "name": "Elm", "price": 10.0}, {"id": 3, "name": "Fig", "price": 12.0}, {"id": 9, "name": "Oak", "price": 12.0},
+    ])
+    fields = product_service.parse_product_fields("name")
+    products, next_cursor = asyncio.run(product_service.get_all_products_service(
+        db, sort=ProductSortEnum.price, order=SortOrderEnum.desc, limit=2,
+        cursor=encode_cursor([15.0, 1]), fields=fields,
+    ))
+    assert "description" not in db.sql
+    assert "(products.price, products.id) < (" in db.sql
+    assert "ORDER BY products.price DESC, products.id DESC" in db.sql
+    assert products == [{"id": 7, "name": "Elm"}, {"id": 3, "name": "Fig"}]
+    assert decode_cursor(next_cursor, 2) == [12.0, 3]
+
+def test_unknown_field_is_rejected():
+    with pytest.raises(HTTPException) as error:
+        product_service.parse_product_fields("name,password")
+    assert error.value.status_code == 400
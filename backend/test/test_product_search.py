@@ -0,0 +1,78 @@
+import asyncio
+import os
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
+from app.db.database_connection import Base
+from app.models.product import ProductModel
+from app.schemas.product import ProductTypeEnum
+from app.services.catalog_cache import catalog_cache
+from app.services.product_service import search_products_service
+
+DATABASE_URL = os.environ.get("TEST_DATABASE_URL")
+SCHEMA = "search_tests"
+PRODUCTS = [
+    ("Bonsai Juniper", "Hardy evergreen for beginners", ProductTypeEnum.bonsai),
+    ("Bonsai Ficus", "Indoor tree with glossy leaves", ProductTypeEnum.bonsai),
+    ("Glazed Pot", "Blue ceramic pot for a juniper bonsai", ProductTypeEnum.pot),
+    ("Concave Cutter", "Carbon steel branch cutter", ProductTypeEnum.tools),
+]
+
+def test_startup_schema_creates_the_trigram_extension_first():
+    # create_all must install pg_trgm before the gin_trgm_ops index on products
+    assert any("pg_trgm" in str(getattr(listener, "statement", ""))
+               for listener in Base.metadata.dispatch.before_create)
+
+@pytest.mark.skipif(not DATABASE_URL, reason="TEST_DATABASE_URL is not set")
+def test_search_matches_word_prefixes_misspelled_names_and_filters_by_type():
+    engine = create_async_engine(
+        DATABASE_URL, poolclass=NullPool,
+        connect_args={"server_settings": {"search_path": f"{SCHEMA},public"}},
+    )
+    sessions = async_sessionmaker(engine, expire_on_commit=False)
+
+    async def search(q, type=None):
+        catalog_cache.invalidate()
+        async with sessions() as db:
+            return await search_products_service(db, q, type=type)
+
+    async def run():
+        async with engine.begin() as conn:
+            available = (await conn.execute(text(
+                "SELECT count(*) FROM pg_available_extensions WHERE name = 'pg_trgm'"))).scalar()
+            if not available:
+                return None
+            await conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+            await conn.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+            await conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+            await conn.run_sync(lambda sync: ProductModel.__table__.create(
+                sync.execution_options(schema_translate_map={None: SCHEMA})))
+            await conn.execute(ProductModel.__table__.insert(), [
+                {"name": name, "description": description, "type": type, "price": 10.0,
+                 "sourceImage": "image.png", "sourceModel": "model.glb"}
+                for name, description, type in PRODUCTS
+            ])
+        return (await search("bons jun"), await search("Bonsai Junipr"),
+                await search("bons jun", ProductTypeEnum.pot), await search("cutter"))
+
+    try:
+        results = asyncio.run(run())
+    finally:
+        async def drop():
+            async with engine.begin() as conn:
+                await conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+            await engine.dispose()
+        asyncio.run(drop())
+        catalog_cache.invalidate()
+    if results is None:
+        pytest.skip("pg_trgm is not available on this server")
+    prefixes, misspelled, pots, cutter = results
+
+    # Name matches (weighted above description matches) come first
+    assert [item.name for item in prefixes.items] == ["Bonsai Juniper", "Glazed Pot"]
+    assert prefixes.facets == {ProductTypeEnum.bonsai: 1, ProductTypeEnum.pot: 1}
+    assert [item.name for item in misspelled.items] == ["Bonsai Juniper"]
+    assert pots.total == 1 and [item.name for item in pots.items] == ["Glazed Pot"]
+    assert pots.facets == prefixes.facets
+    assert [item.name for item in cutter.items] == ["Concave Cutter"]
@@ -0,0 +1,101 @@
+import asyncio
+import csv
+import gzip
+import io
+import json
+import os
+from datetime import datetime, timedelta, timezone
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
+from app.models.purchase import PurchaseModel
+from app.schemas.purchase import StatusTypeEnum
+from app.services.purchase_export_service import EXPORT_COLUMNS, encode_export, stream_purchases_export
+
+DATABASE_URL = os.environ.get("TEST_DATABASE_URL")
+SCHEMA = "export_tests"
+START = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+def row(i, status=StatusTypeEnum.PAID):
+    return {
+        "id": i, "product_id": 1, "email": f"c{i}@example.com", "name": 'Ana "Bonsai", Jr.',
+        "address": "Street\n2", "complement": None, "city": "Kyoto", "state": "KY", "cep": 12345678,
+        "status": status, "amount": 19.5, "stripe_session_id": None, "date": START + timedelta(minutes=i),
+    }
+
+async def batches(*sizes):
+    start = 0
+    for size in sizes:
+        yield [row(i) for i in range(start, start + size)]
+        start += size
+
+async def one_batch(rows):
+    yield rows
+
+async def collect(chunks):
+    return b"".join([chunk async for chunk in chunks])
+
+def test_csv_export_quotes_fields_and_always_has_a_header():
+    body = asyncio.run(collect(encode_export(batches(2, 1), "csv"))).decode()
+    records = list(csv.DictReader(io.StringIO(body)))
+    assert [r["id"] for r in records] == ["0", "1", "2"]
+    assert records[0]["name"] == 'Ana "Bonsai", Jr.' and records[0]["address"] == "Street\n2"
+    assert records[0]["status"] == "paid" and records[0]["complement"] == ""
+    assert datetime.fromisoformat(records[2]["date"]) == START + timedelta(minutes=2)
+    assert asyncio.run(collect(encode_export(batches(), "csv"))).decode() == ",".join(EXPORT_COLUMNS) + "\n"
+
+def test_csv_export_neutralizes_formulas_in_customer_fields():
+    rows = [dict(row(0), name="=HYPERLINK(\"http://x\")", address="+55 11", city="-Kyoto", complement="@SUM(A1)",
+                 amount=-19.5)]
+    body = asyncio.run(collect(encode_export(one_batch(rows), "csv"))).decode()
+    [record] = list(csv.DictReader(io.StringIO(body)))
+    assert record["name"] == "'=HYPERLINK(\"http://x\")" and record["address"] == "'+55 11"
+    assert record["city"] == "'-Kyoto" and record["complement"] == "'@SUM(A1)"
+    assert record["amount"] == "-19.5" and record["email"] == "c0@example.com"
+    # NDJSON is read by programs, not spreadsheets: values are left as they are
+    line = asyncio.run(collect(encode_export(one_batch(rows), "ndjson")))
+    assert json.loads(line)["name"] == "=HYPERLINK(\"http://x\")"
+
+def test_gzip_ndjson_export_is_one_object_per_line():
+    body = gzip.decompress(asyncio.run(collect(encode_export(batches(500, 500, 7), "ndjson", gzip=True))))
+    lines = body.decode().splitlines()
+    assert len(lines) == 1007
+    assert json.loads(lines[3])["id"] == 3 and json.loads(lines[3])["status"] == "paid"
+
+@pytest.mark.skipif(not DATABASE_URL, reason="TEST_DATABASE_URL is not set")
+def test_export_streams_filtered_rows_from_a_server_side_cursor():
+    engine = create_async_engine(
+        DATABASE_URL, poolclass=NullPool,
+        connect_args={"server_settings": {"search_path": f"{SCHEMA},public"}},
+    )
+    sessions = async_sessionmaker(engine, expire_on_commit=False)
+
+    async def run():
+        async with engine.begin() as conn:
+            await conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+            await conn.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+            await conn.run_sync(lambda sync: PurchaseModel.__table__.create(
+                sync.execution_options(schema_translate_map={None: SCHEMA})))
+            await conn.execute(PurchaseModel.__table__.insert(), [
+                row(i, StatusTypeEnum.SHIPPED if i % 3 else StatusTypeEnum.PAID) for i in range(1, 5001)
+            ])
+        try:
+            everything = await collect(stream_purchases_export(
+                format="ndjson", gzip=True, session_factory=sessions, batch_size=400))
+            shipped = await collect(stream_purchases_export(
+                format="csv", status=StatusTypeEnum.SHIPPED, sort_date="asc",
+                since=START + timedelta(minutes=100), until=START + timedelta(minutes=200),
+                session_factory=sessions, batch_size=7))
+            return everything, shipped
+        finally:
+            async with engine.begin() as conn:
+                await conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+            await engine.dispose()
+
+    everything, shipped = asyncio.run(run())
+    ids = [json.loads(line)["id"] for line in gzip.decompress(everything).splitlines()]
+    assert ids == list(range(5000, 0, -1))
+    records = list(csv.DictReader(io.StringIO(shipped.decode())))
+    assert [int(r["id"]) for r in records] == [i for i in range(100, 200) if i % 3]
+    assert {r["status"] for r in records} == {"shipped"}
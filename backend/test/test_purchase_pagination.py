@@ -0,0 +1,33 @@
+import asyncio
+from datetime import datetime, timezone
+import pytest
+from fastapi import HTTPException
+from app.schemas.purchase import StatusTypeEnum
+from app.services import purchase_service
+from app.services.pagination import decode_cursor, encode_cursor
+
+DATE = datetime(2026, 5, 1, 12, 30, tzinfo=timezone.utc)
+
+def test_page_continues_after_cursor_and_returns_next_cursor(make_session):
+    db = make_session([{"id": 9, "date": DATE}, {"id": 8, "date": DATE}, {"id": 5, "date": DATE}])
+    purchases, next_cursor = asyncio.run(purchase_service.get_filtered_purchases(
+        db, status=StatusTypeEnum.PAID, limit=2, cursor=encode_cursor([DATE.isoformat(), 12]),
+    ))
+    assert "(purchases.date, purchases.id) < (" in db.sql
+    assert "ORDER BY purchases.date DESC, purchases.id DESC" in db.sql and "OFFSET" not in db.sql
+    assert [p["id"] for p in purchases] == [9, 8]
+    assert decode_cursor(next_cursor, 2) == [DATE.isoformat(), 8]
+
+def test_last_page_has_no_cursor_and_ascending_pages_go_forward(make_session):
+    db = make_session([{"id": 1, "date": DATE}])
+    purchases, next_cursor = asyncio.run(purchase_service.get_filtered_purchases(
+        db, sort_date="asc", cursor=encode_cursor([DATE.isoformat(), 0]),
+    ))
+    assert "(purchases.date, purchases.id) > (" in db.sql
+    assert next_cursor is None
+
+@pytest.mark.parametrize("values", [["yesterday", 1], ["2026-05-01T12:30:00", 1], [DATE.isoformat(), "1"]])
+def test_rejects_malformed_cursors(values, make_session):
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(purchase_service.get_filtered_purchases(make_session(), cursor=encode_cursor(values)))
+    assert error.value.status_code == 400
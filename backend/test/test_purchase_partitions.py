@@ -0,0 +1,124 @@
+import asyncio
+import os
+from datetime import datetime, timezone
+import pytest
+from sqlalchemy import func, select, text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
+from app.core.config import settings
+from app.models.counter import CounterModel, counter_trigger_ddl
+from app.models.purchase import PurchaseModel
+from app.schemas.purchase import StatusTypeEnum
+from app.services.purchase_partition_service import add_months, maintain_purchase_partitions, month_start, partition_name
+
+DATABASE_URL = os.environ.get("TEST_DATABASE_URL")
+SCHEMA = "partition_tests"
+ARCHIVE = "partition_tests_archive"
+
+def test_months_roll_over_years_in_utc():
+    month = month_start(datetime(2026, 1, 1, 1, 30, tzinfo=timezone.utc).astimezone(timezone.utc))
+    assert month == datetime(2026, 1, 1, tzinfo=timezone.utc)
+    assert add_months(month, -1) == datetime(2025, 12, 1, tzinfo=timezone.utc)
+    assert add_months(month, 13) == datetime(2027, 2, 1, tzinfo=timezone.utc)
+    assert partition_name(add_months(month, -1)) == "purchases_y2025m12"
+
+@pytest.mark.skipif(not DATABASE_URL, reason="TEST_DATABASE_URL is not set")
+def test_maintenance_creates_months_ahead_splits_the_default_partition_and_archives_old_months(monkeypatch):
+    engine = create_async_engine(
+        DATABASE_URL, poolclass=NullPool,
+        connect_args={"server_settings": {"search_path": f"{SCHEMA},public"}},
+    )
+    sessions = async_sessionmaker(engine, expire_on_commit=False)
+
+    def purchase(month, day, status=StatusTypeEnum.PAID):
+        return {"product_id": 1, "email": "c@example.com", "name": "Customer", "address": "Street",
+                "city": "City", "state": "SP", "cep": 12345678, "status": status,
+                "date": datetime(month.year, month.month, day, 12, tzinfo=timezone.utc)}
+
+    async def maintain(now, retention_months, move_stray_rows=False):
+        return await maintain_purchase_partitions(
+            sessions, months_ahead=2, retention_months=retention_months, archive_schema=ARCHIVE,
+            archive_tablespace="", move_stray_rows=move_stray_rows, now=now)
+
+    async def rows_by_partition():
+        async with sessions() as db:
+            return dict((await db.execute(text(
+                "SELECT tableoid::regclass::text, count(*) FROM purchases GROUP BY 1"))).all())
+
+    async def run():
+        async with engine.begin() as conn:
+            for schema in (SCHEMA, ARCHIVE):
+                await conn.execute(text(f"DROP SCHEMA IF EXISTS {schema} CASCADE"))
+            await conn.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+            for table in (CounterModel.__table__, PurchaseModel.__table__):
+                await conn.run_sync(lambda sync: table.create(
+                    sync.execution_options(schema_translate_map={None: SCHEMA})))
+            for statement in counter_trigger_ddl("purchases"):
+                await conn.execute(text(statement))
+            # History imported before any monthly partition exists
+            await conn.execute(PurchaseModel.__table__.insert(), [
+                purchase(datetime(2025, 11, 1), 3), purchase(datetime(2025, 11, 1), 30, StatusTypeEnum.REFUNDED),
+                purchase(datetime(2026, 1, 1), 1), purchase(datetime(2026, 4, 1), 15),
+            ])
+
+        # The periodic job leaves the default partition alone
+        periodic = await maintain(datetime(2026, 4, 15, tzinfo=timezone.utc), 0)
+        after_periodic = await rows_by_partition()
+        # Runs are skipped while another process maintains the partitions
+        async with engine.connect() as other:
+            await other.execute(text("SELECT pg_advisory_xact_lock(hashtext('purchase_partitions'))"))
+            busy = await maintain(datetime(2026, 4, 15, tzinfo=timezone.utc), 0, move_stray_rows=True)
+            await other.rollback()
+        first = await maintain(datetime(2026, 4, 15, tzinfo=timezone.utc), 0, move_stray_rows=True)
+        after_first = await rows_by_partition()
+        again = await maintain(datetime(2026, 4, 15, tzinfo=timezone.utc), 0, move_stray_rows=True)
+        # A purchase dated past the partitions made so far lands in the default partition
+        async with sessions() as db:
+            await db.execute(PurchaseModel.__table__.insert(), [purchase(datetime(2026, 8, 1), 2)])
+            await db.commit()
+        later = await maintain(datetime(2026, 5, 10, tzinfo=timezone.utc), 3)
+        moved = await maintain(datetime(2026, 5, 10, tzinfo=timezone.utc), 3, move_stray_rows=True)
+        after_later = await rows_by_partition()
+        async with sessions() as db:
+            archived = (await db.execute(text(f"SELECT count(*) FROM {ARCHIVE}.purchases_y2025m11"))).scalar()
+            total = (await db.execute(select(func.count()).select_from(PurchaseModel))).scalar()
+            counters = dict((await db.execute(select(CounterModel.name, CounterModel.value))).all())
+        # A run gives up instead of waiting behind a long transaction on purchases
+        monkeypatch.setattr(settings, "purchase_partition_lock_timeout", "100ms")
+        async with engine.connect() as other:
+            await other.execute(text("LOCK TABLE purchases IN ACCESS SHARE MODE"))
+            try:
+                await maintain(datetime(2026, 9, 1, tzinfo=timezone.utc), 0)
+                timed_out = False
+            except DBAPIError as e:
+                timed_out = "lock timeout" in str(e)
+            await other.rollback()
+        results = dict(periodic=periodic, busy=busy, first=first, again=again, later=later, moved=moved)
+        return results, after_periodic, after_first, after_later, archived, total, counters, timed_out
+
+    try:
+        results, after_periodic, after_first, after_later, archived, total, counters, timed_out = asyncio.run(run())
+    finally:
+        async def drop():
+            async with engine.begin() as conn:
+                for schema in (SCHEMA, ARCHIVE):
+                    await conn.execute(text(f"DROP SCHEMA IF EXISTS {schema} CASCADE"))
+            await engine.dispose()
+        asyncio.run(drop())
+
+    assert results["periodic"].created == ["purchases_y2026m05", "purchases_y2026m06"]
+    assert after_periodic == {"purchases_default": 4}
+    assert results["busy"].created == [] and results["busy"].archived == []
+    assert results["first"].created == ["purchases_y2025m11", "purchases_y2026m01", "purchases_y2026m04"]
+    assert after_first == {"purchases_y2025m11": 2, "purchases_y2026m01": 1, "purchases_y2026m04": 1}
+    assert results["again"].created == [] and results["again"].archived == []
+    assert results["later"].created == ["purchases_y2026m07"]
+    assert results["later"].archived == ["purchases_y2025m11", "purchases_y2026m01"]
+    assert results["moved"].created == ["purchases_y2026m08"] and results["moved"].archived == []
+    assert after_later == {"purchases_y2026m04": 1, "purchases_y2026m08": 1}
+    assert archived == 2 and total == 2
+    # Counters follow the archived rows out of purchases
+    assert counters["purchases"] == total == 2
+    assert counters["purchases.status.paid"] == 2 and counters["purchases.status.refunded"] == 0
+    assert timed_out
@@ -0,0 +1,260 @@
+"""
+Query-plan regression tests for the purchases queries.
+
+Seeds a large purchases table in a scratch schema of TEST_DATABASE_URL
+(created from the model, so it carries the model's indexes, and split into
+monthly partitions by the partition maintenance) and asserts, through
+EXPLAIN, that the queries the services actually issue use an index instead
+of a sequential scan and only read the partitions they need. Skipped when
+TEST_DATABASE_URL is not set.
+"""
+import asyncio
+import json
+import os
+from datetime import datetime, timedelta, timezone
+import pytest
+from sqlalchemy import desc, select, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.pool import NullPool
+from sqlalchemy.sql.expression import ClauseElement, Executable
+from app.models.purchase import PurchaseModel
+from app.schemas.purchase import StatusTypeEnum
+from app.services import purchase_service
+from app.services.pagination import encode_cursor
+from app.services.purchase_export_service import export_query
+from app.services.purchase_partition_service import PARTITION_NAME, maintain_purchase_partitions
+
+DATABASE_URL = os.environ.get("TEST_DATABASE_URL")
+SCHEMA = "plan_tests"
+ROWS = 200_000
+
+pytestmark = pytest.mark.skipif(not DATABASE_URL, reason="TEST_DATABASE_URL is not set")
+
+SEED_SQL = f"""
+INSERT INTO {SCHEMA}.purchases (id, product_id, email, name, address, complement, city, state, cep, status, date)
+SELECT
+    i,
+    1 + i % 20000,
+    'customer' || (i % 50000) || '@example.com',
+    'Customer ' || i,
+    'Street ' || i,
+    NULL,
+    'Tokyo',
+    'TK',
+    12345678,
+    (ARRAY['PENDING','PAID','PROCESSING','SHIPPED','DELIVERED','CANCELED','REFUNDED','FAILED'])[1 + i % 8]::{SCHEMA}.status_enum,
+    now() - i * interval '1 minute'
+FROM generate_series(1, :rows) AS i
+"""
+
+
+class Explain(Executable, ClauseElement):
+    """EXPLAIN (FORMAT JSON) of a statement, keeping its bound parameters."""
+
+    inherit_cache = False
+
+    def __init__(self, statement):
+        self.statement = statement
+
+
+@compiles(Explain)
+def _compile_explain(element, compiler, **kw):
+    return "EXPLAIN (FORMAT JSON) " + compiler.process(element.statement, **kw)
+
+
+class RecordingSession(AsyncSession):
+    """Session that keeps every statement the service executes."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.statements = []
+
+    async def execute(self, statement, *args, **kwargs):
+        self.statements.append(statement)
+        return await super().execute(statement, *args, **kwargs)
+
+
+def engine():
+    # Unqualified "purchases" resolves to the scratch table
+    return create_async_engine(
+        DATABASE_URL,
+        poolclass=NullPool,
+        connect_args={"server_settings": {"search_path": f"{SCHEMA},public"}},
+    )
+
+
+@pytest.fixture(scope="module", autouse=True)
+def seeded():
+    async def setup():
+        scratch = engine()
+        async with scratch.begin() as conn:
+            await conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+            await conn.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+            await conn.run_sync(lambda sync: PurchaseModel.__table__.create(
+                sync.execution_options(schema_translate_map={None: SCHEMA})))
+            await conn.execute(text(SEED_SQL), {"rows": ROWS})
+            # One product bought exactly once, as get_purchase_by_product_id expects
+            await conn.execute(text(
+                f"INSERT INTO {SCHEMA}.purchases (id, product_id, email, name, address, city, state, cep, status, date)"
+                f" SELECT {ROWS + 1}, 999999, email, name, address, city, state, cep, status, date"
+                f" FROM {SCHEMA}.purchases WHERE id = 1"))
+        # The seeded rows land in the default partition; move them to monthly ones
+        await maintain_purchase_partitions(
+            async_sessionmaker(scratch), months_ahead=1, retention_months=0, move_stray_rows=True)
+        async with scratch.connect() as conn:
+            await conn.execution_options(isolation_level="AUTOCOMMIT")
+            await conn.execute(text(f"ANALYZE {SCHEMA}.purchases"))
+        await scratch.dispose()
+
+    async def teardown():
+        scratch = engine()
+        async with scratch.begin() as conn:
+            await conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        await scratch.dispose()
+
+    asyncio.run(setup())
+    yield
+    asyncio.run(teardown())
+
+
+def plan_nodes(plan: dict):
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from plan_nodes(child)
+
+
+def plans_of(call) -> list:
+    """
+    Runs a service call and returns the (node type, index, relation) scans of
+    its queries' plans. Partition indexes are reported under the name of the
+    purchases index they belong to; empty partitions (months ahead), which
+    are rightly read sequentially, are left out.
+    """
+    async def run():
+        scratch = engine()
+        try:
+            async with RecordingSession(scratch) as session:
+                await call(session)
+                statements = list(session.statements)
+                parents = dict((await session.execute(text(
+                    "SELECT child.relname, parent.relname FROM pg_inherits "
+                    "JOIN pg_class AS child ON child.oid = pg_inherits.inhrelid "
+                    "JOIN pg_class AS parent ON parent.oid = pg_inherits.inhparent "
+                    "WHERE child.relkind = 'i'"
+                ))).all())
+                empty = set((await session.execute(text(
+                    "SELECT relname FROM pg_class WHERE relnamespace = current_schema()::regnamespace "
+                    "AND relkind = 'r' AND reltuples = 0"
+                ))).scalars().all())
+                scans = []
+                for statement in statements:
+                    document = (await session.execute(Explain(statement))).scalar()
+                    document = json.loads(document) if isinstance(document, str) else document
+                    for node in plan_nodes(document[0]["Plan"]):
+                        if node.get("Relation Name") in empty:
+                            continue
+                        if node.get("Relation Name", "").startswith("purchases") or "Index Name" in node:
+                            index = node.get("Index Name")
+                            scans.append((node["Node Type"], parents.get(index, index), node.get("Relation Name")))
+                return scans
+        finally:
+            await scratch.dispose()
+
+    return asyncio.run(run())
+
+
+def scans_of(call) -> list:
+    """Runs a service call and returns the (node type, index) scans of its queries' plans."""
+    return [(node_type, index) for node_type, index, _ in plans_of(call)]
+
+
+def partitions_read(call) -> set:
+    """Monthly partitions (as (year, month)) and default partition the queries of a call read."""
+    partitions = set()
+    for _, _, relation in plans_of(call):
+        match = PARTITION_NAME.match(relation or "")
+        partitions.add((int(match[1]), int(match[2])) if match else relation)
+    return partitions
+
+
+def assert_uses_index(scans: list, *indexes: str) -> None:
+    assert ("Seq Scan", None) not in scans, scans
+    assert any(name in indexes for _, name in scans), scans
+
+
+def test_filtered_purchases_by_status_use_status_date_index():
+    scans = scans_of(lambda db: purchase_service.get_filtered_purchases(db, status=StatusTypeEnum.PAID))
+    assert_uses_index(scans, "ix_purchases_status_date_id")
+
+
+def test_purchases_by_date_use_date_index():
+    for sort_date in ("asc", "desc"):
+        scans = scans_of(lambda db: purchase_service.get_filtered_purchases(db, sort_date=sort_date))
+        assert_uses_index(scans, "ix_purchases_date_id")
+
+
+def test_deep_keyset_pages_use_index_range_scans():
+    # A cursor from the middle of the table, as reached after ~1,000 pages
+    cursor = encode_cursor([(datetime.now(timezone.utc) - timedelta(minutes=ROWS // 2)).isoformat(), ROWS // 2])
+    for status in (None, StatusTypeEnum.PAID):
+        for sort_date in ("asc", "desc"):
+            scans = scans_of(lambda db: purchase_service.get_filtered_purchases(
+                db, status=status, sort_date=sort_date, cursor=cursor))
+            # With a status, reading the date index and filtering may be cheaper for a page
+            assert_uses_index(scans, "ix_purchases_date_id", *(["ix_purchases_status_date_id"] if status else []))
+
+
+def test_keyset_pages_cover_every_row_once_in_both_directions():
+    async def walk(sort_date):
+        scratch = engine()
+        try:
+            async with AsyncSession(scratch) as db:
+                ids, cursor = [], None
+                while True:
+                    page, cursor = await purchase_service.get_filtered_purchases(
+                        db, status=StatusTypeEnum.REFUNDED, sort_date=sort_date, limit=997, cursor=cursor)
+                    ids += [row["id"] for row in page]
+                    if cursor is None:
+                        return ids
+        finally:
+            await scratch.dispose()
+
+    newest_first = asyncio.run(walk("desc"))
+    assert newest_first == sorted(i for i in range(1, ROWS + 1) if i % 8 == 6)
+    assert asyncio.run(walk("asc")) == newest_first[::-1]
+
+
+def test_purchase_by_product_uses_product_index():
+    scans = scans_of(lambda db: purchase_service.get_purchase_by_product_id(db, 999999))
+    assert_uses_index(scans, "ix_purchases_product_id_date")
+
+
+def test_customer_lookup_uses_email_index():
+    query = (
+        select(PurchaseModel)
+        .where(PurchaseModel.email == "customer42@example.com")
+        .order_by(desc(PurchaseModel.date))
+    )
+    scans = scans_of(lambda db: db.execute(query))
+    assert_uses_index(scans, "ix_purchases_email_date")
+
+
+def test_recent_window_reads_only_the_recent_partitions():
+    since = datetime.now(timezone.utc) - timedelta(days=3)
+    partitions = partitions_read(lambda db: db.execute(export_query(since=since).limit(10)))
+    months = {p for p in partitions if isinstance(p, tuple)}
+    assert months and all(month >= (since.year, since.month) for month in months), partitions
+    assert len(months) <= 3  # since's month, the current one and the one created ahead
+
+
+def test_keyset_pages_skip_partitions_beyond_the_cursor():
+    position = datetime.now(timezone.utc) - timedelta(minutes=ROWS // 2)
+    cursor = encode_cursor([position.isoformat(), ROWS // 2])
+    older = partitions_read(lambda db: purchase_service.get_filtered_purchases(db, sort_date="desc", cursor=cursor))
+    newer = partitions_read(lambda db: purchase_service.get_filtered_purchases(db, sort_date="asc", cursor=cursor))
+    cursor_month = (position.year, position.month)
+    now = datetime.now(timezone.utc)
+    assert (now.year, now.month) not in older and cursor_month in older
+    assert all(month <= cursor_month for month in older if isinstance(month, tuple)), older
+    assert all(month >= cursor_month for month in newer if isinstance(month, tuple)), newer
@@ -0,0 +1,138 @@
+import asyncio
+import os
+import types
+from datetime import datetime, timedelta, timezone
+import pytest
+from fastapi import HTTPException
+from pydantic import ValidationError
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
+from app.models.counter import CounterModel, counter_trigger_ddl
+from app.models.purchase import PurchaseModel
+from app.models.sales_rollup import SalesRollupModel
+from app.schemas.purchase import ALLOWED_STATUS_TRANSITIONS, BulkStatusUpdate, PurchaseStatusFilter, StatusTypeEnum
+from app.services import analytics_service, purchase_service
+
+DATABASE_URL = os.environ.get("TEST_DATABASE_URL")
+SCHEMA = "status_tests"
+DAY = datetime(2026, 4, 1, tzinfo=timezone.utc)
+
+def test_bulk_update_takes_either_ids_or_a_filter():
+    assert BulkStatusUpdate(status="shipped", ids=[1, 2]).ids == [1, 2]
+    assert BulkStatusUpdate(status="shipped", filter={"status": "paid"}).filter.status == StatusTypeEnum.PAID
+    for body in ({"status": "shipped"}, {"status": "shipped", "ids": [1], "filter": {}}, {"status": "shipped", "ids": []}):
+        with pytest.raises(ValidationError):
+            BulkStatusUpdate(**body)
+
+def test_every_status_has_transitions_nothing_returns_to_pending_and_endings_are_final():
+    assert set(ALLOWED_STATUS_TRANSITIONS) == set(StatusTypeEnum)
+    assert all(StatusTypeEnum.PENDING not in targets and old not in targets
+               for old, targets in ALLOWED_STATUS_TRANSITIONS.items())
+    # Cancellations, refunds and failures end an order
+    assert all(not ALLOWED_STATUS_TRANSITIONS[end]
+               for end in (StatusTypeEnum.CANCELED, StatusTypeEnum.REFUNDED, StatusTypeEnum.FAILED))
+
+def test_single_update_rejects_disallowed_transitions_and_ignores_the_same_status(make_session):
+    purchase = types.SimpleNamespace(id=1, status=StatusTypeEnum.DELIVERED)
+    db = make_session([purchase])
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(purchase_service.update_purchase_status(db, 1, StatusTypeEnum.PAID))
+    assert error.value.status_code == 409
+    assert asyncio.run(purchase_service.update_purchase_status(db, 1, StatusTypeEnum.DELIVERED)) is purchase
+    # Only the two lookups ran: no rollup change, nothing committed
+    assert purchase.status == StatusTypeEnum.DELIVERED and db.queries == 2 and not db.committed
+
+@pytest.mark.skipif(not DATABASE_URL, reason="TEST_DATABASE_URL is not set")
+def test_bulk_transitions_report_each_purchase_and_keep_rollups_and_counters_consistent():
+    engine = create_async_engine(
+        DATABASE_URL, poolclass=NullPool,
+        connect_args={"server_settings": {"search_path": f"{SCHEMA},public"}},
+    )
+    sessions = async_sessionmaker(engine, expire_on_commit=False)
+
+    def purchase(i, status, day):
+        return {"product_id": 1 + i % 2, "email": f"c{i}@example.com", "name": "Customer", "address": "Street",
+                "city": "City", "state": "SP" if i % 3 else "RJ", "cep": 12345678, "status": status,
+                "amount": 10.0 * i, "date": DAY + timedelta(days=day, hours=i)}
+
+    async def bulk(status, **selection):
+        async with sessions() as db:
+            return await purchase_service.bulk_update_purchase_status(db, status, **selection)
+
+    async def run():
+        async with engine.begin() as conn:
+            await conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+            await conn.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+            for table in (CounterModel.__table__, PurchaseModel.__table__, SalesRollupModel.__table__):
+                await conn.run_sync(lambda sync: table.create(
+                    sync.execution_options(schema_translate_map={None: SCHEMA})))
+            for statement in counter_trigger_ddl("purchases"):
+                await conn.execute(text(statement))
+            # 1-10 paid on day 0, 11-20 paid on day 1, 21-25 pending, 26-30 delivered
+            await conn.execute(PurchaseModel.__table__.insert(), [
+                purchase(i, status, day) for i, status, day in
+                [(i, StatusTypeEnum.PAID, 0) for i in range(1, 11)]
+                + [(i, StatusTypeEnum.PAID, 1) for i in range(11, 21)]
+                + [(i, StatusTypeEnum.PENDING, 2) for i in range(21, 26)]
+                + [(i, StatusTypeEnum.DELIVERED, 0) for i in range(26, 31)]
+            ])
+        async with sessions() as db:
+            await analytics_service.rebuild_sales_rollups(db)
+            await db.commit()
+
+        day_one = await bulk(StatusTypeEnum.PROCESSING, filters=PurchaseStatusFilter(
+            status=StatusTypeEnum.PAID, since=DAY + timedelta(days=1), until=DAY + timedelta(days=2)))
+        # Delivered purchases of day 0 cannot ship again and are not selected
+        first_page = await bulk(StatusTypeEnum.SHIPPED, filters=PurchaseStatusFilter(until=DAY + timedelta(days=1)), limit=4)
+        by_ids = await bulk(StatusTypeEnum.SHIPPED, ids=[12, 5, 999, 26, 21, 1])
+        # Overlapping requests in opposite orders: no deadlock, each purchase moves once
+        racing = await asyncio.gather(
+            bulk(StatusTypeEnum.PAID, ids=list(range(21, 26))),
+            bulk(StatusTypeEnum.FAILED, ids=list(range(25, 20, -1))),
+        )
+
+        async with sessions() as db:
+            statuses = dict((await db.execute(select(PurchaseModel.id, PurchaseModel.status))).all())
+            counters = dict((await db.execute(select(CounterModel.name, CounterModel.value))).all())
+            columns = [SalesRollupModel.grain, SalesRollupModel.dimension, SalesRollupModel.bucket,
+                       SalesRollupModel.key, SalesRollupModel.status, SalesRollupModel.orders, SalesRollupModel.revenue]
+            query = select(*columns).where(SalesRollupModel.orders != 0).order_by(*columns)
+            incremental = (await db.execute(query)).all()
+            await analytics_service.rebuild_sales_rollups(db)
+            rebuilt = (await db.execute(query)).all()
+            await db.rollback()
+        return day_one, first_page, by_ids, racing, statuses, counters, incremental, rebuilt
+
+    try:
+        day_one, first_page, by_ids, racing, statuses, counters, incremental, rebuilt = asyncio.run(run())
+    finally:
+        async def drop():
+            async with engine.begin() as conn:
+                await conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+            await engine.dispose()
+        asyncio.run(drop())
+
+    assert day_one.updated == 10 and not day_one.has_more
+    assert [r.id for r in day_one.results] == list(range(11, 21))
+    assert {(r.outcome.value, r.previous_status) for r in day_one.results} == {("updated", StatusTypeEnum.PAID)}
+    assert first_page.updated == 4 and first_page.has_more and [r.id for r in first_page.results] == [1, 2, 3, 4]
+
+    assert [(r.id, r.outcome.value, r.previous_status) for r in by_ids.results] == [
+        (12, "updated", StatusTypeEnum.PROCESSING),
+        (5, "updated", StatusTypeEnum.PAID),
+        (999, "not_found", None),
+        (26, "invalid_transition", StatusTypeEnum.DELIVERED),
+        (21, "invalid_transition", StatusTypeEnum.PENDING),
+        (1, "unchanged", StatusTypeEnum.SHIPPED),
+    ]
+    assert racing[0].updated + racing[1].updated == 5
+    assert all(r.outcome.value in ("updated", "invalid_transition") for result in racing for r in result.results)
+    assert {statuses[i] for i in range(21, 26)} <= {StatusTypeEnum.PAID, StatusTypeEnum.FAILED}
+
+    assert incremental == rebuilt
+    expected = {}
+    for status in statuses.values():
+        expected[f"purchases.status.{status.value}"] = expected.get(f"purchases.status.{status.value}", 0) + 1
+    assert {name: value for name, value in counters.items() if name != "purchases" and value} == expected
+    assert counters["purchases"] == 30
@@ -0,0 +1,111 @@
+import asyncio
+import os
+import types
+from datetime import date, datetime, timezone
+from decimal import Decimal
+import pytest
+from sqlalchemy import select, text, update
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.pool import NullPool
+from app.models.purchase import PurchaseModel
+from app.models.sales_rollup import SalesRollupModel
+from app.schemas.analytics import SalesBreakdownEnum, SalesGrainEnum
+from app.schemas.purchase import PurchaseCreate, StatusTypeEnum
+from app.services import analytics_service, purchase_service
+
+DATABASE_URL = os.environ.get("TEST_DATABASE_URL")
+SCHEMA = "rollup_tests"
+
+def purchase(**values):
+    defaults = dict(product_id=7, state="SP", amount=100.0, date=datetime(2026, 3, 4, 23, 30, tzinfo=timezone.utc))
+    return types.SimpleNamespace(**{**defaults, **values})
+
+def test_deltas_cover_every_grain_and_dimension_with_calendar_buckets():
+    deltas = analytics_service.sales_deltas([(purchase(), StatusTypeEnum.PAID, 1)])
+    assert len(deltas) == 9
+    buckets = {(d["grain"], d["bucket"]) for d in deltas}
+    assert buckets == {("day", date(2026, 3, 4)), ("week", date(2026, 3, 2)), ("month", date(2026, 3, 1))}
+    assert {(d["dimension"], d["key"]) for d in deltas} == {("all", ""), ("product", "7"), ("state", "SP")}
+    assert all(d["orders"] == 1 and d["revenue"] == 100.0 for d in deltas)
+
+def test_status_change_moves_counts_and_opposite_changes_cancel_out():
+    moved = analytics_service.sales_deltas([(purchase(), StatusTypeEnum.PAID, -1), (purchase(), StatusTypeEnum.REFUNDED, 1)])
+    assert {d["status"] for d in moved if d["orders"] < 0} == {StatusTypeEnum.PAID}
+    assert sum(d["revenue"] for d in moved) == 0
+    assert analytics_service.sales_deltas([(purchase(), StatusTypeEnum.PAID, 1), (purchase(), StatusTypeEnum.PAID, -1)]) == []
+
+def test_revenue_is_summed_exactly_to_the_cent():
+    deltas = analytics_service.sales_deltas([(purchase(amount=0.1), StatusTypeEnum.PAID, 1)] * 3)
+    assert {d["revenue"] for d in deltas} == {Decimal("0.30")}
+
+@pytest.mark.skipif(not DATABASE_URL, reason="TEST_DATABASE_URL is not set")
+def test_incremental_rollups_match_a_rebuild_from_purchases():
+    engine = create_async_engine(
+        DATABASE_URL, poolclass=NullPool,
+        connect_args={"server_settings": {"search_path": f"{SCHEMA},public"}},
+    )
+
+    async def scenario():
+        async with engine.begin() as conn:
+            await conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+            await conn.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+            await conn.execute(text(f"CREATE TYPE {SCHEMA}.types_enum AS ENUM ('bonsai', 'pot', 'accessory', 'tools', 'supply')"))
+            await conn.execute(text(f"CREATE TABLE {SCHEMA}.products (id integer PRIMARY KEY, price float, type {SCHEMA}.types_enum)"))
+            await conn.execute(text(f"INSERT INTO {SCHEMA}.products VALUES (1, 250.0, 'bonsai'), (2, 40.0, 'pot')"))
+            for table in (PurchaseModel.__table__, SalesRollupModel.__table__):
+                await conn.run_sync(lambda sync: table.create(
+                    sync.execution_options(schema_translate_map={None: SCHEMA}), checkfirst=True))
+
+        async with AsyncSession(engine, expire_on_commit=False) as db:
+            created = []
+            for i, (product_id, state, day) in enumerate([(1, "SP", 2), (2, "SP", 2), (1, "RJ", 9), (2, "RJ", 16), (1, "SP", 16)]):
+                created.append(await purchase_service.create_purchase(db, PurchaseCreate(
+                    product_id=product_id, email=f"c{i}@example.com", name="Customer", address="Street",
+                    city="City", state=state, cep=12345678, date=datetime(2026, 3, day, 12, tzinfo=timezone.utc),
+                )))
+            await purchase_service.update_purchase_status(db, created[1].id, StatusTypeEnum.REFUNDED)
+            await purchase_service.update_purchase_status(db, created[3].id, StatusTypeEnum.SHIPPED)
+
+            month = await analytics_service.get_sales_report(db, SalesGrainEnum.month, date(2026, 3, 1), date(2026, 3, 31))
+            by_type = await analytics_service.get_sales_report(
+                db, SalesGrainEnum.month, date(2026, 3, 1), date(2026, 3, 31), by=SalesBreakdownEnum.type)
+            by_status = await analytics_service.get_sales_report(
+                db, SalesGrainEnum.week, date(2026, 3, 1), date(2026, 3, 31), by=SalesBreakdownEnum.status)
+
+            columns = [SalesRollupModel.grain, SalesRollupModel.dimension, SalesRollupModel.bucket,
+                       SalesRollupModel.key, SalesRollupModel.status, SalesRollupModel.orders, SalesRollupModel.revenue]
+            query = select(*columns).where(SalesRollupModel.orders != 0).order_by(*columns)
+            incremental = (await db.execute(query)).all()
+            # Rollups before `since` (e.g. of archived purchases) are left alone
+            await db.execute(update(SalesRollupModel).values(revenue=SalesRollupModel.revenue + 1))
+            await analytics_service.rebuild_sales_rollups(db, since=date(2026, 3, 9))
+            partial = {}
+            for row in (await db.execute(query)).all():
+                if row.dimension == "all":
+                    partial[row.grain, row.bucket] = partial.get((row.grain, row.bucket), 0) + row.revenue
+            await analytics_service.rebuild_sales_rollups(db)
+            rebuilt = (await db.execute(query)).all()
+            await db.rollback()
+            return month, by_type, by_status, incremental, partial, rebuilt
+
+    try:
+        month, by_type, by_status, incremental, partial, rebuilt = asyncio.run(scenario())
+    finally:
+        async def drop():
+            async with engine.begin() as conn:
+                await conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+            await engine.dispose()
+        asyncio.run(drop())
+
+    assert incremental == rebuilt
+    assert all(isinstance(row.revenue, Decimal) for row in rebuilt)
+    # Every status, +1 per row left alone: two statuses on March 2nd, three in March
+    assert partial == {
+        ("day", date(2026, 3, 2)): 292, ("day", date(2026, 3, 9)): 250, ("day", date(2026, 3, 16)): 290,
+        ("week", date(2026, 3, 2)): 292, ("week", date(2026, 3, 9)): 250, ("week", date(2026, 3, 16)): 290,
+        ("month", date(2026, 3, 1)): 833,
+    }
+    assert (month.total_orders, month.total_revenue) == (4, 790.0)
+    assert [(p.key, p.orders, p.revenue) for p in by_type.points] == [("bonsai", 3, 750.0), ("pot", 1, 40.0)]
+    week_of_2nd = [(p.key, p.orders) for p in by_status.points if p.bucket == date(2026, 3, 2)]
+    assert week_of_2nd == [("paid", 1), ("refunded", 1)]
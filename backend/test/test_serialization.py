@@ -0,0 +1,17 @@
+import json
+from datetime import datetime, timezone
+from app.core.serialization import product_rows, purchase_rows
+from app.schemas.product import ProductTypeEnum
+from app.schemas.purchase import Purchase, StatusTypeEnum
+
+def test_purchase_rows_match_model_serialization():
+    row = {
+        "id": 1, "product_id": 2, "email": "a@b.c", "name": "Aiko", "address": "Street 1",
+        "complement": None, "city": "Tokyo", "state": "TK", "cep": 12345678,
+        "status": StatusTypeEnum.PAID, "amount": 120.0, "stripe_session_id": None, "date": datetime(2026, 1, 1, tzinfo=timezone.utc),
+    }
+    assert json.loads(purchase_rows.dump_json([row])) == [json.loads(Purchase(**row).model_dump_json())]
+
+def test_projected_product_rows_keep_only_selected_keys():
+    rows = [{"id": 1, "name": "Juniper", "type": ProductTypeEnum.bonsai}]
+    assert json.loads(product_rows.dump_json(rows)) == [{"id": 1, "name": "Juniper", "type": "bonsai"}]
@@ -0,0 +1,61 @@
+import asyncio
+import pytest
+from app.services import product_service
+from app.services.catalog_cache import CatalogCache
+from app.services.single_flight import SingleFlight
+
+@pytest.fixture
+def flight(monkeypatch):
+    flight = SingleFlight()
+    monkeypatch.setattr(product_service, "single_flight", flight)
+    monkeypatch.setattr(product_service, "catalog_cache", CatalogCache(ttl=60, max_entries=16))
+    return flight
+
+def test_concurrent_identical_reads_run_one_query(flight, make_session, product):
+    async def burst():
+        # Slow queries, so the concurrent requests overlap
+        sessions = [make_session([product], scalar=7, delay=0.01) for _ in range(50)]
+        counts = await asyncio.gather(*(product_service.get_product_count(db) for db in sessions))
+        products = await asyncio.gather(*(product_service.get_product_by_id_service(1, db) for db in sessions))
+        return sessions, counts, products
+
+    sessions, counts, products = asyncio.run(burst())
+    assert sum(db.queries for db in sessions) == 2
+    assert set(counts) == {7} and {p.name for p in products} == {"Juniper"}
+    stats = flight.stats()
+    assert stats["product_count"] == {"calls": 50, "executions": 1, "coalesced": 49, "coalesced_ratio": 0.98}
+    assert stats["in_flight"] == 0
+
+def test_followers_share_the_leaders_exception():
+    flight, runs = SingleFlight(), []
+
+    async def failing():
+        runs.append(1)
+        await asyncio.sleep(0.01)
+        raise ValueError("database unavailable")
+
+    async def burst():
+        return await asyncio.gather(*(flight.do(("count",), failing) for _ in range(5)), return_exceptions=True)
+
+    results = asyncio.run(burst())
+    assert len(runs) == 1
+    assert all(isinstance(r, ValueError) for r in results)
+
+def test_follower_takes_over_when_leader_is_cancelled():
+    flight, runs = SingleFlight(), []
+
+    async def read():
+        runs.append(1)
+        await asyncio.sleep(0.01)
+        return len(runs)
+
+    async def scenario():
+        leader = asyncio.create_task(flight.do(("count",), read))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(flight.do(("count",), read))
+        await asyncio.sleep(0)
+        leader.cancel()
+        return await follower
+
+    assert asyncio.run(scenario()) == 2
+    assert flight.stats()["in_flight"] == 0
@@ -0,0 +1,58 @@
+import asyncio
+from app.services.sse_relay import KEEPALIVE_FRAME, SSEDecoder, relay_sse
+
+async def chunks(*parts, delay=0.0):
+    for part in parts:
+        if delay:
+            await asyncio.sleep(delay)
+        yield part
+
+async def collect(stream):
+    return [frame async for frame in stream]
+
+def test_decoder_reassembles_split_events():
+    decoder = SSEDecoder()
+    assert decoder.feed(b"data: PROGRESS:1:STA") == []
+    events = decoder.feed(b"RT:Camera\n\ndata: caf\xc3")
+    assert [e.data for e in events] == ["PROGRESS:1:START:Camera"]
+    events = decoder.feed(b"\xa9\r\n\r\n: comment\n\n")
+    assert [e.data for e in events] == ["café"]
+
+def test_relay_forwards_events_and_reports_them():
+    seen = []
+
+    async def on_event(event):
+        seen.append(event.data)
+
+    frames = asyncio.run(collect(relay_sse(
+        chunks(b"data: Job 1 started with 3 images\n", b"\ndata: JOB_COMPLETE:1\n\n"),
+        on_event=on_event,
+    )))
+    assert frames == [b"data: Job 1 started with 3 images\n\n", b"data: JOB_COMPLETE:1\n\n"]
+    assert seen == ["Job 1 started with 3 images", "JOB_COMPLETE:1"]
+
+def test_relay_sends_keepalive_when_idle():
+    frames = asyncio.run(collect(relay_sse(
+        chunks(b"data: PIPELINE:FINISHED\n\n", delay=0.05),
+        keepalive_interval=0.01,
+    )))
+    assert KEEPALIVE_FRAME in frames
+    assert frames[-1] == b"data: PIPELINE:FINISHED\n\n"
+
+def test_slow_client_drops_only_log_lines():
+    upstream = [f"data: log line {i}\n\n".encode() for i in range(50)]
+    upstream.insert(10, b"data: PROGRESS:1:START:Camera\n\n")
+    upstream.append(b"data: JOB_COMPLETE:1\n\n")
+
+    async def slow_client():
+        frames = []
+        async for frame in relay_sse(chunks(*upstream), max_buffered=5):
+            await asyncio.sleep(0.001)
+            frames.append(frame)
+        return frames
+
+    frames = asyncio.run(slow_client())
+    assert b"data: PROGRESS:1:START:Camera\n\n" in frames
+    assert frames[-1] == b"data: JOB_COMPLETE:1\n\n"
+    assert any(frame.startswith(b"data: [relay]") for frame in frames)
+    assert len(frames) < len(upstream)
@@ -0,0 +1,82 @@
+import asyncio
+import time
+import httpx
+import pytest
+from app.services.stripe_service import StripeAPIError, StripeClient, encode_form
+from scripts.stripe_stub import create_stub_app
+
+PARAMS = {
+    "mode": "payment",
+    "line_items": [{"price_data": {"currency": "brl", "unit_amount": 2500}, "quantity": 1}],
+    "metadata": {"product_ids": "1,2"},
+    "payment_method_types": ["card", "boleto"],
+    "success_url": "http://localhost:5173/sucess",
+}
+
+def client_for(stub, **kwargs):
+    return StripeClient("sk_test", base_url="http://stripe", backoff=0, transport=httpx.ASGITransport(app=stub), **kwargs)
+
+def test_nested_params_use_stripe_form_encoding():
+    assert encode_form(PARAMS) == [
+        ("mode", "payment"),
+        ("line_items[0][price_data][currency]", "brl"),
+        ("line_items[0][price_data][unit_amount]", "2500"),
+        ("line_items[0][quantity]", "1"),
+        ("metadata[product_ids]", "1,2"),
+        ("payment_method_types[0]", "card"),
+        ("payment_method_types[1]", "boleto"),
+        ("success_url", "http://localhost:5173/sucess"),
+    ]
+
+@pytest.mark.parametrize("fail_status", [500, 429])
+def test_transient_failures_are_retried_under_one_idempotency_key(fail_status):
+    stub = create_stub_app(fail_first=2, fail_status=fail_status)
+    client = client_for(stub, max_retries=2)
+
+    async def run():
+        try:
+            return await client.create_checkout_session(PARAMS)
+        finally:
+            await client.close()
+
+    session = asyncio.run(run())
+    assert session["id"].startswith("cs_test_") and session["metadata"] == {"product_ids": "1,2"}
+    assert len(stub.state.requests) == 3
+
+    with pytest.raises(StripeAPIError) as error:
+        asyncio.run(client_for(create_stub_app(fail_first=3, fail_status=fail_status), max_retries=2)
+                    .create_checkout_session(PARAMS))
+    assert error.value.status_code == fail_status
+
+def test_rejected_requests_are_not_retried():
+    stub = create_stub_app()
+    with pytest.raises(StripeAPIError) as error:
+        asyncio.run(client_for(stub, max_retries=3).create_checkout_session({"mode": "payment"}))
+    assert error.value.status_code == 400 and "success_url" in str(error.value)
+    assert len(stub.state.requests) == 1
+
+def test_checkouts_in_flight_do_not_stall_the_event_loop():
+    client = client_for(create_stub_app(latency=0.2), max_retries=0)
+
+    async def run():
+        lags = []
+
+        async def ticker():
+            while True:
+                started = time.perf_counter()
+                await asyncio.sleep(0.01)
+                lags.append(time.perf_counter() - started - 0.01)
+
+        ticking = asyncio.create_task(ticker())
+        started = time.perf_counter()
+        sessions = await asyncio.gather(*(client.create_checkout_session(PARAMS) for _ in range(20)))
+        elapsed = time.perf_counter() - started
+        ticking.cancel()
+        await client.close()
+        return sessions, elapsed, lags
+
+    sessions, elapsed, lags = asyncio.run(run())
+    assert len({session["id"] for session in sessions}) == 20
+    # Twenty 200 ms calls overlap instead of queueing, and other work keeps running
+    assert elapsed < 1.0
+    assert len(lags) > 10 and max(lags) < 0.1
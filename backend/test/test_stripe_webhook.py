@@ -0,0 +1,200 @@
+import asyncio
+import json
+import os
+import time
+from datetime import datetime, timezone
+from decimal import Decimal
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import func, select, text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
+from app.models.purchase import PurchaseModel
+from app.models.sales_rollup import SalesRollupModel
+from app.models.stripe_event import StripeEventModel
+from app.schemas.purchase import StatusTypeEnum
+from app.services.stripe_webhook_service import (
+    decode_cart_metadata, decode_unit_amounts, encode_cart_metadata, encode_unit_amounts, process_inbox_batch,
+    session_purchases, store_event, verify_event,
+)
+from scripts.stripe_webhook_fake import checkout_session_event, sign
+
+DATABASE_URL = os.environ.get("TEST_DATABASE_URL")
+SCHEMA = "webhook_tests"
+SECRET = "whsec_test"
+
+def test_signed_events_verify_and_tampered_or_stale_ones_do_not():
+    payload = json.dumps(checkout_session_event("cs_1", [1])).encode()
+    assert verify_event(payload, sign(payload, SECRET), SECRET, 300)["type"] == "checkout.session.completed"
+    for body, header in (
+        (payload.replace(b"cs_1", b"cs_2"), sign(payload, SECRET)),
+        (payload, sign(payload, "whsec_other")),
+        (payload, sign(payload, SECRET, int(time.time()) - 3600)),
+        (payload, None),
+    ):
+        with pytest.raises(HTTPException) as error:
+            verify_event(body, header, SECRET, 300)
+        assert error.value.status_code == 400
+
+def test_cart_metadata_carries_quantities():
+    assert encode_cart_metadata({4: 2, 9: 1, 12: 10}) == "4:2,9,12:10"
+    assert decode_cart_metadata("4:2,9,12:3") == [4, 4, 9, 12, 12, 12]
+    # Sessions created before quantities were stored list one ID per unit
+    assert decode_cart_metadata("4,4,9") == [4, 4, 9] and decode_cart_metadata("") == []
+    for value in ("4:0", "x", "4:-1"):
+        with pytest.raises(ValueError):
+            decode_cart_metadata(value)
+    assert encode_unit_amounts({4: 1990, 9: 500}) == "4:1990,9:500"
+    assert decode_unit_amounts("4:1990,9:500") == {4: 1990, 9: 500} and decode_unit_amounts("") == {}
+    with pytest.raises(ValueError):
+        decode_unit_amounts("4")
+
+def test_session_becomes_one_purchase_per_product_unit():
+    session = checkout_session_event("cs_1", [4, 4, 9], unit_amounts={4: 1990, 9: 500})["data"]["object"]
+    assert session["metadata"]["product_ids"] == "4:2,9"
+    rows = session_purchases(session, datetime(2026, 5, 1, tzinfo=timezone.utc))
+    assert [(row["product_id"], row["amount"]) for row in rows] == [(4, Decimal("19.90")), (4, Decimal("19.90")), (9, Decimal("5.00"))]
+    assert rows[0]["cep"] == 1310100 and rows[0]["complement"] == "Apto 12" and rows[0]["stripe_session_id"] == "cs_1"
+    # Sessions created before prices were stored leave the amount to the worker
+    unpriced = checkout_session_event("cs_2", [4])["data"]["object"]
+    assert session_purchases(unpriced, datetime(2026, 5, 1, tzinfo=timezone.utc))[0]["amount"] is None
+    unpriced["shipping_details"]["address"]["postal_code"] = "99999999999"
+    session["metadata"] = {}
+    for broken in (session, unpriced):
+        with pytest.raises(ValueError):
+            session_purchases(broken, datetime(2026, 5, 1, tzinfo=timezone.utc))
+
+@pytest.mark.skipif(not DATABASE_URL, reason="TEST_DATABASE_URL is not set")
+def test_redelivered_and_reordered_events_create_each_purchase_once():
+    engine = create_async_engine(
+        DATABASE_URL, poolclass=NullPool,
+        connect_args={"server_settings": {"search_path": f"{SCHEMA},public"}},
+    )
+    sessions = async_sessionmaker(engine, expire_on_commit=False)
+    now = int(time.time())
+    # Paid sessions carry the prices charged, which differ from today's catalog
+    paid = [checkout_session_event(f"cs_paid_{i}", [1, 2, 2], created=now, unit_amounts={1: 20000, 2: 3500})
+            for i in range(20)]
+    boleto_paid = [
+        checkout_session_event("cs_boleto_ok", [1], "checkout.session.async_payment_succeeded", created=now + 10),
+        checkout_session_event("cs_boleto_ok", [1], payment_status="unpaid", created=now),
+    ]
+    boleto_failed = [
+        checkout_session_event("cs_boleto_ko", [2], payment_status="unpaid", created=now),
+        checkout_session_event("cs_boleto_ko", [2], "checkout.session.async_payment_failed", created=now + 10),
+    ]
+    broken = checkout_session_event("cs_broken", [])
+    ignored = dict(checkout_session_event("cs_x", [1]), type="checkout.session.expired")
+
+    async def run():
+        async with engine.begin() as conn:
+            await conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+            await conn.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+            await conn.execute(text(f"CREATE TABLE {SCHEMA}.products (id integer PRIMARY KEY, price float)"))
+            await conn.execute(text(f"INSERT INTO {SCHEMA}.products VALUES (1, 250.0), (2, 40.0)"))
+            for table in (PurchaseModel.__table__, SalesRollupModel.__table__, StripeEventModel.__table__):
+                await conn.run_sync(lambda sync: table.create(
+                    sync.execution_options(schema_translate_map={None: SCHEMA})))
+
+        stored = []
+        for event in paid + boleto_paid + boleto_failed + [broken, ignored]:
+            for _ in range(3):  # Stripe delivers at least once
+                async with sessions() as db:
+                    stored.append(await store_event(db, event))
+        # The unpaid completion of cs_boleto_ok lands in a later batch than its settlement
+        first = await process_inbox_batch(sessions, limit=21)
+        # Concurrent workers share the rest without applying an event twice
+        rest = await asyncio.gather(*(process_inbox_batch(sessions, limit=2) for _ in range(4)))
+        while await process_inbox_batch(sessions, limit=2):
+            pass
+
+        async with sessions() as db:
+            purchases = (await db.execute(
+                select(PurchaseModel.stripe_session_id, PurchaseModel.status, func.count(), func.sum(PurchaseModel.amount))
+                .group_by(PurchaseModel.stripe_session_id, PurchaseModel.status)
+            )).all()
+            rollups = dict((await db.execute(
+                select(SalesRollupModel.status, SalesRollupModel.orders)
+                .where(SalesRollupModel.grain == "month", SalesRollupModel.dimension == "all")
+            )).all())
+            events = (await db.execute(select(StripeEventModel.id, StripeEventModel.processed_at, StripeEventModel.error))).all()
+        return stored, first, rest, purchases, rollups, events
+
+    try:
+        stored, first, rest, purchases, rollups, events = asyncio.run(run())
+    finally:
+        async def drop():
+            async with engine.begin() as conn:
+                await conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+            await engine.dispose()
+        asyncio.run(drop())
+
+    assert stored.count(True) == 25 and len(stored) == 26 * 3
+    assert first == 21 and sum(rest) == 4
+    by_session = {session_id: (status, count, amount) for session_id, status, count, amount in purchases}
+    assert len(by_session) == 22
+    assert all(by_session[f"cs_paid_{i}"] == (StatusTypeEnum.PAID, 3, 270.0) for i in range(20))
+    assert by_session["cs_boleto_ok"] == (StatusTypeEnum.PAID, 1, 250.0)
+    assert by_session["cs_boleto_ko"] == (StatusTypeEnum.FAILED, 1, 40.0)
+    assert rollups[StatusTypeEnum.PAID] == 61 and rollups[StatusTypeEnum.FAILED] == 1
+    assert rollups.get(StatusTypeEnum.PENDING, 0) == 0
+    assert all(processed_at is not None for _, processed_at, _ in events)
+    assert [error for event_id, _, error in events if error] == ["Skipped: no product_ids in the session metadata"]
+
+@pytest.mark.skipif(not DATABASE_URL, reason="TEST_DATABASE_URL is not set")
+def test_a_failing_event_does_not_hold_back_the_rest_of_its_batch():
+    engine = create_async_engine(
+        DATABASE_URL, poolclass=NullPool,
+        connect_args={"server_settings": {"search_path": f"{SCHEMA},public"}},
+    )
+    sessions = async_sessionmaker(engine, expire_on_commit=False)
+    events = [
+        checkout_session_event("cs_ok_1", [1], unit_amounts={1: 1000}),
+        checkout_session_event("cs_blocked", [1], email="blocked@example.com", unit_amounts={1: 1000}),
+        checkout_session_event("cs_ok_2", [1, 1], unit_amounts={1: 1000}),
+    ]
+
+    async def run():
+        async with engine.begin() as conn:
+            await conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+            await conn.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+            await conn.execute(text(f"CREATE TABLE {SCHEMA}.products (id integer PRIMARY KEY, price float)"))
+            for table in (PurchaseModel.__table__, SalesRollupModel.__table__, StripeEventModel.__table__):
+                await conn.run_sync(lambda sync: table.create(
+                    sync.execution_options(schema_translate_map={None: SCHEMA})))
+            # Stands in for any row the database refuses, failing the whole batch statement
+            await conn.execute(text(
+                f"ALTER TABLE {SCHEMA}.purchases ADD CONSTRAINT not_blocked CHECK (email <> 'blocked@example.com')"))
+
+        for event in events:
+            async with sessions() as db:
+                await store_event(db, event)
+        claimed = [await process_inbox_batch(sessions, limit=10) for _ in range(2)]
+
+        async with sessions() as db:
+            purchases = dict((await db.execute(
+                select(PurchaseModel.stripe_session_id, func.count()).group_by(PurchaseModel.stripe_session_id)
+            )).all())
+            inbox = {
+                event_id: (processed_at is not None, attempts, error)
+                for event_id, processed_at, attempts, error in (await db.execute(select(
+                    StripeEventModel.id, StripeEventModel.processed_at, StripeEventModel.attempts, StripeEventModel.error
+                ))).all()
+            }
+        return claimed, purchases, inbox
+
+    try:
+        claimed, purchases, inbox = asyncio.run(run())
+    finally:
+        async def drop():
+            async with engine.begin() as conn:
+                await conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+            await engine.dispose()
+        asyncio.run(drop())
+
+    assert claimed == [3, 1]
+    assert purchases == {"cs_ok_1": 1, "cs_ok_2": 2}
+    ok_1, blocked, ok_2 = (inbox[event["id"]] for event in events)
+    assert ok_1 == ok_2 == (True, 0, None)
+    # Only the failing event counts attempts, once per batch it was part of
+    assert blocked[:2] == (False, 2) and "not_blocked" in blocked[2]
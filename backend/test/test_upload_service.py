@@ -0,0 +1,76 @@
+import asyncio
+import hashlib
+import pytest
+from fastapi import HTTPException
+from app.core.config import settings
+from app.schemas.pipeline import UploadCreate
+from app.services.upload_service import assemble_upload, create_upload, write_chunk
+
+OWNER = "admin@example.com"
+DATA = bytes(range(256)) * 40  # 10240 bytes -> chunks of 4096, 4096, 2048
+
+async def body(data):
+    for i in range(0, len(data), 1000):
+        yield data[i:i + 1000]
+
+def put(upload_id, index, data, checksum=None):
+    checksum = checksum or hashlib.sha256(data).hexdigest()
+    return asyncio.run(write_chunk(upload_id, index, body(data), checksum, OWNER))
+
+@pytest.fixture(autouse=True)
+def upload_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "upload_dir", str(tmp_path))
+
+def test_chunks_out_of_order_assemble_to_original():
+    status = asyncio.run(create_upload(UploadCreate(filename="photos.zip", total_size=len(DATA), chunk_size=4096), OWNER))
+    assert status.total_chunks == 3
+
+    put(status.upload_id, 2, DATA[8192:])
+    status = put(status.upload_id, 0, DATA[:4096])
+    assert status.received_chunks == [0, 2] and not status.complete
+
+    status = put(status.upload_id, 1, DATA[4096:8192])
+    assert status.complete
+
+    path, filename, size = asyncio.run(assemble_upload(status.upload_id, OWNER))
+    with open(path, "rb") as f:
+        assert f.read() == DATA
+    assert filename == "photos.zip" and size == len(DATA)
+
+def test_bad_checksum_is_rejected_and_not_stored():
+    status = asyncio.run(create_upload(UploadCreate(filename="photos.zip", total_size=len(DATA), chunk_size=4096), OWNER))
+    with pytest.raises(HTTPException) as error:
+        put(status.upload_id, 0, DATA[:4096], checksum="0" * 64)
+    assert error.value.status_code == 422
+
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(assemble_upload(status.upload_id, OWNER))
+    assert error.value.status_code == 409
+
+def test_uploads_with_too_many_chunks_are_refused(monkeypatch):
+    monkeypatch.setattr(settings, "upload_max_chunks", 2)
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(create_upload(UploadCreate(filename="photos.zip", total_size=len(DATA), chunk_size=4096), OWNER))
+    assert error.value.status_code == 400 and "5120" in error.value.detail
+
+def test_chunk_indexes_are_not_limited_to_six_digits(monkeypatch):
+    monkeypatch.setattr(settings, "upload_max_chunks", 2_000_000)
+    status = asyncio.run(create_upload(UploadCreate(filename="photos.zip", total_size=1_000_002, chunk_size=1), OWNER))
+    status = put(status.upload_id, 1_000_001, b"x")
+    assert status.received_chunks == [1_000_001]
+
+def test_concurrent_assembly_is_refused():
+    status = asyncio.run(create_upload(UploadCreate(filename="photos.zip", total_size=len(DATA), chunk_size=4096), OWNER))
+    for index in range(3):
+        put(status.upload_id, index, DATA[index * 4096:(index + 1) * 4096])
+
+    async def assemble_twice():
+        return await asyncio.gather(*(assemble_upload(status.upload_id, OWNER) for _ in range(2)),
+                                    return_exceptions=True)
+
+    first, second = asyncio.run(assemble_twice())
+    assert isinstance(second, HTTPException) and second.status_code == 409
+    with open(first[0], "rb") as f:
+        assert f.read() == DATA
+    # Once the first assembly is done the upload can be assembled again
+    assert asyncio.run(assemble_upload(status.upload_id, OWNER))[2] == len(DATA)
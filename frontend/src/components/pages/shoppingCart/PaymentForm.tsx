@@ -9,15 +9,12 @@ export default function PaymentForm() {
   const [loading, setLoading] = useState(false);
   const [error, setError] = useState<string | null>(null);
   const [cartProducts, setCartProducts] = useState<Product[]>([]);
-  const [total, setTotal] = useState(0);
 
   useEffect(() => {
     async function loadCart() {
       try {
         const products = await CartService.getProductsCart();
         setCartProducts(products);
-        const sum = products.reduce((acc, product) => acc + parseFloat(product.price), 0);
-        setTotal(sum);
       } catch {
         setError("Erro ao carregar carrinho.");
       }
@@ -36,7 +33,7 @@ export default function PaymentForm() {
     setError(null);
 
     try {
-      const url = await CartService.initiateCheckout(method, cartProducts, total);
+      const url = await CartService.initiateCheckout(method);
       window.location.href = url;
     } catch (err: any) {
       setError('Erro ao redirecionar para o checkout.');
@@ -1,7 +1,11 @@
 import { useGLTF } from '@react-three/drei'
-import { useRef } from 'react'
+import { useEffect, useRef, useState } from 'react'
 import { Group } from 'three'
 import { useFrame } from '@react-three/fiber'
+import { GLTFLoader } from 'three/examples/jsm/loaders/GLTFLoader.js'
+
+// Pipeline outputs are named model_lod0.glb (full detail), model_lod1.glb, ...
+const LOD_PATTERN = /_lod(\d+)\.glb$/
 
 type ModelViewerProps = {
   path: string
@@ -20,8 +24,21 @@ export default function ModelViewer({
 }: ModelViewerProps) {
   const group = useRef<Group>(null)
   const { scene } = useGLTF(path)
+  const [detailed, setDetailed] = useState<Group | null>(null)
+
+  // A reduced level of detail is shown first; the full model replaces it once loaded
+  useEffect(() => {
+    setDetailed(null)
+    const lod = path.match(LOD_PATTERN)
+    if (!lod || lod[1] === '0') return
+    let cancelled = false
+    new GLTFLoader()
+      .loadAsync(path.replace(LOD_PATTERN, '_lod0.glb'))
+      .then((gltf) => { if (!cancelled) setDetailed(gltf.scene) })
+      .catch(() => { /* keep the reduced model */ })
+    return () => { cancelled = true }
+  }, [path])
 
-  
   useFrame(() => {
     if (autoRotateOnly && group.current) {
       group.current.rotation.y += 0.005
@@ -30,7 +47,7 @@ export default function ModelViewer({
 
   return (
     <group ref={group} position={position} rotation={rotation} scale={scale}>
-      <primitive object={scene} />
+      <primitive object={detailed ?? scene} />
     </group>
   )
 }
@@ -5,9 +5,11 @@ import { Suspense } from 'react'
 import { useNavigate } from 'react-router-dom'
 import ModelViewer from './ModelViewer'
 import { Product } from '../../models/Product'
+import ProductService, { ProductSummary } from '../../services/ProductService'
 
 type ProductCardProps = {
-  product: Product
+  // Grids only load the summary fields; the 3D view also needs the model
+  product: ProductSummary & Partial<Pick<Product, 'sourceModel'>>
   displayMode: 'image' | '3d'
 }
 
@@ -58,7 +60,7 @@ export default function ProductCard({ product, displayMode }: ProductCardProps)
         <CardMedia
           component="img"
           height="250"
-          image={product.sourceImage}
+          image={ProductService.getImageUrl(product.id, 640)}
           alt={product.name}
           sx={{ objectFit: 'cover' }}
         />
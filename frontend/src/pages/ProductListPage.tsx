@@ -1,8 +1,7 @@
-import { Box, Typography } from '@mui/material';
+import { Box, Button, Typography } from '@mui/material';
 import ProductCard from '../components/shared/ProductCard';
-import { Product } from '../models/Product';
 import { useEffect, useState } from 'react';
-import ProductService from '../services/ProductService';
+import ProductService, { ProductSummary } from '../services/ProductService';
 import { useLocation } from 'react-router-dom';
 
 interface ProductListProps {
@@ -11,8 +10,10 @@ interface ProductListProps {
 }
 
 export default function ProductList({ productType, title }: ProductListProps) {
-  const [products, setProducts] = useState<Product[]>([]);
+  const [products, setProducts] = useState<ProductSummary[]>([]);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
   const [loading, setLoading] = useState<boolean>(true);
+  const [loadingMore, setLoadingMore] = useState<boolean>(false);
   const [error, setError] = useState<string | null>(null);
 
   const location = useLocation();
@@ -21,28 +22,55 @@ export default function ProductList({ productType, title }: ProductListProps) {
 
   const displayTitle = title || (searchTerm ? `Results for "${searchTerm}"` : 'All products');
 
+  const errorMessage = (err: unknown) => (err instanceof Error ? err.message : 'Error while fetching products');
+
   useEffect(() => {
+    // Ignore a response that arrives after the filters changed again
+    let current = true;
+
     const fetchProducts = async () => {
       setLoading(true);
       setError(null);
 
       try {
-        const fetchedProducts = await ProductService.getAllProducts(productType, searchTerm);
-        setProducts(fetchedProducts);
+        const page = await ProductService.getProductPage(productType, searchTerm);
+        if (current) {
+          setProducts(page.products);
+          setNextCursor(page.nextCursor);
+        }
       } catch (err: unknown) {
-        if (err instanceof Error) {
-          setError(err.message);
-        } else {
-          setError('Error while fetching products');
+        if (current) {
+          setError(errorMessage(err));
         }
       } finally {
-        setLoading(false);
+        if (current) {
+          setLoading(false);
+        }
       }
     };
 
     fetchProducts();
+    return () => {
+      current = false;
+    };
   }, [productType, searchTerm]);
 
+  const loadMore = async () => {
+    if (!nextCursor) {
+      return;
+    }
+    setLoadingMore(true);
+    try {
+      const page = await ProductService.getProductPage(productType, searchTerm, nextCursor);
+      setProducts((loaded) => [...loaded, ...page.products]);
+      setNextCursor(page.nextCursor);
+    } catch (err: unknown) {
+      setError(errorMessage(err));
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   if (loading) {
     return (
       <Box sx={{ px: 4, py: 6, pt: '10rem', textAlign: 'center' }}>
@@ -91,6 +119,14 @@ export default function ProductList({ productType, title }: ProductListProps) {
           </Typography>
         )}
       </Box>
+
+      {nextCursor && (
+        <Box sx={{ mt: 4, textAlign: 'center' }}>
+          <Button variant="outlined" onClick={loadMore} disabled={loadingMore}>
+            {loadingMore ? 'Carregando...' : 'Carregar mais'}
+          </Button>
+        </Box>
+      )}
     </Box>
   );
 }
\ No newline at end of file
@@ -70,15 +70,14 @@ const CartService = {
 
   /**
    * Initiates a checkout session for the products in the cart.
-   * Requires valid authentication and sends payment method, products count, and total amount.
+   * Requires valid authentication and sends only the payment method: the
+   * backend builds the line items from the stored cart, at its own prices.
    * 
    * @param method Payment method: 'card' or 'boleto'
-   * @param products Array of products to purchase
-   * @param total Total amount for the purchase
    * @returns URL string for the checkout page to redirect the user
    * @throws Error if user is not authenticated or URL is missing in response
    */
-  async initiateCheckout(method: 'card' | 'boleto', products: Product[], total: number): Promise<string> {
+  async initiateCheckout(method: 'card' | 'boleto'): Promise<string> {
     let token = AuthService.getAccessToken();
 
     // Attempt token refresh if no valid token present
@@ -97,11 +96,7 @@ const CartService = {
     // Create checkout session on backend
     const response = await axios.post(
       `${backendURL}/create-checkout-session`,
-      {
-        product_name: `Compra de ${products.length} item(ns)`,
-        amount: total,
-        payment_method: method,
-      },
+      { payment_method: method },
       {
         headers: { Authorization: `Bearer ${token}` },
         withCredentials: true,
@@ -3,19 +3,36 @@ import { Product } from '../models/Product';
 
 const backendURL = import.meta.env.VITE_BACKEND_URL;
 
+// Products per page of product grids
+export const PRODUCT_PAGE_SIZE = 24;
+
+// Fields product grids show; descriptions and models are loaded on the product page
+const PRODUCT_SUMMARY_FIELDS = ['id', 'name', 'price'] as const;
+
+export type ProductSummary = Pick<Product, typeof PRODUCT_SUMMARY_FIELDS[number]>;
+
+export interface ProductPage {
+  products: ProductSummary[];
+  // Cursor of the next page, or null on the last page
+  nextCursor: string | null;
+}
+
 const ProductService = {
   
 
   /**
-   * Fetches a list of products from the backend API.
-   * Supports optional filtering by product type and search term.
+   * Fetches one page of products from the backend API.
+   * Supports optional filtering by product type and search term. Only the
+   * fields product grids show are requested; pass the returned cursor back
+   * to fetch the next page.
    * 
    * @param productType Optional string to filter products by type
    * @param searchTerm Optional string to search products by name
-   * @returns Promise resolving to an array of Product objects
+   * @param cursor Optional cursor of the page to fetch, from a previous page
+   * @returns Promise resolving to the products of the page and the next page's cursor
    * @throws Error with descriptive message if fetching fails
    */
-  async getAllProducts(productType?: string, searchTerm?: string): Promise<Product[]> {
+  async getProductPage(productType?: string, searchTerm?: string, cursor?: string): Promise<ProductPage> {
     const url = new URL(backendURL + '/products');
 
     // Add query parameters if provided
@@ -25,10 +42,18 @@ const ProductService = {
     if (searchTerm) {
       url.searchParams.append('name', searchTerm);
     }
+    url.searchParams.append('limit', String(PRODUCT_PAGE_SIZE));
+    url.searchParams.append('fields', PRODUCT_SUMMARY_FIELDS.join(','));
+    if (cursor) {
+      url.searchParams.append('cursor', cursor);
+    }
 
     try {
       const response = await axios.get(url.toString());
-      return response.data as Product[];
+      return {
+        products: response.data as ProductSummary[],
+        nextCursor: (response.headers?.['x-next-cursor'] as string | undefined) ?? null,
+      };
     } catch (err) {
       // Handle axios errors with response details
       if (axios.isAxiosError(err) && err.response) {
@@ -43,6 +68,19 @@ const ProductService = {
     }
   },
 
+  /**
+   * Builds the URL of a product image resized by the backend.
+   * The backend redirects to a versioned URL that browsers cache as immutable.
+   *
+   * @param id Product ID
+   * @param width Width preset in pixels (160, 320, 640, 960, 1280 or 1920)
+   * @param format Output format, WebP by default
+   * @returns URL to use as an image source
+   */
+  getImageUrl(id: number, width: number, format: 'webp' | 'jpeg' | 'png' = 'webp'): string {
+    return `${backendURL}/products/${id}/image?width=${width}&format=${format}`;
+  },
+
   /**
    * Fetches a single product by its ID.
    * 
@@ -43,7 +43,7 @@ describe('CartService', () => {
 
     // Call initiateCheckout and expect it to throw specific error message
     await expect(
-      CartService.initiateCheckout('card', [], 10)
+      CartService.initiateCheckout('card')
     ).rejects.toThrow("URL de checkout não recebida");
   });
 });
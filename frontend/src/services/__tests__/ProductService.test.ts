@@ -9,15 +9,29 @@ describe('ProductService', () => {
   // Clear mocks after each test to avoid interference between tests
   afterEach(() => jest.clearAllMocks());
 
-  it('fetches all products with filters', async () => {
+  it('fetches a page of products with filters and only the grid fields', async () => {
     // Setup mock response for filtered product list
-    const fakeProducts = [{ id: 1, name: 'Test Product' }];
-    mockedAxios.get.mockResolvedValueOnce({ data: fakeProducts });
+    const fakeProducts = [{ id: 1, name: 'Test Product', price: 10 }];
+    mockedAxios.get.mockResolvedValueOnce({ data: fakeProducts, headers: { 'x-next-cursor': 'abc' } });
 
-    // Call service and check that axios.get was called and data matches
-    const result = await ProductService.getAllProducts('food', 'cat');
-    expect(mockedAxios.get).toHaveBeenCalled();
-    expect(result).toEqual(fakeProducts);
+    // Call service and check the request and the returned page
+    const page = await ProductService.getProductPage('food', 'cat');
+    const url = new URL(mockedAxios.get.mock.calls[0][0] as string);
+    expect(url.searchParams.get('type')).toBe('food');
+    expect(url.searchParams.get('name')).toBe('cat');
+    expect(url.searchParams.get('fields')).toBe('id,name,price');
+    expect(url.searchParams.get('cursor')).toBeNull();
+    expect(page).toEqual({ products: fakeProducts, nextCursor: 'abc' });
+  });
+
+  it('fetches the next page through its cursor', async () => {
+    // The last page carries no X-Next-Cursor
+    mockedAxios.get.mockResolvedValueOnce({ data: [{ id: 3 }], headers: {} });
+
+    const page = await ProductService.getProductPage(undefined, undefined, 'abc');
+    expect(mockedAxios.get).toHaveBeenCalledTimes(1);
+    expect(mockedAxios.get.mock.calls[0][0]).toContain('cursor=abc');
+    expect(page.nextCursor).toBeNull();
   });
 
   it('fetches product by ID', async () => {
@@ -49,6 +63,6 @@ describe('ProductService', () => {
     });
 
     // Expect service to throw error including status code and text
-    await expect(ProductService.getAllProducts()).rejects.toThrow('Error while fetching products 500 Server Error');
+    await expect(ProductService.getProductPage()).rejects.toThrow('Error while fetching products 500 Server Error');
   });
 });
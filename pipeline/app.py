@@ -8,7 +8,8 @@ from datetime import datetime
 from fastapi import FastAPI, UploadFile, File, HTTPException, Header
 from fastapi.responses import StreamingResponse, FileResponse
 from fastapi.middleware.cors import CORSMiddleware
-from typing import Optional, List, Dict
+from typing import Optional, List, Dict, Deque, Set, Tuple
+from collections import deque
 import logging
 import json
 from pathlib import Path
@@ -33,8 +34,154 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-WORKDIR = "/data/jobs"
-SCRIPT_PATH = "/app/photogrammetry_pipeline.sh"
+# Paths and limits are configurable so several servers can run side by side
+# on one machine (e.g. PIPELINE_PORT=8091 PIPELINE_WORKDIR=/tmp/jobs-8091)
+WORKDIR = os.environ.get("PIPELINE_WORKDIR", "/data/jobs")
+SCRIPT_PATH = os.environ.get("PIPELINE_SCRIPT_PATH", "/app/photogrammetry_pipeline.sh")
+PORT = int(os.environ.get("PIPELINE_PORT", "8090"))
+MAX_CONCURRENT_JOBS = int(os.environ.get("PIPELINE_MAX_CONCURRENT_JOBS", "1"))
+
+# Jobs beyond MAX_CONCURRENT_JOBS wait for a slot; the counters below are
+# reported by /health so the backend can route new jobs to the least-loaded node
+job_slots = asyncio.Semaphore(MAX_CONCURRENT_JOBS)
+active_jobs = 0
+queued_jobs = 0
+
+# Progress fan-out: events a viewer may fall behind by before its oldest log
+# lines are dropped, and how long a finished job's events stay subscribable
+SUBSCRIBER_QUEUE_SIZE = int(os.environ.get("PIPELINE_SUBSCRIBER_QUEUE_SIZE", "256"))
+CHANNEL_RETENTION_SECONDS = float(os.environ.get("PIPELINE_CHANNEL_RETENTION", "600"))
+RECENT_LOG_LINES = 50
+
+# Messages that carry job state; they are kept for replay and never dropped
+CRITICAL_PREFIXES = (
+    "PROGRESS:", "FILETREE:", "JOB_COMPLETE:", "PIPELINE:", "Job ", "Starting pipeline",
+    "Process ", "ERROR", "EXECUTION ERROR", "GENERATOR ERROR",
+)
+
+def is_critical(frame: str) -> bool:
+    return frame[len("data: "):].startswith(CRITICAL_PREFIXES)
+
+class Subscriber:
+    """Bounded per-viewer queue of pre-encoded SSE frames"""
+    __slots__ = ("frames", "dropped", "ready", "closed")
+
+    def __init__(self):
+        self.frames: Deque[str] = deque()
+        self.dropped = 0
+        self.ready = asyncio.Event()
+        self.closed = False
+
+    def push(self, frame: str, critical: bool):
+        if len(self.frames) >= SUBSCRIBER_QUEUE_SIZE:
+            # Slow viewer: drop its oldest log line, never a state event
+            for i, queued in enumerate(self.frames):
+                if not is_critical(queued):
+                    del self.frames[i]
+                    self.dropped += 1
+                    break
+            else:
+                if not critical:
+                    self.dropped += 1
+                    return
+        self.frames.append(frame)
+        self.ready.set()
+
+    def close(self):
+        self.closed = True
+        self.ready.set()
+
+class JobChannel:
+    """Live events of one job plus enough history to bring late viewers up to date"""
+
+    def __init__(self):
+        self.sequence = 0
+        self.history: List[Tuple[int, str]] = []  # critical frames, kept for the whole job
+        self.recent: Deque[Tuple[int, str]] = deque(maxlen=RECENT_LOG_LINES)
+        self.subscribers: Set[Subscriber] = set()
+        self.finished = False
+
+    def replay(self) -> List[str]:
+        merged = sorted(self.history + list(self.recent))
+        return [frame for _, frame in merged]
+
+class BroadcastHub:
+    """
+    In-memory fan-out of job progress.
+
+    The job runner publishes each frame once; every viewer holds only a
+    reference to the shared string in its own bounded queue, so an extra
+    viewer costs a deque and an event, not a copy of the stream.
+    """
+
+    def __init__(self):
+        self.channels: Dict[str, JobChannel] = {}
+
+    def open(self, job_id: str) -> JobChannel:
+        channel = JobChannel()
+        self.channels[job_id] = channel
+        return channel
+
+    def publish(self, job_id: str, frame: str):
+        channel = self.channels.get(job_id)
+        if channel is None:
+            return
+        critical = is_critical(frame)
+        channel.sequence += 1
+        (channel.history if critical else channel.recent).append((channel.sequence, frame))
+        for subscriber in channel.subscribers:
+            subscriber.push(frame, critical)
+
+    def subscribe(self, job_id: str) -> Optional[Subscriber]:
+        channel = self.channels.get(job_id)
+        if channel is None:
+            return None
+        subscriber = Subscriber()
+        for frame in channel.replay():
+            subscriber.push(frame, is_critical(frame))
+        if channel.finished:
+            subscriber.close()
+        else:
+            channel.subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, job_id: str, subscriber: Subscriber):
+        channel = self.channels.get(job_id)
+        if channel is not None:
+            channel.subscribers.discard(subscriber)
+
+    def finish(self, job_id: str):
+        channel = self.channels.get(job_id)
+        if channel is None:
+            return
+        channel.finished = True
+        for subscriber in channel.subscribers:
+            subscriber.close()
+        channel.subscribers.clear()
+        # Keep the finished job's events around for late viewers, then forget it
+        asyncio.get_running_loop().call_later(CHANNEL_RETENTION_SECONDS, self.channels.pop, job_id, None)
+
+    async def stream(self, job_id: str, subscriber: Subscriber):
+        """Yield a viewer's frames until the job has finished and the queue is drained"""
+        try:
+            while True:
+                if subscriber.frames:
+                    if subscriber.dropped:
+                        yield f"data: [{subscriber.dropped} log line(s) skipped]\n\n"
+                        subscriber.dropped = 0
+                    yield subscriber.frames.popleft()
+                    continue
+                if subscriber.closed:
+                    break
+                subscriber.ready.clear()
+                await subscriber.ready.wait()
+        finally:
+            self.unsubscribe(job_id, subscriber)
+
+hub = BroadcastHub()
+
+# Running job tasks, referenced here so they are not garbage collected
+job_tasks: Set[asyncio.Task] = set()
 
 # Ensure work directory exists
 os.makedirs(WORKDIR, exist_ok=True)
@@ -265,24 +412,65 @@ async def run_pipeline(
         shutil.rmtree(job_dir, ignore_errors=True)
         raise HTTPException(status_code=400, detail=f"Error processing ZIP file: {str(e)}")
     
-    # Stream progress using Server-Sent Events
-    async def event_generator():
+    # Run the job independently of this connection and publish its progress
+    # to the hub; this response is just the first of any number of viewers
+    hub.open(job_id)
+    subscriber = hub.subscribe(job_id)
+    task = asyncio.create_task(run_job(job_id, job_dir, input_dir, output_dir, len(image_files)))
+    job_tasks.add(task)
+    task.add_done_callback(job_tasks.discard)
+    
+    logger.info("Starting streaming response")
+    return StreamingResponse(
+        hub.stream(job_id, subscriber),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "Connection": "keep-alive",
+            "Access-Control-Allow-Origin": "*",
+            "X-Job-ID": job_id,
+        }
+    )
+
+async def run_job(job_id: str, job_dir: str, input_dir: str, output_dir: str, image_count: int):
+    """Wait for a job slot, run the pipeline and publish every progress frame"""
+    global active_jobs, queued_jobs
+    try:
+        if job_slots.locked():
+            hub.publish(job_id, f"data: Job {job_id} queued, {queued_jobs} job(s) ahead\n\n")
+        queued_jobs += 1
+        try:
+            await job_slots.acquire()
+        finally:
+            queued_jobs -= 1
+        active_jobs += 1
         try:
-            yield f"data: Job {job_id} started with {len(image_files)} images\n\n"
+            hub.publish(job_id, f"data: Job {job_id} started with {image_count} images\n\n")
             
             async for progress_line in run_pipeline_with_progress(input_dir, output_dir, job_id):
-                yield progress_line
-                
-        except Exception as e:
-            logger.error(f"Event generator error: {str(e)}")
-            yield f"data: GENERATOR ERROR: {str(e)}\n\n"
+                hub.publish(job_id, progress_line)
         finally:
-            # IMPORTANT: Keep job directory for file downloads - DO NOT clean up
-            logger.info(f"Pipeline completed for job {job_id}, preserving directory: {job_dir}")
-    
-    logger.info("Starting streaming response")
+            active_jobs -= 1
+            job_slots.release()
+            
+    except Exception as e:
+        logger.error(f"Job runner error: {str(e)}")
+        hub.publish(job_id, f"data: GENERATOR ERROR: {str(e)}\n\n")
+    finally:
+        hub.finish(job_id)
+        # IMPORTANT: Keep job directory for file downloads - DO NOT clean up
+        logger.info(f"Pipeline completed for job {job_id}, preserving directory: {job_dir}")
+
+@app.get("/jobs/{job_id}/events")
+async def job_events(job_id: str):
+    """Subscribe to a live (or recently finished) job's progress stream"""
+    subscriber = hub.subscribe(job_id)
+    if subscriber is None:
+        raise HTTPException(status_code=404, detail="No live events for this job")
+    
+    logger.info(f"New viewer for job {job_id}")
     return StreamingResponse(
-        event_generator(),
+        hub.stream(job_id, subscriber),
         media_type="text/event-stream",
         headers={
             "Cache-Control": "no-cache",
@@ -477,7 +665,10 @@ async def health_check():
         "script_exists": script_exists,
         "script_executable": script_executable,
         "work_dir": WORKDIR,
-        "work_dir_exists": os.path.exists(WORKDIR)
+        "work_dir_exists": os.path.exists(WORKDIR),
+        "max_concurrent_jobs": MAX_CONCURRENT_JOBS,
+        "active_jobs": active_jobs,
+        "queue_length": queued_jobs
     }
 
 @app.get("/test")
@@ -487,4 +678,4 @@ async def test_endpoint():
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8090)
\ No newline at end of file
+    uvicorn.run(app, host="0.0.0.0", port=PORT)
\ No newline at end of file
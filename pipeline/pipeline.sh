@@ -48,7 +48,7 @@ echo "PROGRESS:INIT:COMPLETE:Found $IMAGE_COUNT images to process"
 
 # Step 1: Camera Initialization
 echo "PROGRESS:1:START:Camera Initialization"
-echo "Step 1/7: Camera Initialization..."
+echo "Step 1/8: Camera Initialization..."
 
 aliceVision_cameraInit-2.1 \
     --imageFolder "$INPUT_DIR" \
@@ -60,7 +60,7 @@ echo "PROGRESS:1:COMPLETE:Camera Initialization completed"
 
 # Step 2: Feature Extraction
 echo "PROGRESS:2:START:Feature Extraction"
-echo "Step 2/7: Feature Extraction..."
+echo "Step 2/8: Feature Extraction..."
 
 aliceVision_featureExtraction-1.2 \
     --input "$TEMP_DIR/cameraInit.sfm" \
@@ -72,7 +72,7 @@ echo "PROGRESS:2:COMPLETE:Feature Extraction completed"
 
 # Step 3: Image Matching
 echo "PROGRESS:3:START:Image Matching"
-echo "Step 3/7: Image Matching..."
+echo "Step 3/8: Image Matching..."
 
 aliceVision_imageMatching-1.0 \
     --input "$TEMP_DIR/cameraInit.sfm" \
@@ -84,7 +84,7 @@ echo "PROGRESS:3:COMPLETE:Image Matching completed"
 
 # Step 4: Feature Matching
 echo "PROGRESS:4:START:Feature Matching"
-echo "Step 4/7: Feature Matching..."
+echo "Step 4/8: Feature Matching..."
 
 aliceVision_featureMatching-2.0 \
     --input "$TEMP_DIR/cameraInit.sfm" \
@@ -96,7 +96,7 @@ echo "PROGRESS:4:COMPLETE:Feature Matching completed"
 
 # Step 5: Structure from Motion
 echo "PROGRESS:5:START:Structure from Motion"
-echo "Step 5/7: Structure from Motion..."
+echo "Step 5/8: Structure from Motion..."
 
 aliceVision_incrementalSfM-2.4 \
     --input "$TEMP_DIR/cameraInit.sfm" \
@@ -108,7 +108,7 @@ echo "PROGRESS:5:COMPLETE:Structure from Motion completed"
 
 # Step 6: Meshing
 echo "PROGRESS:6:START:Meshing"
-echo "Step 6/7: Meshing..."
+echo "Step 6/8: Meshing..."
 
 aliceVision_meshing-4.0 \
     --input "$TEMP_DIR/sfm.abc" \
@@ -119,7 +119,7 @@ echo "PROGRESS:6:COMPLETE:Meshing completed"
 
 # Step 7: Texturing
 echo "PROGRESS:7:START:Texturing"
-echo "Step 7/7: Texturing..."
+echo "Step 7/8: Texturing..."
 
 aliceVision_texturing-3.0 \
     --input "$TEMP_DIR/sfm.abc" \
@@ -129,6 +129,20 @@ aliceVision_texturing-3.0 \
 
 echo "PROGRESS:7:COMPLETE:Texturing completed"
 
+# Step 8: Web Assets (CPU): decimated GLB levels of detail with 8-bit textures.
+# Not fatal: the textured mesh is already written and the step can be rerun alone
+echo "PROGRESS:8:START:Web Assets"
+echo "Step 8/8: Web Assets..."
+
+WEB_ASSETS_STATUS=0
+python3 "$(dirname "$0")/postprocess.py" "$OUTPUT_DIR" || WEB_ASSETS_STATUS=$?
+
+if [ $WEB_ASSETS_STATUS -eq 0 ]; then
+    echo "PROGRESS:8:COMPLETE:Web Assets completed"
+else
+    echo "PROGRESS:8:FAILED:Web Assets failed with exit code $WEB_ASSETS_STATUS"
+fi
+
 echo "=========================================="
 echo "Pipeline completed successfully!"
 echo "Results saved to: $OUTPUT_DIR"
@@ -136,6 +150,11 @@ echo "Main outputs:"
 echo "- Mesh: $OUTPUT_DIR/mesh.obj"
 echo "- Textured Mesh: $OUTPUT_DIR/texturedMesh.obj"
 echo "- Texture files: $OUTPUT_DIR/texture_*.exr"
+if [ $WEB_ASSETS_STATUS -eq 0 ]; then
+    echo "- Web models: $OUTPUT_DIR/web/model_lod*.glb"
+else
+    echo "- Web models: FAILED (rerun: python3 postprocess.py $OUTPUT_DIR)"
+fi
 echo "- Camera reconstruction: $TEMP_DIR/sfm.abc"
 echo "=========================================="
 
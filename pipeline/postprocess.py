@@ -0,0 +1,409 @@
+"""
+Web asset post-processing of a reconstructed mesh (CPU only).
+
+Usage: python3 postprocess.py <output_folder>
+
+Reads texturedMesh.obj, its .mtl and the textures written by the Texturing
+step from <output_folder> and writes to <output_folder>/web:
+
+- model_lod0.glb, model_lod1.glb, ...: binary glTF files, each decimated
+  to a fraction of the original triangles (PIPELINE_LOD_RATIOS) with
+  textures at a matching size (PIPELINE_LOD_TEXTURE_SIZES) embedded
+- textures/<name>_<size>.jpg: 8-bit sRGB textures at every mip size
+- manifest.json: triangle counts, file sizes and textures of every LOD
+
+Products can point sourceModel at the smallest LOD; the storefront shows it
+first and swaps in model_lod0.glb once that has loaded.
+"""
+import json
+import logging
+import os
+import re
+import struct
+import sys
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+LOD_RATIOS = [float(r) for r in os.environ.get("PIPELINE_LOD_RATIOS", "1.0,0.25,0.05").split(",")]
+LOD_TEXTURE_SIZES = [int(s) for s in os.environ.get("PIPELINE_LOD_TEXTURE_SIZES", "4096,1024,512").split(",")]
+JPEG_QUALITY = int(os.environ.get("PIPELINE_TEXTURE_QUALITY", "85"))
+MIN_MIP_SIZE = 128
+
+# Vertex clustering grid: finest resolution along the longest axis, and how
+# many times finer the texture coordinate grid is (keeps UV seams intact)
+MAX_GRID_CELLS = 1024
+UV_GRID_FACTOR = 4
+
+_UDIM_RE = re.compile(r"(1\d{3})\D*$")
+
+
+@dataclass
+class Primitive:
+    """Triangles of one material, with per-vertex attributes."""
+    material: str
+    positions: np.ndarray  # (n, 3) float32
+    uvs: np.ndarray  # (n, 2) float32, glTF convention (origin top-left)
+    indices: np.ndarray  # (m, 3) uint32
+
+    @property
+    def triangles(self) -> int:
+        return len(self.indices)
+
+
+def _floats(lines: List[str], columns: int) -> np.ndarray:
+    if not lines:
+        return np.zeros((0, columns), dtype=np.float32)
+    width = len(lines[0].split())
+    values = np.fromstring(" ".join(lines), dtype=np.float64, sep=" ")
+    if values.size != width * len(lines):
+        raise ValueError("Vertex lines have an inconsistent number of values")
+    return values.reshape(len(lines), width)[:, :columns].astype(np.float32)
+
+
+def _corners(lines: List[str]) -> np.ndarray:
+    # "f 1/1 2/2 3/3" -> [[[1, 1], [2, 2], [3, 3]]]; "v//vn" keeps an empty UV slot as 0
+    first = lines[0].split()
+    if any(len(line.split()) != 3 for line in lines):
+        raise ValueError("Only triangulated meshes are supported")
+    per_corner = len(first[0].split("/"))
+    text = " ".join(lines).replace("//", "/0/").replace("/", " ")
+    values = np.fromstring(text, dtype=np.int64, sep=" ")
+    if values.size != len(lines) * 3 * per_corner:
+        raise ValueError("Face lines mix different vertex formats")
+    corners = values.reshape(len(lines), 3, per_corner)
+    if (corners[:, :, 0] < 0).any():
+        raise ValueError("Relative (negative) OBJ indices are not supported")
+    return corners
+
+
+def _udim_offset(texture: Optional[str]) -> Tuple[int, int]:
+    # texture_1002.exr holds UVs in [1, 2) x [0, 1), texture_1011 in [0, 1) x [1, 2)
+    match = _UDIM_RE.search(os.path.splitext(texture or "")[0])
+    if not match:
+        return 0, 0
+    tile = int(match.group(1)) - 1001
+    return tile % 10, tile // 10
+
+
+def parse_mtl(path: str) -> Dict[str, str]:
+    """Maps material names to their diffuse texture file."""
+    textures, current = {}, None
+    with open(path) as f:
+        for line in f:
+            parts = line.strip().split(maxsplit=1)
+            if len(parts) < 2:
+                continue
+            if parts[0] == "newmtl":
+                current = parts[1]
+            elif parts[0] == "map_Kd" and current is not None:
+                textures[current] = parts[1]
+    return textures
+
+
+def parse_obj(path: str, textures: Dict[str, str]) -> List[Primitive]:
+    """
+    Parses a triangulated, textured OBJ into one primitive per material.
+
+    Lines are only sorted by type in Python; the numbers themselves are
+    parsed by NumPy in bulk. OBJ corners with the same position and UV
+    indices become one vertex, as glTF needs one index per vertex.
+    """
+    vertex_lines, uv_lines = [], []
+    faces: Dict[str, List[str]] = {}
+    current = faces.setdefault("", [])
+    with open(path) as f:
+        for line in f:
+            if line.startswith("v "):
+                vertex_lines.append(line[2:])
+            elif line.startswith("vt "):
+                uv_lines.append(line[3:])
+            elif line.startswith("f "):
+                current.append(line[2:])
+            elif line.startswith("usemtl "):
+                current = faces.setdefault(line[7:].strip(), [])
+
+    positions = _floats(vertex_lines, 3)
+    uvs = _floats(uv_lines, 2)
+    primitives = []
+    for material, lines in faces.items():
+        if not lines:
+            continue
+        corners = _corners(lines)
+        vertex_index = corners[:, :, 0].ravel() - 1
+        uv_index = corners[:, :, 1].ravel() - 1 if corners.shape[2] > 1 else np.full(vertex_index.size, -1)
+        keys = vertex_index * (len(uvs) + 1) + (uv_index + 1)
+        unique_keys, inverse = np.unique(keys, return_inverse=True)
+        unique_vertices = unique_keys // (len(uvs) + 1)
+        unique_uvs = unique_keys % (len(uvs) + 1) - 1
+
+        u_offset, v_offset = _udim_offset(textures.get(material))
+        primitive_uvs = np.zeros((len(unique_keys), 2), dtype=np.float32)
+        has_uv = unique_uvs >= 0
+        primitive_uvs[has_uv] = uvs[unique_uvs[has_uv]] - (u_offset, v_offset)
+        primitive_uvs[:, 1] = 1.0 - primitive_uvs[:, 1]
+
+        primitives.append(Primitive(
+            material=material,
+            positions=positions[unique_vertices],
+            uvs=primitive_uvs,
+            indices=inverse.reshape(-1, 3).astype(np.uint32),
+        ))
+    logger.info("Parsed %s: %d vertices, %d triangles, %d materials", path, len(positions),
+                sum(p.triangles for p in primitives), len(primitives))
+    return primitives
+
+
+def _cluster(primitive: Primitive, origin: np.ndarray, cell_size: float, cells: int) -> Primitive:
+    # Merge the vertices sharing a grid cell and a UV cell into their mean,
+    # then drop the triangles that collapsed and the duplicates left over
+    grid = np.clip(((primitive.positions - origin) / cell_size).astype(np.int64), 0, cells - 1)
+    uv_cells = cells * UV_GRID_FACTOR
+    uv_grid = np.clip((primitive.uvs * uv_cells).astype(np.int64), 0, uv_cells - 1)
+    keys = ((grid[:, 0] * cells + grid[:, 1]) * cells + grid[:, 2]) * uv_cells * uv_cells
+    keys += uv_grid[:, 0] * uv_cells + uv_grid[:, 1]
+    _, cluster_of, counts = np.unique(keys, return_inverse=True, return_counts=True)
+
+    positions = np.stack([np.bincount(cluster_of, primitive.positions[:, c]) for c in range(3)], axis=1)
+    uvs = np.stack([np.bincount(cluster_of, primitive.uvs[:, c]) for c in range(2)], axis=1)
+    positions /= counts[:, None]
+    uvs /= counts[:, None]
+
+    indices = cluster_of[primitive.indices]
+    indices = indices[(indices[:, 0] != indices[:, 1]) & (indices[:, 1] != indices[:, 2]) & (indices[:, 0] != indices[:, 2])]
+    _, first = np.unique(np.sort(indices, axis=1), axis=0, return_index=True)
+    indices = indices[np.sort(first)]
+
+    used, remapped = np.unique(indices, return_inverse=True)
+    return Primitive(
+        material=primitive.material,
+        positions=positions[used].astype(np.float32),
+        uvs=uvs[used].astype(np.float32),
+        indices=remapped.reshape(-1, 3).astype(np.uint32),
+    )
+
+
+def decimate(primitives: List[Primitive], ratio: float) -> List[Primitive]:
+    """
+    Reduces the mesh to about `ratio` of its triangles by vertex clustering.
+
+    One grid is shared by all primitives so material borders stay closed;
+    its resolution is found by bisection on the resulting triangle count.
+    """
+    if ratio >= 1.0:
+        return primitives
+    target = ratio * sum(p.triangles for p in primitives)
+    all_positions = np.concatenate([p.positions for p in primitives])
+    origin = all_positions.min(axis=0)
+    extent = float((all_positions.max(axis=0) - origin).max()) or 1.0
+
+    low, high, best = 2, MAX_GRID_CELLS, None
+    while low <= high:
+        cells = (low + high) // 2
+        cell_size = extent / cells * (1 + 1e-6)
+        result = [_cluster(p, origin, cell_size, cells) for p in primitives]
+        if sum(p.triangles for p in result) <= target:
+            best, low = result, cells + 1
+        else:
+            high = cells - 1
+    if best is None:
+        cells = 2
+        best = [_cluster(p, origin, extent / cells * (1 + 1e-6), cells) for p in primitives]
+    return [p for p in best if p.triangles]
+
+
+def vertex_normals(primitive: Primitive) -> np.ndarray:
+    """Area-weighted smooth normals."""
+    corners = primitive.positions[primitive.indices]
+    face_normals = np.cross(corners[:, 1] - corners[:, 0], corners[:, 2] - corners[:, 0])
+    flat = primitive.indices.ravel()
+    normals = np.stack([
+        np.bincount(flat, np.repeat(face_normals[:, c], 3), minlength=len(primitive.positions))
+        for c in range(3)
+    ], axis=1)
+    length = np.linalg.norm(normals, axis=1, keepdims=True)
+    normals /= np.where(length > 0, length, 1.0)
+    return normals.astype(np.float32)
+
+
+def load_texture(path: str) -> Image.Image:
+    """
+    Loads a texture as an 8-bit RGB image.
+
+    EXR files hold linear floating point color; it is clipped to [0, 1] and
+    encoded with the sRGB transfer function.
+    """
+    if not path.lower().endswith(".exr"):
+        return Image.open(path).convert("RGB")
+    import OpenEXR  # only needed for EXR textures
+
+    with OpenEXR.File(path) as exr:
+        channels = exr.channels()
+        if "RGB" in channels or "RGBA" in channels:
+            pixels = (channels.get("RGB") or channels["RGBA"]).pixels[..., :3]
+        else:
+            pixels = np.stack([channels[c].pixels for c in ("R", "G", "B")], axis=-1)
+    linear = np.clip(np.nan_to_num(pixels.astype(np.float32)), 0.0, 1.0)
+    srgb = np.where(linear <= 0.0031308, linear * 12.92, 1.055 * np.power(linear, 1 / 2.4) - 0.055)
+    return Image.fromarray((srgb * 255 + 0.5).astype(np.uint8), "RGB")
+
+
+def write_mips(image: Image.Image, directory: str, name: str) -> Dict[int, str]:
+    """Writes the texture at its size and every halving down to MIN_MIP_SIZE."""
+    os.makedirs(directory, exist_ok=True)
+    mips = {}
+    while True:
+        size = max(image.size)
+        path = os.path.join(directory, f"{name}_{size}.jpg")
+        image.save(path, "JPEG", quality=JPEG_QUALITY, optimize=True, progressive=True)
+        mips[size] = path
+        if size // 2 < MIN_MIP_SIZE:
+            return mips
+        image = image.resize((max(1, image.width // 2), max(1, image.height // 2)), Image.Resampling.LANCZOS)
+
+
+def pick_mip(mips: Dict[int, str], size: int) -> str:
+    """The largest mip not above `size`, or the smallest one."""
+    fitting = [s for s in mips if s <= size]
+    return mips[max(fitting) if fitting else min(mips)]
+
+
+class GlbWriter:
+    """Packs triangle primitives and their JPEG textures into one binary glTF."""
+
+    def __init__(self):
+        self.gltf = {
+            "asset": {"version": "2.0", "generator": "Mozukai pipeline"},
+            "extensionsUsed": ["KHR_materials_unlit"],
+            "scene": 0,
+            "scenes": [{"nodes": [0]}],
+            "nodes": [{"mesh": 0}],
+            "meshes": [{"primitives": []}],
+            "accessors": [],
+            "bufferViews": [],
+            "buffers": [],
+            "materials": [],
+            "textures": [],
+            "images": [],
+            "samplers": [{"magFilter": 9729, "minFilter": 9987, "wrapS": 33071, "wrapT": 33071}],
+        }
+        self.binary = bytearray()
+        self.materials: Dict[str, int] = {}
+
+    def _view(self, data: bytes, target: Optional[int] = None) -> int:
+        self.binary += b"\0" * (-len(self.binary) % 4)
+        view = {"buffer": 0, "byteOffset": len(self.binary), "byteLength": len(data)}
+        if target is not None:
+            view["target"] = target
+        self.binary += data
+        self.gltf["bufferViews"].append(view)
+        return len(self.gltf["bufferViews"]) - 1
+
+    def _accessor(self, array: np.ndarray, kind: str, component: int, target: int, bounds: bool = False) -> int:
+        accessor = {
+            "bufferView": self._view(array.tobytes(), target),
+            "componentType": component,
+            "count": len(array) if array.ndim > 1 else array.size,
+            "type": kind,
+        }
+        if bounds:
+            accessor["min"] = array.min(axis=0).tolist()
+            accessor["max"] = array.max(axis=0).tolist()
+        self.gltf["accessors"].append(accessor)
+        return len(self.gltf["accessors"]) - 1
+
+    def add_material(self, name: str, texture_path: Optional[str]) -> int:
+        material = {"name": name or "default", "extensions": {"KHR_materials_unlit": {}},
+                    "pbrMetallicRoughness": {"metallicFactor": 0.0, "roughnessFactor": 1.0}}
+        if texture_path:
+            with open(texture_path, "rb") as f:
+                image = self._view(f.read())
+            self.gltf["images"].append({"bufferView": image, "mimeType": "image/jpeg"})
+            self.gltf["textures"].append({"sampler": 0, "source": len(self.gltf["images"]) - 1})
+            material["pbrMetallicRoughness"]["baseColorTexture"] = {"index": len(self.gltf["textures"]) - 1}
+        self.gltf["materials"].append(material)
+        self.materials[name] = len(self.gltf["materials"]) - 1
+        return self.materials[name]
+
+    def add_primitive(self, primitive: Primitive, texture_path: Optional[str]) -> None:
+        if primitive.material not in self.materials:
+            self.add_material(primitive.material, texture_path)
+        small = len(primitive.positions) < 65536
+        indices = primitive.indices.astype(np.uint16 if small else np.uint32).ravel()
+        self.gltf["meshes"][0]["primitives"].append({
+            "attributes": {
+                "POSITION": self._accessor(primitive.positions, "VEC3", 5126, 34962, bounds=True),
+                "NORMAL": self._accessor(vertex_normals(primitive), "VEC3", 5126, 34962),
+                "TEXCOORD_0": self._accessor(primitive.uvs, "VEC2", 5126, 34962),
+            },
+            "indices": self._accessor(indices, "SCALAR", 5123 if small else 5125, 34963),
+            "material": self.materials[primitive.material],
+        })
+
+    def write(self, path: str) -> int:
+        self.binary += b"\0" * (-len(self.binary) % 4)
+        self.gltf["buffers"] = [{"byteLength": len(self.binary)}]
+        document = json.dumps(self.gltf, separators=(",", ":")).encode()
+        document += b" " * (-len(document) % 4)
+        total = 12 + 8 + len(document) + 8 + len(self.binary)
+        with open(path, "wb") as f:
+            f.write(struct.pack("<III", 0x46546C67, 2, total))
+            f.write(struct.pack("<II", len(document), 0x4E4F534A) + document)
+            f.write(struct.pack("<II", len(self.binary), 0x004E4942) + bytes(self.binary))
+        return total
+
+
+def process(output_dir: str) -> dict:
+    """Builds the web assets of one job output folder and returns the manifest."""
+    obj_path = os.path.join(output_dir, "texturedMesh.obj")
+    mtl_path = os.path.join(output_dir, "texturedMesh.mtl")
+    web_dir = os.path.join(output_dir, "web")
+    os.makedirs(web_dir, exist_ok=True)
+
+    textures = parse_mtl(mtl_path) if os.path.exists(mtl_path) else {}
+    primitives = parse_obj(obj_path, textures)
+    if not primitives:
+        raise ValueError(f"{obj_path} has no faces")
+
+    mips: Dict[str, Dict[int, str]] = {}
+    for material, texture in textures.items():
+        started = time.perf_counter()
+        name = os.path.splitext(os.path.basename(texture))[0]
+        image = load_texture(os.path.join(output_dir, texture))
+        mips[material] = write_mips(image, os.path.join(web_dir, "textures"), name)
+        logger.info("Texture %s: %d mip sizes in %.1fs", texture, len(mips[material]), time.perf_counter() - started)
+
+    manifest = {"lods": [], "textures": {
+        material: {str(size): os.path.relpath(path, web_dir) for size, path in sizes.items()}
+        for material, sizes in mips.items()
+    }}
+    for level, ratio in enumerate(LOD_RATIOS):
+        started = time.perf_counter()
+        texture_size = LOD_TEXTURE_SIZES[min(level, len(LOD_TEXTURE_SIZES) - 1)]
+        lod = decimate(primitives, ratio)
+        writer = GlbWriter()
+        for primitive in lod:
+            texture = pick_mip(mips[primitive.material], texture_size) if primitive.material in mips else None
+            writer.add_primitive(primitive, texture)
+        file_name = f"model_lod{level}.glb"
+        size = writer.write(os.path.join(web_dir, file_name))
+        triangles = sum(p.triangles for p in lod)
+        manifest["lods"].append({"file": file_name, "triangles": triangles, "bytes": size, "max_texture_size": texture_size})
+        logger.info("LOD %d: %d triangles, %.1f MB in %.1fs", level, triangles, size / 1e6, time.perf_counter() - started)
+
+    with open(os.path.join(web_dir, "manifest.json"), "w") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        logger.error("Usage: %s <output_folder>", sys.argv[0])
+        sys.exit(1)
+    process(sys.argv[1])
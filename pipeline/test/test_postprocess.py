@@ -0,0 +1,78 @@
+import json
+import struct
+
+import numpy as np
+from PIL import Image
+
+from postprocess import GlbWriter, Primitive, decimate, parse_obj
+
+OBJ = """\
+v 0 0 0
+v 1 0 0
+v 1 1 0
+v 0 1 0
+vt 1.0 0.0
+vt 1.5 0.0
+vt 1.5 1.0
+vt 1.0 1.0
+usemtl leaves
+f 1/1 2/2 3/3
+f 1/1 3/3 4/4
+usemtl bark
+f 1//1 2//1 4//1
+"""
+
+def grid(size=40):
+    # A size x size square of quads, two triangles each
+    ys, xs = np.mgrid[0:size + 1, 0:size + 1]
+    positions = np.stack([xs.ravel(), ys.ravel(), np.zeros(xs.size)], axis=1).astype(np.float32)
+    corner = (ys[:-1, :-1] * (size + 1) + xs[:-1, :-1]).ravel()
+    indices = np.concatenate([
+        np.stack([corner, corner + 1, corner + size + 2], axis=1),
+        np.stack([corner, corner + size + 2, corner + size + 1], axis=1),
+    ]).astype(np.uint32)
+    return Primitive("", positions, positions[:, :2] / size, indices)
+
+def test_parse_obj_shares_corners_and_moves_udim_tiles_to_the_origin(tmp_path):
+    path = tmp_path / "mesh.obj"
+    path.write_text(OBJ)
+    leaves, bark = parse_obj(str(path), {"leaves": "texture_1002.exr"})
+
+    assert (leaves.material, leaves.triangles, len(leaves.positions)) == ("leaves", 2, 4)
+    assert bark.triangles == 1 and np.allclose(bark.uvs, (0.0, 1.0))  # no UVs: (0, 0) flipped
+    # Tile 1002 starts at u = 1; V is flipped to glTF's top-left origin
+    corner = leaves.uvs[np.flatnonzero((leaves.positions == (1, 1, 0)).all(axis=1))[0]]
+    assert np.allclose(corner, (0.5, 0.0))
+
+def test_decimate_reaches_the_ratio_within_the_mesh_bounds():
+    mesh = grid()
+    assert decimate([mesh], 1.0) == [mesh]
+
+    [lod] = decimate([mesh], 0.25)
+    assert 0 < lod.triangles <= 0.25 * mesh.triangles
+    assert lod.positions.min() >= 0 and lod.positions.max() <= 40
+    assert lod.indices.max() < len(lod.positions)
+
+def test_glb_writer_packs_a_valid_binary_gltf(tmp_path):
+    texture = tmp_path / "texture.jpg"
+    Image.new("RGB", (8, 8), "green").save(texture)
+    writer = GlbWriter()
+    writer.add_primitive(grid(4), str(texture))
+    size = writer.write(str(tmp_path / "model.glb"))
+
+    data = (tmp_path / "model.glb").read_bytes()
+    magic, version, total = struct.unpack_from("<III", data)
+    assert (magic, version, total) == (0x46546C67, 2, size) and size == len(data)
+    json_length, json_type = struct.unpack_from("<II", data, 12)
+    gltf = json.loads(data[20:20 + json_length])
+    bin_length, bin_type = struct.unpack_from("<II", data, 20 + json_length)
+    assert (json_type, bin_type) == (0x4E4F534A, 0x004E4942)
+    assert json_length % 4 == 0 and bin_length == gltf["buffers"][0]["byteLength"]
+
+    [primitive] = gltf["meshes"][0]["primitives"]
+    positions = gltf["accessors"][primitive["attributes"]["POSITION"]]
+    assert positions["count"] == 25 and positions["max"] == [4, 4, 0]
+    assert gltf["accessors"][primitive["indices"]]["count"] == 32 * 3
+    image = gltf["bufferViews"][gltf["images"][0]["bufferView"]]
+    start = 20 + json_length + 8 + image["byteOffset"]
+    assert data[start:start + image["byteLength"]] == texture.read_bytes()